@@ -1,7 +1,10 @@
 """
 admin_repo.py — Firestore operations for admin_credentials collection.
+
+Documents are keyed by normalized email (see credentials_repo).
 """
 
+from app.db.credentials_repo import credentials_ref, legacy_lookup, normalize_email
 from app.db.firebase import db
 
 
@@ -19,16 +22,11 @@ def get_admin_by_username(username: str):
 
 
 def get_admin_by_email(email: str):
-    """Look up an admin by email. Returns dict with 'id' or None."""
-    docs = (
-        db.collection("admin_credentials")
-        .where("email", "==", email)
-        .limit(1)
-        .stream()
-    )
-    for doc in docs:
+    """Look up an admin by email — one document get. Returns dict with 'id' or None."""
+    doc = credentials_ref("admin_credentials", email).get()
+    if doc.exists:
         return {**doc.to_dict(), "id": doc.id}
-    return None
+    return legacy_lookup("admin_credentials", email)
 
 
 def update_admin_password(doc_id: str, new_hash: str):
@@ -39,12 +37,15 @@ def update_admin_password(doc_id: str, new_hash: str):
 
 
 def create_admin(username: str, email: str, password_hash: str):
-    """Create a new admin_credentials document."""
-    doc_ref = db.collection("admin_credentials").document()
-    doc_ref.set(
+    """
+    Create a new admin_credentials document. Raises ``AlreadyExists`` if
+    an admin with this email exists.
+    """
+    doc_ref = credentials_ref("admin_credentials", email)
+    doc_ref.create(
         {
             "username": username,
-            "email": email,
+            "email": normalize_email(email),
             "password_hash": password_hash,
             "role": "admin",
         }
@@ -0,0 +1,8 @@
+"""
+aio — Async twins of the repo modules, built on ``async_db``.
+
+Function names and return shapes match the sync repos in ``app.db``;
+only the I/O is awaited, so async route handlers can run independent
+reads and writes concurrently instead of tying up a threadpool thread
+per request.
+"""
@@ -0,0 +1,85 @@
+"""
+aio/appointment_repo.py — Async Firestore operations for the appointments collection.
+"""
+
+from datetime import datetime, timezone
+
+from app.db.firebase import async_db
+from app.db.appointment_repo import _decode_cursor, _encode_cursor
+from app.db.stats_repo import add_stats_increments
+
+
+def _to_row(doc) -> dict:
+    d = doc.to_dict()
+    d["id"] = doc.id
+    if hasattr(d.get("created_at"), "isoformat"):
+        d["created_at"] = d["created_at"].isoformat()
+    return d
+
+
+async def create_appointment(data: dict, appointment_id: str):
+    """Write the appointment and bump the stats counters in one batch."""
+    data["created_at"] = datetime.now(tz=timezone.utc)
+    batch = async_db.batch()
+    batch.set(async_db.collection("appointments").document(appointment_id), data)
+    add_stats_increments(
+        batch,
+        total_appointments=1,
+        emergency_cases=1 if data.get("emergency") == 1 else 0,
+    )
+    await batch.commit()
+    return appointment_id
+
+
+async def get_all_appointments():
+    return [_to_row(doc) async for doc in async_db.collection("appointments").stream()]
+
+
+async def get_appointments_by_doctor(doctor_id: str, limit: int = None):
+    """Return appointments assigned to a specific doctor, newest first."""
+    query = (
+        async_db.collection("appointments")
+        .where("assigned_doctor_id", "==", doctor_id)
+        .order_by("created_at", direction="DESCENDING")
+    )
+    if limit:
+        query = query.limit(limit)
+    return [_to_row(doc) async for doc in query.stream()]
+
+
+async def get_appointments_page(doctor_id: str = None, limit: int = 50,
+                                cursor: str = None, fields: list = None):
+    """
+    Keyset-paginated appointments, newest first.
+
+    Ordered by (created_at DESC, document ID DESC) so the cursor — the
+    last row's created_at and ID — resumes exactly where the previous page
+    stopped without re-reading skipped documents. ``fields`` maps to a
+    Firestore ``select()`` projection; ``created_at`` is always included
+    because the cursor is built from it.
+
+    Returns ``(items, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    query = async_db.collection("appointments")
+    if doctor_id:
+        query = query.where("assigned_doctor_id", "==", doctor_id)
+    query = (
+        query.order_by("created_at", direction="DESCENDING")
+        .order_by("__name__", direction="DESCENDING")
+    )
+    if fields:
+        query = query.select(sorted(set(fields) | {"created_at"}))
+    if cursor:
+        created_at, doc_id = _decode_cursor(cursor)
+        query = query.start_after({"created_at": created_at, "__name__": doc_id})
+
+    # Fetch one extra row to learn whether another page exists.
+    docs = [doc async for doc in query.limit(limit + 1).stream()]
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    next_cursor = None
+    if has_more and docs:
+        last = docs[-1]
+        next_cursor = _encode_cursor(last.get("created_at"), last.id)
+    return [_to_row(doc) for doc in docs], next_cursor
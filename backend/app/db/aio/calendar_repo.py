@@ -0,0 +1,35 @@
+"""
+aio/calendar_repo.py — Async reads of doctors' slot calendars.
+
+Same data model as ``app.db.calendar_repo``. Writes happen inside the
+doctor claim transactions in ``app.db.aio.doctor_repo``.
+"""
+
+from app.db.calendar_repo import CALENDAR_COLLECTION, calendar_id
+from app.db.firebase import async_db
+from app.services.slot_calendar import decode
+
+
+def calendar_ref(doctor_id: str, day: str):
+    return async_db.collection(CALENDAR_COLLECTION).document(calendar_id(doctor_id, day))
+
+
+async def get_department_calendars(department: str, days: list) -> dict:
+    """
+    ``{(doctor_id, date): booked bitmap}`` for every calendar of
+    ``department`` between the first and last of ``days`` (dates as
+    "YYYY-MM-DD") — one query however many doctors the department has.
+    """
+    if not days:
+        return {}
+    query = (
+        async_db.collection(CALENDAR_COLLECTION)
+        .where("department", "==", department)
+        .where("date", ">=", min(days))
+        .where("date", "<=", max(days))
+    )
+    calendars = {}
+    async for doc in query.stream():
+        data = doc.to_dict()
+        calendars[(data["doctor_id"], data["date"])] = decode(data.get("booked"))
+    return calendars
@@ -0,0 +1,337 @@
+"""
+aio/doctor_repo.py — Async Firestore operations for the doctors collection.
+
+Reads come from the in-process roster when it is warm (no I/O at all)
+and from ``async_db`` otherwise. Slot claims and releases that name an
+appointment also update the doctor's queue (``doctor_queues``), and ones
+that name a calendar slot the doctor's day calendar
+(``doctor_calendars``), in the same transaction.
+"""
+
+from datetime import datetime, timezone
+
+from app.db import firebase
+from app.db.aio.calendar_repo import calendar_ref
+from app.db.firebase import async_db, async_transactional
+from app.db.doctor_repo import SlotContention
+from app.db.doctor_roster import roster
+from app.db.queue_repo import QUEUE_COLLECTION
+from app.db.stats_repo import add_stats_increments
+from app.services.doctor_queue import DoctorQueue
+from app.services.slot_calendar import booking_days, decode, encode, first_fit, shift_mask, slot_info
+
+
+def _queue_ref(doctor_id: str):
+    return async_db.collection(QUEUE_COLLECTION).document(doctor_id)
+
+
+async def _read_with_queue(transaction, doc_ref, with_queue: bool, days=()) -> tuple:
+    """
+    ``(doctor snapshot, DoctorQueue or None, {date: booked bitmap})`` in
+    one transactional read; calendars are read for each of ``days``.
+    """
+    if not with_queue and not days:
+        return await doc_ref.get(transaction=transaction), None, {}
+    queue_ref = _queue_ref(doc_ref.id)
+    day_refs = {day: calendar_ref(doc_ref.id, day) for day in days}
+    refs = [doc_ref, queue_ref] if with_queue else [doc_ref]
+    snapshots = [
+        snap async for snap in
+        async_db.get_all(refs + list(day_refs.values()), transaction=transaction)
+    ]
+    by_path = {snap.reference.path: snap for snap in snapshots}
+    queue = DoctorQueue.from_doc(by_path[queue_ref.path].to_dict()) if with_queue else None
+    calendars = {
+        day: decode((by_path[ref.path].to_dict() or {}).get("booked"))
+        for day, ref in day_refs.items()
+    }
+    return by_path[doc_ref.path], queue, calendars
+
+
+def _write_calendar(transaction, doctor: dict, doctor_id: str, day: str, booked: int):
+    transaction.set(calendar_ref(doctor_id, day), {
+        "doctor_id": doctor_id,
+        "department": doctor.get("department", ""),
+        "date": day,
+        "booked": encode(booked),
+    })
+
+
+async def get_doctor_by_id(doctor_id: str):
+    """Fetch a single doctor by document ID."""
+    if roster.ready:
+        return roster.get(doctor_id)
+    doc = await async_db.collection("doctors").document(doctor_id).get()
+    if doc.exists:
+        return {**doc.to_dict(), "id": doc.id}
+    return None
+
+
+async def get_doctors_by_department(department):
+    if roster.ready:
+        return roster.by_department(department)
+    query = (
+        async_db.collection("doctors")
+        .where("department", "==", department)
+        .where("is_available", "==", True)
+    )
+    return [{**doc.to_dict(), "id": doc.id} async for doc in query.stream()]
+
+
+@async_transactional
+async def _claim_in_transaction(transaction, doc_ref, attempts: list, patient, slot):
+    attempts.append(1)
+    snapshot, queue, calendars = await _read_with_queue(
+        transaction, doc_ref, patient is not None, [slot[0]] if slot else ()
+    )
+    if not snapshot.exists:
+        return None, None
+    data = snapshot.to_dict()
+    capacity = data.get("daily_capacity", 0)
+    count = data.get("current_appointments", 0)
+    if data.get("is_available") is not True or count >= capacity:
+        return None, data
+    if slot:
+        day, index = slot
+        booked = calendars[day]
+        if booked >> index & 1:   # taken since the caller planned it
+            return None, data
+        _write_calendar(transaction, data, snapshot.id, day, booked | 1 << index)
+    transaction.update(doc_ref, {"current_appointments": count + 1})
+    add_stats_increments(transaction, workload_sum=100 / capacity)
+    claimed = {**data, "current_appointments": count + 1, "id": snapshot.id}
+    if slot:
+        claimed["slot"] = slot_info(*slot)
+    if queue is not None:
+        entry = queue.new_entry(**patient)
+        claimed["queue_position"] = queue.position(entry)
+        queue.push(entry)
+        transaction.set(_queue_ref(doc_ref.id), queue.to_doc())
+    return claimed, data
+
+
+async def claim_doctor_slot(doctor_id: str, max_attempts: int = 3, patient: dict = None,
+                            slot: tuple = None):
+    """
+    Atomically take one appointment slot from a doctor: re-read the doctor
+    in a transaction, check capacity, then increment ``current_appointments``
+    (and the workload stats counter). Only this doctor's documents are
+    locked, so claims on other doctors proceed in parallel. Given
+    ``patient`` (``{"appointment_id", "severity", "emergency"}``), also
+    queue them.
+    Given ``slot`` (``(date, slot index)``) the calendar bit is taken in
+    the same transaction — None if someone booked it first — and the
+    returned doctor carries ``slot`` (see slot_calendar.slot_info).
+    Returns ``(doctor, attempts)``; raises SlotContention if the
+    transaction could not commit.
+    """
+    doc_ref = async_db.collection("doctors").document(doctor_id)
+    attempts = []
+    try:
+        claimed, current = await _claim_in_transaction(
+            async_db.transaction(max_attempts=max_attempts), doc_ref, attempts, patient, slot
+        )
+    except ValueError as exc:  # raised by async_transactional once attempts run out
+        raise SlotContention(doctor_id) from exc
+    if claimed is not None:
+        roster.record_appointments(doctor_id, claimed["current_appointments"])
+    elif current is not None:
+        roster.record_appointments(doctor_id, current.get("current_appointments", 0))
+    return claimed, len(attempts)
+
+
+@async_transactional
+async def _release_in_transaction(transaction, doc_ref, appointment_id, slot):
+    snapshot, queue, calendars = await _read_with_queue(
+        transaction, doc_ref, appointment_id is not None, [slot[0]] if slot else ()
+    )
+    if not snapshot.exists:
+        return None
+    if queue is not None and queue.remove(appointment_id):
+        transaction.set(_queue_ref(doc_ref.id), queue.to_doc())
+    data = snapshot.to_dict()
+    if slot and calendars[slot[0]] >> slot[1] & 1:
+        day, index = slot
+        _write_calendar(transaction, data, snapshot.id, day, calendars[day] & ~(1 << index))
+    count = data.get("current_appointments", 0)
+    capacity = data.get("daily_capacity", 0)
+    if count <= 0:
+        return count
+    transaction.update(doc_ref, {"current_appointments": count - 1})
+    if capacity > 0:
+        add_stats_increments(transaction, workload_sum=-100 / capacity)
+    return count - 1
+
+
+async def release_doctor_slot(doctor_id: str, appointment_id: str = None, slot: tuple = None):
+    """Give back a slot taken by claim_doctor_slot (booking abandoned)."""
+    doc_ref = async_db.collection("doctors").document(doctor_id)
+    count = await _release_in_transaction(async_db.transaction(), doc_ref, appointment_id, slot)
+    if count is not None:
+        roster.record_appointments(doctor_id, count)
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Emergency preemption
+# ---------------------------------------------------------------------------
+
+async def get_queues(doctor_ids) -> dict:
+    """``{doctor_id: DoctorQueue}`` in one batched read."""
+    refs = [_queue_ref(doctor_id) for doctor_id in doctor_ids]
+    return {
+        snap.id: DoctorQueue.from_doc(snap.to_dict())
+        async for snap in async_db.get_all(refs)
+    } if refs else {}
+
+
+def _appointment_slot(appointment: dict):
+    if appointment.get("slot_date") is None or appointment.get("slot_index") is None:
+        return None
+    return appointment["slot_date"], appointment["slot_index"]
+
+
+async def _read_appointments(transaction, appointment_ids) -> list:
+    """The appointments that exist among ``appointment_ids``, in that order."""
+    refs = [async_db.collection("appointments").document(i) for i in appointment_ids]
+    by_id = {
+        snap.id: {**snap.to_dict(), "id": snap.id}
+        async for snap in async_db.get_all(refs, transaction=transaction) if snap.exists
+    } if refs else {}
+    return [by_id[i] for i in appointment_ids if i in by_id]
+
+
+def _holds_upcoming_slot(appointment: dict, upcoming: dict, shift: int) -> bool:
+    """Whether ``appointment`` holds a slot in ``shift`` not yet started (``{date: first slot}``)."""
+    slot = _appointment_slot(appointment)
+    return bool(slot and slot[0] in upcoming and slot[1] >= upcoming[slot[0]] and shift >> slot[1] & 1)
+
+
+def _earliest_slot(shift: int, booked: dict, days):
+    for day, first in days:
+        index = first_fit(shift & ~booked[day] >> first << first)
+        if index is not None:
+            return day, index
+    return None
+
+
+@async_transactional
+async def _preempt_in_transaction(transaction, doc_ref, patient, reason, days, require_slot):
+    snapshot, queue, calendars = await _read_with_queue(
+        transaction, doc_ref, True, [day for day, _ in days]
+    )
+    data = snapshot.to_dict() if snapshot.exists else None
+    if not data or data.get("is_available") is not True or data.get("daily_capacity", 0) <= 0:
+        return None, []
+    capacity = data["daily_capacity"]
+    count = data.get("current_appointments", 0)
+    shift = shift_mask(data)
+
+    entry = queue.new_entry(**patient)
+    displaced = queue.displace(entry, count + 1 - capacity)
+    if displaced is None:
+        return None, []
+    # Reads must precede writes: fetch the patients being moved first.
+    moved = await _read_appointments(transaction, [e["id"] for e in displaced])
+    if len(moved) < len(displaced):
+        # An entry without an appointment document is a booking still in
+        # flight: it can't be moved, and dropping it from the queue would
+        # leave the doctor over capacity. Leave this doctor alone (nothing
+        # is written) and let the caller try the next one.
+        return None, []
+
+    # Moved patients give up their calendar slots; the emergency takes the
+    # earliest free one within ``days``.
+    freed = [slot for slot in map(_appointment_slot, moved) if slot]
+    # A slot outside ``days`` (a moved patient booked for a later day) is
+    # freed too, so its calendar is read now, before any write.
+    missing = {day: calendar_ref(doc_ref.id, day) for day, _ in freed if day not in calendars}
+    if missing:
+        by_path = {
+            snap.reference.path: snap
+            async for snap in async_db.get_all(list(missing.values()), transaction=transaction)
+        }
+        calendars = {**calendars, **{
+            day: decode((by_path[ref.path].to_dict() or {}).get("booked"))
+            for day, ref in missing.items()
+        }}
+    booked = dict(calendars)
+    for day, index in freed:
+        booked[day] &= ~(1 << index)
+    slot = _earliest_slot(shift, booked, days)
+    if slot is None and days:
+        # Still nothing free: also move the least urgent patient holding an
+        # upcoming slot (in-flight bookings have no document, so stay put).
+        waiting = await _read_appointments(
+            transaction, [e["id"] for e in queue.less_urgent_than(entry)]
+        )
+        upcoming = dict(days)
+        holder = next((a for a in waiting if _holds_upcoming_slot(a, upcoming, shift)), None)
+        if holder is not None:
+            queue.remove(holder["id"])
+            moved.append(holder)
+            day, index = _appointment_slot(holder)
+            booked[day] &= ~(1 << index)
+            slot = _earliest_slot(shift, booked, days)
+    if slot is None and require_slot:
+        return None, []
+    if slot:
+        booked[slot[0]] |= 1 << slot[1]
+
+    new_count = count + 1 - len(moved)
+    position = queue.position(entry)
+    queue.push(entry)
+    transaction.set(_queue_ref(doc_ref.id), queue.to_doc())
+    transaction.update(doc_ref, {"current_appointments": new_count})
+    for day, bits in booked.items():
+        if bits != calendars[day]:
+            _write_calendar(transaction, data, snapshot.id, day, bits)
+    now = datetime.now(tz=timezone.utc)
+    for appointment in moved:
+        transaction.update(async_db.collection("appointments").document(appointment["id"]), {
+            "status": "rescheduled",
+            "rescheduled_reason": reason,
+            "rescheduled_at": now,
+            "slot_date": firebase.DELETE_FIELD,
+            "slot_index": firebase.DELETE_FIELD,
+            "slot_start": firebase.DELETE_FIELD,
+        })
+    add_stats_increments(
+        transaction,
+        workload_sum=(new_count - count) * 100 / capacity,
+        rescheduled_appointments=len(moved),
+    )
+    claimed = {**data, "current_appointments": new_count, "id": snapshot.id,
+               "queue_position": position}
+    if slot:
+        claimed["slot"] = slot_info(*slot)
+    return claimed, moved
+
+
+async def preempt_doctor_slot(doctor_id: str, patient: dict, reason: str,
+                              require_slot: bool = True):
+    """
+    Fit an emergency ``patient`` onto ``doctor_id`` today, by rescheduling
+    the fewest less urgent waiting patients: enough to get under capacity,
+    plus — if that leaves no free slot today — the least urgent patient
+    holding an upcoming slot today. The moved patients' calendar slots are
+    freed and the emergency gets the doctor's earliest free slot today
+    (``doctor["slot"]``).
+    Returns ``(doctor, moved appointments)``, or ``(None, [])`` if the
+    doctor has too few less urgent patients to make room (patients whose
+    booking is still being written don't count), or no slot today could
+    be freed. With ``require_slot=False`` the emergency is placed without
+    a slot in that last case (the queue still puts them first). Raises
+    SlotContention if the transaction could not commit.
+    """
+    doc_ref = async_db.collection("doctors").document(doctor_id)
+    try:
+        claimed, moved = await _preempt_in_transaction(
+            async_db.transaction(max_attempts=3), doc_ref, patient, reason,
+            booking_days(horizon=1), require_slot,
+        )
+    except ValueError as exc:
+        raise SlotContention(doctor_id) from exc
+    if claimed is not None:
+        roster.record_appointments(doctor_id, claimed["current_appointments"])
+    return claimed, moved
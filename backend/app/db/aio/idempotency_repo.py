@@ -0,0 +1,172 @@
+"""
+aio/idempotency_repo.py — Idempotency-Key records for retried POSTs.
+
+A request carrying ``Idempotency-Key`` claims
+``idempotency_keys/{sha256(scope:key)}`` before doing any work:
+
+    {"scope": "submit_appointment", "request_hash": <sha256 of the body>,
+     "status": "in_progress" | "completed", "lease_until": ...,
+     "response": {...}, "created_at": ..., "expires_at": ...}
+
+The claim is a single ``create`` — it fails if the key exists, so of two
+concurrent duplicates exactly one runs. The other waits for the record
+to become ``completed`` and returns the stored response. A record stuck
+``in_progress`` past its lease (the worker died mid-request) can be
+taken over, and a request that fails is ``abandon``-ed so its retry
+runs afresh.
+
+Records are only useful for IDEMPOTENCY_TTL_HOURS: expired ones are
+treated as absent, and a Firestore TTL policy on ``expires_at`` deletes
+them.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.db import firebase
+from app.db.firebase import async_db, async_transactional
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+IDEMPOTENCY_TTL_HOURS = float(os.environ.get("IDEMPOTENCY_TTL_HOURS", "24"))
+# How long the first request may hold a key before a duplicate can take over.
+IDEMPOTENCY_LEASE_SECONDS = float(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", "60"))
+# How long a duplicate waits for the first request before giving up (409).
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "30"))
+MAX_KEY_LENGTH = 255
+
+_POLL_SECONDS = (0.05, 0.1, 0.2, 0.5)
+
+# Keys this worker is running → Event set when they finish, so same-worker
+# duplicates wake immediately instead of on the next poll.
+_local: dict = {}
+
+
+class IdempotencyConflict(Exception):
+    """The key is unusable for this request (``reason``: "mismatch" or "in_progress")."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def request_hash(body) -> str:
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _ref(scope: str, key: str):
+    doc_id = hashlib.sha256(f"{scope}:{key}".encode()).hexdigest()
+    return async_db.collection(IDEMPOTENCY_COLLECTION).document(doc_id)
+
+
+def _record(scope: str, body_hash: str, now: datetime) -> dict:
+    return {
+        "scope": scope,
+        "request_hash": body_hash,
+        "status": "in_progress",
+        "lease_until": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+        "created_at": now,
+        "expires_at": now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+    }
+
+
+def _state(data, body_hash: str, now: datetime):
+    """
+    What an existing record means for this request: "free" (absent,
+    expired or lease lapsed), "completed", "in_progress" or "mismatch".
+    """
+    if not data or data["expires_at"] <= now:
+        return "free"
+    if data.get("request_hash") != body_hash:
+        return "mismatch"
+    if data.get("status") == "completed":
+        return "completed"
+    return "in_progress" if data["lease_until"] > now else "free"
+
+
+@async_transactional
+async def _take_over_in_transaction(transaction, ref, scope, body_hash):
+    snapshot = await ref.get(transaction=transaction)
+    data = snapshot.to_dict() if snapshot.exists else None
+    now = datetime.now(tz=timezone.utc)
+    state = _state(data, body_hash, now)
+    if state == "free":
+        transaction.set(ref, _record(scope, body_hash, now))
+    return state, data
+
+
+async def begin(scope: str, key: str, body_hash: str):
+    """
+    Claim ``key`` for a request whose body hashes to ``body_hash``.
+
+    Returns None if the caller now owns the key and must run the request
+    (then ``complete`` or ``abandon`` it), or the stored response if the
+    request already ran. A duplicate arriving while the first is still
+    running waits up to IDEMPOTENCY_WAIT_SECONDS for it. Raises
+    IdempotencyConflict("mismatch") if the key was used with a different
+    body, or ("in_progress") if the wait ran out.
+    """
+    ref = _ref(scope, key)
+    now = datetime.now(tz=timezone.utc)
+    try:
+        await ref.create(_record(scope, body_hash, now))
+        _local[ref.id] = asyncio.Event()
+        return None
+    except firebase.AlreadyExists:
+        pass
+
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    attempt = 0
+    while True:
+        state, data = await _take_over_in_transaction(async_db.transaction(), ref, scope, body_hash)
+        if state == "free":
+            _local[ref.id] = asyncio.Event()
+            return None
+        if state == "completed":
+            return data["response"]
+        if state == "mismatch":
+            raise IdempotencyConflict("mismatch")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise IdempotencyConflict("in_progress")
+        delay = min(_POLL_SECONDS[min(attempt, len(_POLL_SECONDS) - 1)], remaining)
+        attempt += 1
+        event = _local.get(ref.id)
+        if event is None:
+            await asyncio.sleep(delay)
+        else:
+            try:
+                await asyncio.wait_for(event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _finish(ref):
+    event = _local.pop(ref.id, None)
+    if event is not None:
+        event.set()
+
+
+async def complete(scope: str, key: str, response: dict):
+    """Store ``response`` as the result every replay of ``key`` returns."""
+    ref = _ref(scope, key)
+    try:
+        await ref.update({
+            "status": "completed",
+            "response": response,
+            "lease_until": firebase.DELETE_FIELD,
+        })
+    finally:
+        _finish(ref)
+
+
+async def abandon(scope: str, key: str):
+    """Release ``key`` after a failed request so a retry runs it again."""
+    ref = _ref(scope, key)
+    try:
+        await ref.delete()
+    finally:
+        _finish(ref)
@@ -0,0 +1,150 @@
+"""
+aio/resource_repo.py — Async bed claims & occupancy over the sharded counters.
+
+Same data model as ``app.db.resource_repo``; shard initialisation is
+rare and reuses the sync implementation.
+"""
+
+import random
+from datetime import datetime, timezone
+
+from starlette.concurrency import run_in_threadpool
+
+from app.db.firebase import async_db, async_transactional
+from app.db.resource_repo import (
+    BED_SHARDS,
+    BED_TYPES,
+    BedShardsMissing,
+    _ensure_shards,
+)
+
+
+def _shards():
+    return (
+        async_db.collection("resources")
+        .document("hospital_resources")
+        .collection("bed_shards")
+    )
+
+
+@async_transactional
+async def _claim_in_transaction(transaction, shard_ref, prefix):
+    snapshot = await shard_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        raise BedShardsMissing(shard_ref.id)
+    data = snapshot.to_dict()
+    occupied = data.get(f"{prefix}_occupied", 0)
+    if occupied >= data.get(f"{prefix}_capacity", 0):
+        return False
+    transaction.update(shard_ref, {
+        f"{prefix}_occupied": occupied + 1,
+        "last_updated": datetime.now(tz=timezone.utc),
+    })
+    return True
+
+
+async def claim_bed(bed_type: str):
+    """
+    Occupy one bed of ``bed_type`` ("ICU" / "WARD"). Returns the shard
+    index the bed was taken from, or None if every shard is full.
+    """
+    prefix = BED_TYPES[bed_type]
+    start = random.randrange(BED_SHARDS)
+    for attempt in range(2):
+        try:
+            for offset in range(BED_SHARDS):
+                index = (start + offset) % BED_SHARDS
+                try:
+                    claimed = await _claim_in_transaction(
+                        async_db.transaction(max_attempts=3),
+                        _shards().document(str(index)),
+                        prefix,
+                    )
+                except ValueError:  # shard stayed contended — try the next one
+                    continue
+                if claimed:
+                    return index
+            return None
+        except BedShardsMissing:
+            if attempt:
+                raise
+            await run_in_threadpool(_ensure_shards)
+
+
+@async_transactional
+async def _unclaim_in_transaction(transaction, shard_ref, prefix):
+    snapshot = await shard_ref.get(transaction=transaction)
+    occupied = (snapshot.to_dict() or {}).get(f"{prefix}_occupied", 0)
+    if occupied <= 0:
+        return False
+    transaction.update(shard_ref, {
+        f"{prefix}_occupied": occupied - 1,
+        "last_updated": datetime.now(tz=timezone.utc),
+    })
+    return True
+
+
+async def unclaim_bed(bed_type: str, shard_index: int) -> bool:
+    """Give back a bed taken by claim_bed before any appointment recorded it."""
+    return await _unclaim_in_transaction(
+        async_db.transaction(), _shards().document(str(shard_index)), BED_TYPES[bed_type]
+    )
+
+
+@async_transactional
+async def _release_in_transaction(transaction, appointment_ref):
+    snapshot = await appointment_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        return "not_found"
+    appointment = snapshot.to_dict()
+    if appointment.get("status") == "discharged":
+        return "already_discharged"
+
+    prefix = BED_TYPES.get(appointment.get("bed_type"))
+    target = None
+    if prefix:
+        recorded = appointment.get("bed_shard")
+        order = sorted(range(BED_SHARDS), key=lambda i: i != recorded)
+        for index in order:
+            ref = _shards().document(str(index))
+            shard = await ref.get(transaction=transaction)
+            occupied = (shard.to_dict() or {}).get(f"{prefix}_occupied", 0)
+            if occupied > 0:
+                target = (ref, occupied)
+                break
+
+    now = datetime.now(tz=timezone.utc)
+    if target is not None:
+        transaction.update(target[0], {
+            f"{prefix}_occupied": target[1] - 1,
+            "last_updated": now,
+        })
+    transaction.update(appointment_ref, {"status": "discharged", "discharged_at": now})
+    return "released" if target is not None else "discharged"
+
+
+async def release_bed(appointment_id: str) -> str:
+    """
+    Discharge an appointment and free its bed in one transaction.
+    Returns "released", "discharged", "already_discharged" or "not_found".
+    """
+    appointment_ref = async_db.collection("appointments").document(appointment_id)
+    return await _release_in_transaction(async_db.transaction(), appointment_ref)
+
+
+async def get_bed_occupancy() -> dict:
+    """Current totals summed over the shards."""
+    docs = [doc async for doc in _shards().stream()]
+    if not docs:
+        await run_in_threadpool(_ensure_shards)
+        docs = [doc async for doc in _shards().stream()]
+    totals = {}
+    for prefix in BED_TYPES.values():
+        totals[f"{prefix}_total"] = 0
+        totals[f"{prefix}_occupied"] = 0
+    for doc in docs:
+        data = doc.to_dict()
+        for prefix in BED_TYPES.values():
+            totals[f"{prefix}_total"] += data.get(f"{prefix}_capacity", 0)
+            totals[f"{prefix}_occupied"] += data.get(f"{prefix}_occupied", 0)
+    return totals
@@ -2,13 +2,25 @@
 appointment_repo.py — Firestore operations for the appointments collection.
 """
 
+import base64
+import json
+
 from app.db.firebase import db
+from app.db.stats_repo import add_stats_increments
 from datetime import datetime, timezone
 
 
 def create_appointment(data: dict, appointment_id: str):
+    """Write the appointment and bump the stats counters in one batch."""
     data["created_at"] = datetime.now(tz=timezone.utc)
-    db.collection("appointments").document(appointment_id).set(data)
+    batch = db.batch()
+    batch.set(db.collection("appointments").document(appointment_id), data)
+    add_stats_increments(
+        batch,
+        total_appointments=1,
+        emergency_cases=1 if data.get("emergency") == 1 else 0,
+    )
+    batch.commit()
     return appointment_id
 
 
@@ -25,15 +37,20 @@ def get_all_appointments():
     return result
 
 
-def get_appointments_by_doctor(doctor_id: str):
-    """Return all appointments assigned to a specific doctor."""
-    docs = (
+def get_appointments_by_doctor(doctor_id: str, limit: int = None):
+    """
+    Return appointments assigned to a specific doctor, newest first.
+    Served by the (assigned_doctor_id, created_at DESC) composite index.
+    """
+    query = (
         db.collection("appointments")
         .where("assigned_doctor_id", "==", doctor_id)
-        .stream()
+        .order_by("created_at", direction="DESCENDING")
     )
+    if limit:
+        query = query.limit(limit)
     result = []
-    for doc in docs:
+    for doc in query.stream():
         d = doc.to_dict()
         d["id"] = doc.id
         if "created_at" in d and hasattr(d["created_at"], "isoformat"):
@@ -42,42 +59,35 @@ def get_appointments_by_doctor(doctor_id: str):
     return result
 
 
-def get_scheduled_appointments_for_doctor_today(doctor_id: str):
+def stream_appointments(start: datetime = None, end: datetime = None):
     """
-    Return non-emergency, status='scheduled' appointments for a doctor
-    created today (UTC).
+    Yield appointments with ``start <= created_at < end`` (either bound
+    optional), oldest first, straight off the Firestore stream iterator —
+    documents are never collected into a list.
     """
-    today_start = datetime.now(tz=timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-    docs = (
-        db.collection("appointments")
-        .where("assigned_doctor_id", "==", doctor_id)
-        .where("status", "==", "scheduled")
-        .stream()
-    )
-    result = []
-    for doc in docs:
+    query = db.collection("appointments")
+    if start is not None:
+        query = query.where("created_at", ">=", start)
+    if end is not None:
+        query = query.where("created_at", "<", end)
+    for doc in query.order_by("created_at").stream():
         d = doc.to_dict()
         d["id"] = doc.id
-        # Only include non-emergency appointments created today
-        if d.get("emergency") == 1:
-            continue
-        created = d.get("created_at")
-        if created and hasattr(created, "timestamp"):
-            if created.timestamp() >= today_start.timestamp():
-                if hasattr(created, "isoformat"):
-                    d["created_at"] = created.isoformat()
-                result.append(d)
-        else:
-            # If created_at is already a string or missing, include it anyway
-            result.append(d)
-    return result
+        if hasattr(d.get("created_at"), "isoformat"):
+            d["created_at"] = d["created_at"].isoformat()
+        yield d
+
+
+def _encode_cursor(created_at: datetime, doc_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), doc_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
 
-def reschedule_appointment(appointment_id: str, reason: str):
-    """Mark an appointment as rescheduled with the given reason."""
-    db.collection("appointments").document(appointment_id).update({
-        "status": "rescheduled",
-        "rescheduled_reason": reason,
-    })
\ No newline at end of file
+def _decode_cursor(cursor: str):
+    """Inverse of _encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(doc_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
@@ -0,0 +1,32 @@
+"""
+calendar_repo.py — Firestore storage for doctors' daily slot calendars.
+
+One ``doctor_calendars/{doctor_id}_{YYYY-MM-DD}`` document per doctor and
+day that has at least one booking:
+
+    {"doctor_id": ..., "department": ..., "date": "2025-01-31",
+     "booked": <12-byte bitmap, see app.services.slot_calendar>}
+
+A day with no document has no bookings. The document is only written
+inside the doctor's claim / release / preemption transaction, so a bit
+is never handed out twice.
+"""
+
+from app.db.firebase import db
+from app.services.slot_calendar import decode
+
+CALENDAR_COLLECTION = "doctor_calendars"
+
+
+def calendar_id(doctor_id: str, day: str) -> str:
+    return f"{doctor_id}_{day}"
+
+
+def calendar_ref(doctor_id: str, day: str):
+    return db.collection(CALENDAR_COLLECTION).document(calendar_id(doctor_id, day))
+
+
+def get_calendar(doctor_id: str, day: str) -> int:
+    """Booked-slot bitmap of ``doctor_id`` on ``day`` (0 if nothing booked)."""
+    doc = calendar_ref(doctor_id, day).get()
+    return decode((doc.to_dict() or {}).get("booked")) if doc.exists else 0
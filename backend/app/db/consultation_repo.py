@@ -0,0 +1,169 @@
+"""
+consultation_repo.py — Consultation start / completion and duration estimates.
+
+Completing a consultation updates, in one transaction, the appointment,
+the doctor's ``consultation_stats`` and the department's
+``consultation_stats/{department}`` document — each a constant-size
+streaming estimate (see wait_time_service.update_consultation_stats),
+so wait-time predictions never need to read appointment history.
+
+The department document takes one write per completed consultation in
+that department, well under Firestore's per-document write rate.
+
+Starting (or completing) a consultation also takes the patient off the
+doctor's queue; ``start_next_consultation`` pops the most urgent one.
+"""
+
+from datetime import datetime, timezone
+
+from app.db.firebase import db, transactional
+from app.db.queue_repo import queue_ref, read_queue
+from app.services.doctor_queue import DoctorQueue
+from app.services.wait_time_service import update_consultation_stats
+
+# Appointment states a consultation can be started / completed from.
+STARTABLE = ("scheduled", "rescheduled")
+COMPLETABLE = STARTABLE + ("in_consultation",)
+
+
+class ConsultationError(Exception):
+    """The appointment can't move to the requested state (``reason`` says why)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def get_department_stats(department: str):
+    """The department's consultation_stats, or None before its first completion."""
+    doc = db.collection("consultation_stats").document(department).get()
+    return doc.to_dict() if doc.exists else None
+
+
+def _check(snapshot, doctor_id: str, allowed: tuple) -> dict:
+    if not snapshot.exists:
+        raise ConsultationError("not_found")
+    appointment = snapshot.to_dict()
+    if appointment.get("assigned_doctor_id") != doctor_id:
+        raise ConsultationError("not_assigned")
+    if appointment.get("status") not in allowed:
+        raise ConsultationError("invalid_status")
+    return appointment
+
+
+@transactional
+def _start_in_transaction(transaction, appointment_ref, doctor_id, now):
+    _check(appointment_ref.get(transaction=transaction), doctor_id, STARTABLE)
+    queue = read_queue(transaction, doctor_id)
+    transaction.update(appointment_ref, {"status": "in_consultation", "consultation_started_at": now})
+    if queue.remove(appointment_ref.id):
+        transaction.set(queue_ref(doctor_id), queue.to_doc())
+
+
+def start_consultation(appointment_id: str, doctor_id: str) -> datetime:
+    """Mark the patient as being seen; completion measures from this time."""
+    appointment_ref = db.collection("appointments").document(appointment_id)
+    now = datetime.now(tz=timezone.utc)
+    _start_in_transaction(db.transaction(), appointment_ref, doctor_id, now)
+    return now
+
+
+@transactional
+def _start_next_in_transaction(transaction, doctor_id, now):
+    queue = read_queue(transaction, doctor_id)
+    popped = False
+    in_flight = []
+    while True:
+        entry = queue.pop()
+        if entry is None:
+            break
+        ref = db.collection("appointments").document(entry["id"])
+        snapshot = ref.get(transaction=transaction)
+        if not snapshot.exists:
+            # A booking still being written (the doctor claim queues the
+            # patient before the appointment document exists): keep it.
+            in_flight.append(entry)
+            continue
+        popped = True
+        # Drop entries whose appointment was discharged / moved meanwhile.
+        if (snapshot.to_dict() or {}).get("status") in STARTABLE:
+            break
+    for skipped in in_flight:
+        queue.push(skipped)
+    if popped:
+        transaction.set(queue_ref(doctor_id), queue.to_doc())
+    if entry is None:
+        return None
+    transaction.update(ref, {"status": "in_consultation", "consultation_started_at": now})
+    return {**snapshot.to_dict(), "id": ref.id, "status": "in_consultation"}
+
+
+def start_next_consultation(doctor_id: str):
+    """
+    Pop the most urgent patient off ``doctor_id``'s queue and start their
+    consultation. Returns the appointment, or None if nobody is waiting.
+    Patients whose booking is still being written are passed over but
+    stay queued.
+    """
+    now = datetime.now(tz=timezone.utc)
+    appointment = _start_next_in_transaction(db.transaction(), doctor_id, now)
+    if appointment is not None:
+        appointment["consultation_started_at"] = now.isoformat()
+        if hasattr(appointment.get("created_at"), "isoformat"):
+            appointment["created_at"] = appointment["created_at"].isoformat()
+    return appointment
+
+
+def _minutes_since(started) -> float:
+    if isinstance(started, str):
+        started = datetime.fromisoformat(started)
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    return (datetime.now(tz=timezone.utc) - started).total_seconds() / 60
+
+
+@transactional
+def _complete_in_transaction(transaction, appointment_ref, doctor_id, minutes):
+    appointment = _check(appointment_ref.get(transaction=transaction), doctor_id, COMPLETABLE)
+    if minutes is None:
+        started = appointment.get("consultation_started_at")
+        if not started:
+            raise ConsultationError("duration_unknown")
+        minutes = _minutes_since(started)
+
+    doctor_ref = db.collection("doctors").document(doctor_id)
+    department_ref = db.collection("consultation_stats").document(appointment.get("department", ""))
+    refs = (doctor_ref, department_ref, queue_ref(doctor_id))
+    by_path = {snap.reference.path: snap for snap in db.get_all(refs, transaction=transaction)}
+    doctor_snap, department_snap, queue_snap = (by_path[ref.path] for ref in refs)
+    queue = DoctorQueue.from_doc(queue_snap.to_dict())
+
+    doctor_stats = update_consultation_stats(
+        (doctor_snap.to_dict() or {}).get("consultation_stats"), minutes
+    )
+    department_stats = update_consultation_stats(department_snap.to_dict(), minutes)
+
+    now = datetime.now(tz=timezone.utc)
+    transaction.update(appointment_ref, {
+        "status": "completed",
+        "completed_at": now,
+        "consultation_minutes": round(minutes, 2),
+    })
+    if doctor_snap.exists:
+        transaction.update(doctor_ref, {"consultation_stats": doctor_stats})
+    transaction.set(department_ref, {**department_stats, "updated_at": now})
+    if queue.remove(appointment_ref.id):   # completed without a recorded start
+        transaction.set(queue_ref(doctor_id), queue.to_doc())
+    return {"consultation_minutes": round(minutes, 2), "doctor_stats": doctor_stats}
+
+
+def complete_consultation(appointment_id: str, doctor_id: str, minutes: float = None) -> dict:
+    """
+    Close ``doctor_id``'s consultation for ``appointment_id`` and fold its
+    duration into the doctor and department estimates. ``minutes``
+    defaults to the time since start_consultation. Raises
+    ConsultationError ("not_found", "not_assigned", "invalid_status",
+    "duration_unknown").
+    """
+    appointment_ref = db.collection("appointments").document(appointment_id)
+    return _complete_in_transaction(db.transaction(), appointment_ref, doctor_id, minutes)
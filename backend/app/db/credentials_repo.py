@@ -0,0 +1,77 @@
+"""
+credentials_repo.py — Email-keyed login credentials shared by doctors and admins.
+
+``doctor_credentials`` and ``admin_credentials`` documents are keyed by
+the normalized email (see ``credential_id``), so login and password reset
+are direct document gets instead of ``where("email")`` queries. Doctor
+credentials also carry a copy of the profile fields the login response
+needs (``DOCTOR_LOGIN_FIELDS``), so login doesn't read ``doctors``.
+
+Documents written before the switch have auto-generated IDs. Until they
+are moved with ``python -m app.db.migrate_credentials``, a miss on the
+direct get falls back to the old email query; set
+LEGACY_CREDENTIAL_LOOKUP=0 after migrating to make misses one read too.
+"""
+
+import os
+from urllib.parse import quote
+
+from app.db.firebase import db
+
+LEGACY_LOOKUP = os.environ.get("LEGACY_CREDENTIAL_LOOKUP", "1") != "0"
+
+# Copied from the doctor profile into its credentials document.
+DOCTOR_LOGIN_FIELDS = ("name", "department", "daily_capacity", "is_available")
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def credential_id(email: str) -> str:
+    """Document ID for ``email``: normalized, with "/" (and "%") escaped."""
+    return quote(normalize_email(email), safe="@.+-_")
+
+
+def credentials_ref(collection: str, email: str):
+    return db.collection(collection).document(credential_id(email))
+
+
+def legacy_lookup(collection: str, email: str):
+    """Pre-migration lookup by the ``email`` field. Returns dict with 'id' or None."""
+    if not LEGACY_LOOKUP:
+        return None
+    candidates = list({email.strip(), normalize_email(email)})
+    docs = (
+        db.collection(collection)
+        .where("email", "in", candidates)
+        .limit(1)
+        .stream()
+    )
+    for doc in docs:
+        return {**doc.to_dict(), "id": doc.id}
+    return None
+
+
+def find_credentials(email: str):
+    """
+    Look ``email`` up as a doctor and as an admin in one round trip.
+    Returns ``("doctor" | "admin", credentials)`` or ``(None, None)``;
+    a doctor account wins if both exist.
+    """
+    refs = {
+        "doctor": credentials_ref("doctor_credentials", email),
+        "admin": credentials_ref("admin_credentials", email),
+    }
+    # get_all yields in no particular order; match results up by path.
+    found = {snap.reference.path: snap for snap in db.get_all(list(refs.values())) if snap.exists}
+    for kind, ref in refs.items():
+        if ref.path in found:
+            snap = found[ref.path]
+            return kind, {**snap.to_dict(), "id": snap.id}
+
+    for kind, collection in (("doctor", "doctor_credentials"), ("admin", "admin_credentials")):
+        creds = legacy_lookup(collection, email)
+        if creds:
+            return kind, creds
+    return None, None
@@ -1,8 +1,19 @@
 """
 doctor_repo.py — Firestore operations for doctors & doctor_credentials collections.
+
+Doctor reads are served from the in-process roster (see doctor_roster)
+once its listener is warm, and from Firestore otherwise.
 """
 
+from app.db.credentials_repo import (
+    DOCTOR_LOGIN_FIELDS,
+    credentials_ref,
+    legacy_lookup,
+    normalize_email,
+)
 from app.db.firebase import db
+from app.db.doctor_roster import roster
+from app.db.stats_repo import add_stats_increments
 
 
 # ---------------------------------------------------------------------------
@@ -10,25 +21,29 @@ from app.db.firebase import db
 # ---------------------------------------------------------------------------
 
 def get_all_doctors():
+    if roster.ready:
+        return roster.all()
     docs = db.collection("doctors").stream()
     return [{**doc.to_dict(), "id": doc.id} for doc in docs]
 
 
 def get_doctor_by_id(doctor_id: str):
     """Fetch a single doctor by document ID."""
+    if roster.ready:
+        return roster.get(doctor_id)
     doc = db.collection("doctors").document(doctor_id).get()
     if doc.exists:
         return {**doc.to_dict(), "id": doc.id}
     return None
 
 
-def update_doctor_appointments(doctor_id, new_count):
-    db.collection("doctors").document(doctor_id).update({
-        "current_appointments": new_count
-    })
+class SlotContention(Exception):
+    """The doctor's document kept changing under the claim transaction."""
 
 
 def get_doctors_by_department(department):
+    if roster.ready:
+        return roster.by_department(department)
     docs = (
         db.collection("doctors")
         .where("department", "==", department)
@@ -38,47 +53,57 @@ def get_doctors_by_department(department):
     return [{**doc.to_dict(), "id": doc.id} for doc in docs]
 
 
-def create_doctor(data: dict) -> str:
-    """Create a new doctor document. Returns the auto-generated document ID."""
+def create_doctor(data: dict, email: str = None, password_hash: str = None) -> str:
+    """
+    Create a new doctor document. Returns the auto-generated document ID.
+
+    With ``email`` / ``password_hash`` the doctor's login credentials are
+    created in the same batch; the batch fails with ``AlreadyExists``
+    (nothing written) if that email is already registered.
+    """
     doc_ref = db.collection("doctors").document()
-    doc_ref.set(data)
+    capacity = data.get("daily_capacity", 0)
+    batch = db.batch()
+    batch.set(doc_ref, data)
+    if email is not None:
+        batch.create(credentials_ref("doctor_credentials", email),
+                     _credentials_doc(doc_ref.id, data, email, password_hash))
+    add_stats_increments(
+        batch,
+        total_doctors=1,
+        capacity_doctors=1 if capacity > 0 else 0,
+        workload_sum=data.get("current_appointments", 0) / capacity * 100 if capacity > 0 else 0,
+    )
+    batch.commit()
     return doc_ref.id
 
 
 # ---------------------------------------------------------------------------
-# doctor_credentials collection
+# doctor_credentials collection (keyed by normalized email, see credentials_repo)
 # ---------------------------------------------------------------------------
 
-def create_doctor_credentials(doctor_id: str, email: str, password_hash: str):
-    """Create login credentials for a doctor."""
-    doc_ref = db.collection("doctor_credentials").document()
-    doc_ref.set({
+def _credentials_doc(doctor_id: str, profile: dict, email: str, password_hash: str) -> dict:
+    return {
         "doctor_id": doctor_id,
-        "email": email,
+        "email": normalize_email(email),
         "password_hash": password_hash,
-    })
-    return doc_ref.id
+        **{field: profile[field] for field in DOCTOR_LOGIN_FIELDS if field in profile},
+    }
 
 
 def get_doctor_credentials_by_email(email: str):
-    """Look up doctor credentials by email. Returns dict with 'id' or None."""
-    docs = (
-        db.collection("doctor_credentials")
-        .where("email", "==", email)
-        .limit(1)
-        .stream()
-    )
-    for doc in docs:
+    """
+    Look up doctor credentials by email — one document get. Returns dict
+    with 'id' (plus the DOCTOR_LOGIN_FIELDS profile copy) or None.
+    """
+    doc = credentials_ref("doctor_credentials", email).get()
+    if doc.exists:
         return {**doc.to_dict(), "id": doc.id}
-    return None
+    return legacy_lookup("doctor_credentials", email)
 
 
-def update_doctor_password(email: str, new_hash: str):
-    """Update password_hash for a doctor looked up by email."""
-    creds = get_doctor_credentials_by_email(email)
-    if creds:
-        db.collection("doctor_credentials").document(creds["id"]).update({
-            "password_hash": new_hash,
-        })
-        return True
-    return False
\ No newline at end of file
+def update_doctor_password(credentials_id: str, new_hash: str):
+    """Update password_hash on a doctor_credentials document."""
+    db.collection("doctor_credentials").document(credentials_id).update({
+        "password_hash": new_hash,
+    })
@@ -0,0 +1,105 @@
+"""
+doctor_roster.py — In-process doctor roster kept current by a Firestore listener.
+
+The ``doctors`` collection is small and changes rarely, yet every booking,
+doctor login and profile view used to read it over the network. The
+roster subscribes to the collection with ``on_snapshot`` once per worker
+and serves those reads from memory.
+
+Reads fall back to Firestore until the first snapshot has arrived (or
+when the roster was never started, e.g. in scripts). Listener updates
+are eventually consistent across workers; the local worker's own writes
+are applied immediately through ``record_appointments``.
+"""
+
+import logging
+import os
+import threading
+
+from app.db.firebase import db
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TIMEOUT_SECONDS = float(os.environ.get("DOCTOR_ROSTER_WARMUP_SECONDS", "10"))
+
+
+class DoctorRoster:
+    """Thread-safe snapshot of the doctors collection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._doctors: dict = {}     # doctor_id → fields
+        self._ready = threading.Event()
+        self._watch = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self, timeout: float = WARMUP_TIMEOUT_SECONDS) -> bool:
+        """Subscribe to ``doctors`` and wait for the initial snapshot."""
+        if self._watch is None:
+            self._watch = db.collection("doctors").on_snapshot(self._on_snapshot)
+        if not self._ready.wait(timeout):
+            logger.warning("Doctor roster not warm after %.0fs; reading Firestore until it is", timeout)
+        return self.ready
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self._ready.clear()
+        with self._lock:
+            self._doctors.clear()
+
+    def _on_snapshot(self, docs, changes, read_time):
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    self._remove(doc.id)
+                else:
+                    self._upsert(doc.id, doc.to_dict())
+        self._ready.set()
+
+    # -- updates (caller holds the lock) --------------------------------------
+
+    def _upsert(self, doctor_id: str, data: dict):
+        self._doctors[doctor_id] = data
+
+    def _remove(self, doctor_id: str):
+        self._doctors.pop(doctor_id, None)
+
+    # -- reads ----------------------------------------------------------------
+
+    def get(self, doctor_id: str):
+        with self._lock:
+            data = self._doctors.get(doctor_id)
+            return {**data, "id": doctor_id} if data is not None else None
+
+    def all(self) -> list:
+        with self._lock:
+            return [{**data, "id": doctor_id} for doctor_id, data in sorted(self._doctors.items())]
+
+    def by_department(self, department: str) -> list:
+        """Available doctors of a department (same result as the Firestore query)."""
+        with self._lock:
+            return [
+                {**data, "id": doctor_id}
+                for doctor_id, data in sorted(self._doctors.items())
+                if data.get("department") == department and data.get("is_available") is True
+            ]
+
+    # -- local writes -----------------------------------------------------------
+
+    def record_appointments(self, doctor_id: str, new_count: int):
+        """Apply this worker's own count update before the listener echoes it."""
+        with self._lock:
+            data = self._doctors.get(doctor_id)
+            if data is not None:
+                self._upsert(doctor_id, {**data, "current_appointments": new_count})
+
+
+roster = DoctorRoster()
@@ -1,18 +1,153 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+"""
+firebase.py — Storage backend selection for AarogyaLekha.
+
+Every repo module imports ``db`` from here; the async repos in
+``app.db.aio`` import ``async_db`` (an ``AsyncClient`` over the same
+data). The backend is chosen by the ``DB_BACKEND`` environment variable:
+
+    firestore (default)  Cloud Firestore via firebase_admin
+    memory               In-process stand-in from app.db.memory_store,
+                         with optional latency injection for benchmarking
+
+Importing this module has no side effects: ``db`` and ``async_db`` are
+stand-ins that create the clients on first use. The app creates them in
+its lifespan instead (``init_clients`` + ``warm_up`` / ``warm_up_async``),
+so the heavy firebase_admin / gRPC imports, credential parsing and the
+first connection happen before a worker accepts traffic rather than
+inside the first booking.
+
+Field transforms (``Increment``, ``SERVER_TIMESTAMP``, ``DELETE_FIELD``) and
+the ``AlreadyExists`` error resolve to the active backend's on attribute
+access (use them as ``firebase.Increment(...)`` at call time); the
+``transactional`` / ``async_transactional`` decorators bind to it on their
+first call. Repo code stays backend-agnostic.
+"""
+
+import functools
 import os
 import json
+import threading
+
+DB_BACKEND = os.getenv("DB_BACKEND", "firestore").strip().lower()
+
+# Document read by warm_up; any existing or missing document will do.
+WARMUP_DOCUMENT = "resources/hospital_resources"
+
+_clients = None   # (db, async_db, backend module)
+_clients_lock = threading.Lock()
+
+
+def _init_firestore():
+    import firebase_admin
+    from firebase_admin import credentials, firestore, firestore_async
+
+    if not firebase_admin._apps:
+
+        # Production (Render)
+        if os.getenv("FIREBASE_CREDENTIALS"):
+            cred_dict = json.loads(os.getenv("FIREBASE_CREDENTIALS"))
+            cred = credentials.Certificate(cred_dict)
+        else:
+            # Local development
+            cred = credentials.Certificate("serviceAccountKey.json")
+
+        firebase_admin.initialize_app(cred)
+
+    return firestore.client(), firestore_async.client(), firestore
+
+
+def _init_memory():
+    from app.db import memory_store
+
+    client = memory_store.MemoryClient.from_env()
+    return client, memory_store.AsyncMemoryClient(client), memory_store
+
+
+def init_clients() -> tuple:
+    """Create ``(db, async_db, backend)`` once per process (thread-safe)."""
+    global _clients
+    if _clients is None:
+        with _clients_lock:
+            if _clients is None:
+                if DB_BACKEND == "memory":
+                    _clients = _init_memory()
+                elif DB_BACKEND == "firestore":
+                    _clients = _init_firestore()
+                else:
+                    raise RuntimeError(
+                        f"Unknown DB_BACKEND '{DB_BACKEND}' (expected 'firestore' or 'memory')"
+                    )
+    return _clients
+
+
+def warm_up():
+    """Open the sync client's channel (TLS, auth token) with one priming read."""
+    init_clients()[0].document(WARMUP_DOCUMENT).get()
+
+
+async def warm_up_async():
+    """
+    Same for ``async_db``. Its gRPC channel is bound to the running event
+    loop, so call this from the loop that will serve requests.
+    """
+    await init_clients()[1].document(WARMUP_DOCUMENT).get()
+
+
+class _LazyClient:
+    """Forwards every attribute to the real client, creating it on first use."""
+
+    __slots__ = ("_index",)
+
+    def __init__(self, index: int):
+        self._index = index
+
+    def __getattr__(self, name):
+        return getattr(init_clients()[self._index], name)
+
+    def __repr__(self):
+        state = "ready" if _clients is not None else "not created yet"
+        return f"<{('db', 'async_db')[self._index]} ({DB_BACKEND}, {state})>"
+
+
+db = _LazyClient(0)
+async_db = _LazyClient(1)
+
+
+def transactional(to_wrap):
+    """Backend ``transactional``, bound on the first call."""
+    bound = None
+
+    @functools.wraps(to_wrap)
+    def wrapper(transaction, *args, **kwargs):
+        nonlocal bound
+        if bound is None:
+            bound = init_clients()[2].transactional(to_wrap)
+        return bound(transaction, *args, **kwargs)
+
+    return wrapper
+
+
+def async_transactional(to_wrap):
+    """Backend ``async_transactional``, bound on the first call."""
+    bound = None
 
-if not firebase_admin._apps:
+    @functools.wraps(to_wrap)
+    async def wrapper(transaction, *args, **kwargs):
+        nonlocal bound
+        if bound is None:
+            bound = init_clients()[2].async_transactional(to_wrap)
+        return await bound(transaction, *args, **kwargs)
 
-    # Production (Render)
-    if os.getenv("FIREBASE_CREDENTIALS"):
-        cred_dict = json.loads(os.getenv("FIREBASE_CREDENTIALS"))
-        cred = credentials.Certificate(cred_dict)
-    else:
-        # Local development
-        cred = credentials.Certificate("serviceAccountKey.json")
+    return wrapper
 
-    firebase_admin.initialize_app(cred)
 
-db = firestore.client()
+def __getattr__(name):
+    if name in ("Increment", "SERVER_TIMESTAMP", "DELETE_FIELD"):
+        return getattr(init_clients()[2], name)
+    if name == "AlreadyExists":
+        # Raised by create() (and batch commits containing one) when the document exists.
+        if DB_BACKEND == "memory":
+            return init_clients()[2].AlreadyExists
+        from google.api_core.exceptions import AlreadyExists
+        return AlreadyExists
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
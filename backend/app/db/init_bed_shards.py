@@ -0,0 +1,27 @@
+"""
+init_bed_shards.py — Create or rebuild the sharded bed-occupancy counters.
+
+Splits ``icu_total`` / ``ward_total`` from resources/hospital_resources
+across BED_COUNTER_SHARDS shards, carrying over current occupancy. Re-run
+after changing the totals or the shard count (ideally while admissions
+are quiet):
+    python -m app.db.init_bed_shards
+"""
+
+import os
+import sys
+
+# Add backend dir to path so `app.` imports work when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db.resource_repo import BED_SHARDS, init_bed_shards
+
+
+if __name__ == "__main__":
+    totals = init_bed_shards()
+    print(f"✅  Bed occupancy split across {BED_SHARDS} shards:")
+    print(f"   ICU   {totals['icu_occupied']}/{totals['icu_total']}")
+    print(f"   Ward  {totals['ward_occupied']}/{totals['ward_total']}")
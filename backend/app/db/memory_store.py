@@ -0,0 +1,1131 @@
+"""
+memory_store.py — In-process stand-in for the Firestore client.
+
+Implements the subset of the ``google.cloud.firestore`` surface that the
+repo modules use (collection / document / where / order_by / limit /
+stream / get / set / update / delete / batch / transaction) on top of
+plain dictionaries, so the API can be load-tested and profiled without a
+network connection or production credentials.
+
+Every round trip can be delayed by a configurable latency plus uniform
+jitter to reproduce real Firestore costs on a laptop:
+
+    DB_BACKEND=memory
+    MEMORY_DB_LATENCY_MS=25          # default delay per round trip
+    MEMORY_DB_JITTER_MS=10           # ± uniform jitter
+    MEMORY_DB_OP_LATENCY_MS=commit=40,stream=30   # per-operation overrides
+
+Operations are named ``get``, ``stream``, ``set``, ``update``, ``delete``
+and ``commit`` (batch / transaction commit).
+
+    MEMORY_DB_CONNECT_MS=400         # one-off cost of opening a channel
+
+models a cold gRPC channel (TLS handshake + auth token fetch): the first
+operation on the sync client, and separately on the async client, waits
+that long, and so does anything issued while the channel is connecting.
+
+``AsyncMemoryClient(client)`` exposes the same store through the
+``AsyncClient`` surface (awaitable get / set / commit, async-iterator
+``stream``, ``async_transactional``); its latency is an ``asyncio.sleep``
+so concurrent requests overlap instead of blocking the event loop.
+
+``query.on_snapshot(callback)`` mirrors Firestore real-time listeners:
+the callback receives ``(docs, changes, read_time)`` on a background
+thread, first with every matching document and then after each write
+that adds, modifies or removes one.
+"""
+
+import asyncio
+import base64
+import copy
+import enum
+import json
+import logging
+import os
+import queue
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+# Field path that orders / filters by document ID (FieldPath.document_id()).
+DOCUMENT_ID = "__name__"
+
+# Firestore caps a single batch / transaction at 500 writes.
+MAX_WRITES_PER_COMMIT = 500
+
+
+class AlreadyExists(Exception):
+    """Raised by ``create()`` when the target document already exists."""
+
+
+class NotFound(Exception):
+    """Raised by ``update()`` when the target document does not exist."""
+
+
+class TransactionConflict(Exception):
+    """Raised at commit time when a document read in the transaction changed."""
+
+
+# ---------------------------------------------------------------------------
+# Field transforms (mirror google.cloud.firestore sentinels)
+# ---------------------------------------------------------------------------
+
+class Increment:
+    """Atomically add ``value`` to a numeric field (missing counts as 0)."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _Sentinel:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+SERVER_TIMESTAMP = _Sentinel("SERVER_TIMESTAMP")
+DELETE_FIELD = _Sentinel("DELETE_FIELD")
+
+
+# ---------------------------------------------------------------------------
+# Value helpers
+# ---------------------------------------------------------------------------
+
+def _auto_id() -> str:
+    return "".join(random.choice(_AUTO_ID_CHARS) for _ in range(20))
+
+
+def _get_path(data: dict, field_path: str):
+    """Resolve a dotted field path. Returns (found, value)."""
+    node: Any = data
+    for part in field_path.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return False, None
+        node = node[part]
+    return True, node
+
+
+def _apply_field(data: dict, field_path: str, value):
+    """Write ``value`` at a dotted field path, applying transforms."""
+    parts = field_path.split(".")
+    node = data
+    for part in parts[:-1]:
+        child = node.get(part)
+        if not isinstance(child, dict):
+            child = {}
+            node[part] = child
+        node = child
+    leaf = parts[-1]
+
+    if value is DELETE_FIELD:
+        node.pop(leaf, None)
+    elif value is SERVER_TIMESTAMP:
+        node[leaf] = datetime.now(tz=timezone.utc)
+    elif isinstance(value, Increment):
+        current = node.get(leaf, 0)
+        if not isinstance(current, (int, float)) or isinstance(current, bool):
+            current = 0
+        node[leaf] = current + value.value
+    else:
+        node[leaf] = copy.deepcopy(value)
+
+
+def _resolve_transforms(data: dict) -> dict:
+    """Return a deep copy of ``data`` with top-level and nested sentinels applied."""
+    out: dict = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            out[key] = _resolve_transforms(value)
+        elif value is DELETE_FIELD:
+            continue
+        elif value is SERVER_TIMESTAMP:
+            out[key] = datetime.now(tz=timezone.utc)
+        elif isinstance(value, Increment):
+            out[key] = value.value
+        else:
+            out[key] = copy.deepcopy(value)
+    return out
+
+
+def _type_rank(value) -> int:
+    # Firestore's cross-type ordering: null < bool < number < timestamp
+    # < string < bytes < reference < geo < array < map.
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, (bytes, bytearray)):
+        return 5
+    if isinstance(value, (list, tuple)):
+        return 8
+    return 9
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 3 and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    if rank >= 8:
+        value = repr(value)
+    return (rank, value)
+
+
+def _compare(left, op: str, right) -> bool:
+    if op == "==":
+        return left == right
+    if op == "!=":
+        return left != right
+    if op == "in":
+        return left in right
+    if op == "not-in":
+        return left not in right
+    if op == "array_contains":
+        return isinstance(left, list) and right in left
+    if op == "array_contains_any":
+        return isinstance(left, list) and any(v in left for v in right)
+
+    # Range operators only match values of the same type class.
+    if _type_rank(left) != _type_rank(right):
+        return False
+    lk, rk = _sort_key(left), _sort_key(right)
+    if op == "<":
+        return lk < rk
+    if op == "<=":
+        return lk <= rk
+    if op == ">":
+        return lk > rk
+    if op == ">=":
+        return lk >= rk
+    raise ValueError(f"Unsupported operator '{op}'")
+
+
+# ---------------------------------------------------------------------------
+# Snapshots & references
+# ---------------------------------------------------------------------------
+
+class MemoryDocumentSnapshot:
+    """Read-only view of a document at the time it was read."""
+
+    def __init__(self, reference: "MemoryDocumentReference", data: Optional[dict],
+                 update_time: Optional[datetime] = None):
+        self.reference = reference
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        if self._data is None:
+            return None
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str):
+        if self._data is None:
+            return None
+        found, value = _get_path(self._data, field_path)
+        return copy.deepcopy(value) if found else None
+
+
+class MemoryDocumentReference:
+    def __init__(self, client: "MemoryClient", collection_path: str, doc_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self) -> "MemoryCollectionReference":
+        return MemoryCollectionReference(self._client, self._collection_path)
+
+    def collection(self, name: str) -> "MemoryCollectionReference":
+        return MemoryCollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None) -> MemoryDocumentSnapshot:
+        if transaction is not None:
+            return transaction.get(self)
+        self._client._delay("get")
+        return self._client._read(self)
+
+    def set(self, data: dict, merge: bool = False):
+        self._client._delay("set")
+        self._client._commit([("set", self, data, merge)])
+
+    def create(self, data: dict):
+        self._client._delay("set")
+        self._client._commit([("create", self, data, False)])
+
+    def update(self, data: dict):
+        self._client._delay("update")
+        self._client._commit([("update", self, data, False)])
+
+    def delete(self):
+        self._client._delay("delete")
+        self._client._commit([("delete", self, None, False)])
+
+
+class MemoryQuery:
+    """Immutable query builder; every refinement returns a new query."""
+
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, client: "MemoryClient", collection_path: str,
+                 filters=(), orders=(), limit=None, offset=0,
+                 start_after=None, projection=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._offset = offset
+        self._start_after = start_after
+        self._projection = projection
+
+    def _copy(self, **changes) -> "MemoryQuery":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "offset": self._offset,
+            "start_after": self._start_after,
+            "projection": self._projection,
+        }
+        state.update(changes)
+        return MemoryQuery(self._client, self._collection_path, **state)
+
+    # -- builders ----------------------------------------------------------
+
+    def where(self, field_path: str = None, op_string: str = None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip: int):
+        return self._copy(offset=num_to_skip)
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start_after=document_fields_or_snapshot)
+
+    def select(self, field_paths):
+        return self._copy(projection=tuple(field_paths))
+
+    # -- execution ---------------------------------------------------------
+
+    def _matches(self, data: dict) -> bool:
+        for field_path, op, value in self._filters:
+            found, current = _get_path(data, field_path)
+            if not found:
+                return False
+            if not _compare(current, op, value):
+                return False
+        for field_path, _ in self._orders:
+            if field_path != DOCUMENT_ID and not _get_path(data, field_path)[0]:
+                return False
+        return True
+
+    def _order_key(self, doc_id: str, data: dict):
+        key = []
+        for field_path, direction in self._orders:
+            if field_path == DOCUMENT_ID:
+                value = doc_id
+            else:
+                value = _sort_key(_get_path(data, field_path)[1])
+            key.append(_Reversed(value) if direction == DESCENDING else value)
+        # Firestore breaks ties by document name in the last order direction.
+        last_desc = bool(self._orders) and self._orders[-1][1] == DESCENDING
+        key.append(_Reversed(doc_id) if last_desc else doc_id)
+        return tuple(key)
+
+    def _cursor_key(self):
+        cursor = self._start_after
+        if isinstance(cursor, MemoryDocumentSnapshot):
+            return self._order_key(cursor.id, cursor._data or {})
+        if isinstance(cursor, dict):
+            name = cursor.get(DOCUMENT_ID, "")
+            return self._order_key(getattr(name, "id", name), cursor)[:len(self._orders)]
+        raise TypeError("start_after expects a document snapshot or a dict of field values")
+
+    def _run(self) -> list:
+        rows = [
+            (doc_id, data, update_time)
+            for doc_id, (data, _, update_time) in self._client._scan(self._collection_path)
+            if self._matches(data)
+        ]
+        rows.sort(key=lambda row: self._order_key(row[0], row[1]))
+
+        if self._start_after is not None:
+            cursor = self._cursor_key()
+            rows = [
+                row for row in rows
+                if self._order_key(row[0], row[1])[:len(cursor)] > cursor
+            ]
+        if self._offset:
+            rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        snapshots = []
+        for doc_id, data, update_time in rows:
+            if self._projection is not None:
+                projected: dict = {}
+                for field_path in self._projection:
+                    found, value = _get_path(data, field_path)
+                    if found:
+                        _apply_field(projected, field_path, value)
+                data = projected
+            ref = MemoryDocumentReference(self._client, self._collection_path, doc_id)
+            snapshots.append(MemoryDocumentSnapshot(ref, copy.deepcopy(data), update_time))
+        return snapshots
+
+    def stream(self, transaction=None) -> Iterator[MemoryDocumentSnapshot]:
+        if transaction is not None:
+            yield from transaction.get(self)
+            return
+        self._client._delay("stream")
+        yield from self._run()
+
+    def get(self, transaction=None) -> list:
+        return list(self.stream(transaction=transaction))
+
+    def on_snapshot(self, callback: Callable) -> "MemoryWatch":
+        """Listen for changes; returns a watch with ``unsubscribe()``."""
+        return self._client._watch(self, callback)
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client: "MemoryClient", collection_path: str):
+        super().__init__(client, collection_path)
+
+    @property
+    def id(self) -> str:
+        return self._collection_path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> MemoryDocumentReference:
+        return MemoryDocumentReference(
+            self._client, self._collection_path, document_id or _auto_id()
+        )
+
+    def add(self, data: dict, document_id: Optional[str] = None):
+        ref = self.document(document_id)
+        ref.create(data)
+        return datetime.now(tz=timezone.utc), ref
+
+    def list_documents(self):
+        return [
+            MemoryDocumentReference(self._client, self._collection_path, doc_id)
+            for doc_id, _ in self._client._scan(self._collection_path)
+        ]
+
+
+class _Reversed:
+    """Sort-key wrapper that inverts ordering for DESCENDING fields."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __le__(self, other):
+        return other.value <= self.value
+
+    def __ge__(self, other):
+        return other.value >= self.value
+
+
+# ---------------------------------------------------------------------------
+# Real-time listeners
+# ---------------------------------------------------------------------------
+
+class ChangeType(enum.Enum):
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class MemoryDocumentChange:
+    def __init__(self, type: ChangeType, document: MemoryDocumentSnapshot):
+        self.type = type
+        self.document = document
+
+
+class MemoryWatch:
+    """
+    A registered ``on_snapshot`` listener. Diffs are computed under the
+    client lock (so they follow commit order) and delivered by the
+    client's notifier thread.
+    """
+
+    def __init__(self, client: "MemoryClient", query: MemoryQuery, callback: Callable):
+        self._client = client
+        self._query = query
+        self._callback = callback
+        self._known: dict = {}   # doc_id → (version, snapshot)
+        self.active = True
+
+    def unsubscribe(self):
+        self.active = False
+        self._client._unwatch(self)
+
+    def _diff(self):
+        """Return ``(docs, changes)`` since the previous call, or None."""
+        docs = self._query._run()
+        current, changes = {}, []
+        for snap in docs:
+            version = self._client._version_of(snap.reference)
+            current[snap.id] = (version, snap)
+            previous = self._known.get(snap.id)
+            if previous is None:
+                changes.append(MemoryDocumentChange(ChangeType.ADDED, snap))
+            elif previous[0] != version:
+                changes.append(MemoryDocumentChange(ChangeType.MODIFIED, snap))
+        for doc_id, (_, snap) in self._known.items():
+            if doc_id not in current:
+                changes.append(MemoryDocumentChange(ChangeType.REMOVED, snap))
+        first = not self._known and not changes
+        self._known = current
+        if changes or first:
+            return docs, changes
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Batches & transactions
+# ---------------------------------------------------------------------------
+
+class MemoryWriteBatch:
+    """Buffers writes and applies them atomically on ``commit()``."""
+
+    def __init__(self, client: "MemoryClient"):
+        self._client = client
+        self._writes: list = []
+
+    def _add(self, write):
+        kind, reference, payload, merge = write
+        # Async references wrap a sync one; the store only needs the latter.
+        write = (kind, getattr(reference, "_ref", reference), payload, merge)
+        if len(self._writes) >= MAX_WRITES_PER_COMMIT:
+            raise ValueError(
+                f"A batch can contain at most {MAX_WRITES_PER_COMMIT} writes"
+            )
+        self._writes.append(write)
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, document_data: dict, merge: bool = False):
+        self._add(("set", reference, document_data, merge))
+
+    def create(self, reference, document_data: dict):
+        self._add(("create", reference, document_data, False))
+
+    def update(self, reference, field_updates: dict):
+        self._add(("update", reference, field_updates, False))
+
+    def delete(self, reference):
+        self._add(("delete", reference, None, False))
+
+    def commit(self):
+        self._client._delay("commit")
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+        return writes
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """
+    Optimistic transaction: remembers the version of every document it
+    reads and refuses to commit if any of them changed in the meantime.
+    Use through :func:`transactional`, which retries on conflict.
+    """
+
+    def __init__(self, client: "MemoryClient", max_attempts: int = 5):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_versions: dict = {}
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            self._client._delay("get")
+            snapshot, version = self._client._read_versioned(ref_or_query)
+            self._read_versions.setdefault(ref_or_query.path, version)
+            return snapshot
+        self._client._delay("stream")
+        snapshots = ref_or_query._run()
+        for snap in snapshots:
+            version = self._client._version_of(snap.reference)
+            self._read_versions.setdefault(snap.reference.path, version)
+        return iter(snapshots)
+
+    def _get_documents(self, refs) -> list:
+        """Transactional batched get: one round trip for every document."""
+        self._client._delay("get")
+        snapshots = []
+        for ref in refs:
+            snapshot, version = self._client._read_versioned(ref)
+            self._read_versions.setdefault(ref.path, version)
+            snapshots.append(snapshot)
+        return snapshots
+
+    def _begin(self):
+        self._writes = []
+        self._read_versions = {}
+
+    def _commit(self):
+        self._client._delay("commit")
+        writes, self._writes = self._writes, []
+        self._client._commit(writes, expected_versions=self._read_versions)
+
+    def _rollback(self):
+        self._writes = []
+        self._read_versions = {}
+
+
+def transactional(to_wrap: Callable) -> Callable:
+    """
+    Drop-in for ``firestore.transactional``: runs ``to_wrap(transaction, ...)``
+    and retries it from scratch when the commit detects a conflicting write.
+    """
+
+    def wrapper(transaction: MemoryTransaction, *args, **kwargs):
+        for _ in range(transaction._max_attempts):
+            transaction._begin()
+            try:
+                result = to_wrap(transaction, *args, **kwargs)
+                transaction._commit()
+                return result
+            except TransactionConflict:
+                transaction._rollback()
+                continue
+            except Exception:
+                transaction._rollback()
+                raise
+        raise ValueError(
+            f"Failed to commit transaction in {transaction._max_attempts} attempts."
+        )
+
+    return wrapper
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def _parse_op_latency(spec: str) -> dict:
+    """Parse ``"commit=40,stream=30"`` into ``{"commit": 40.0, "stream": 30.0}``."""
+    result = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        op, _, ms = item.partition("=")
+        result[op.strip()] = float(ms)
+    return result
+
+
+def _encode_fixture_value(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"$bytes": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, dict):
+        return {k: _encode_fixture_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode_fixture_value(v) for v in value]
+    return value
+
+
+def _decode_fixture_value(value):
+    if isinstance(value, dict):
+        if set(value) == {"$datetime"}:
+            return datetime.fromisoformat(value["$datetime"])
+        if set(value) == {"$bytes"}:
+            return base64.b64decode(value["$bytes"])
+        return {k: _decode_fixture_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_fixture_value(v) for v in value]
+    return value
+
+
+class MemoryClient:
+    """Thread-safe in-memory document store with simulated round-trip latency."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 op_latency_ms: Optional[dict] = None, seed: Optional[int] = None,
+                 connect_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.op_latency_ms = dict(op_latency_ms or {})
+        self.connect_ms = connect_ms
+        # channel → monotonic time its (simulated) connection completes
+        self._connected_at: dict = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        # collection path → {doc_id: (data, version, update_time)}
+        self._collections: dict = {}
+        self._version = 0
+        self._watches: list = []
+        self._notifications: queue.Queue = queue.Queue()
+        self._notifier: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "MemoryClient":
+        seed = os.getenv("MEMORY_DB_SEED")
+        client = cls(
+            latency_ms=float(os.getenv("MEMORY_DB_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("MEMORY_DB_JITTER_MS", "0")),
+            op_latency_ms=_parse_op_latency(os.getenv("MEMORY_DB_OP_LATENCY_MS", "")),
+            seed=int(seed) if seed else None,
+            connect_ms=float(os.getenv("MEMORY_DB_CONNECT_MS", "0")),
+        )
+        fixture = os.getenv("MEMORY_DB_FIXTURE")
+        if fixture:
+            client.load_fixture(fixture)
+        return client
+
+    # -- public surface ----------------------------------------------------
+
+    def collection(self, name: str) -> MemoryCollectionReference:
+        return MemoryCollectionReference(self, name)
+
+    def document(self, path: str) -> MemoryDocumentReference:
+        collection_path, _, doc_id = path.rpartition("/")
+        return MemoryDocumentReference(self, collection_path, doc_id)
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5) -> MemoryTransaction:
+        return MemoryTransaction(self, max_attempts=max_attempts)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        """Fetch several documents in a single round trip."""
+        if transaction is not None:
+            return transaction._get_documents(references)
+        self._delay("get")
+        return [self._read(ref) for ref in references]
+
+    # -- fixtures ----------------------------------------------------------
+
+    def load(self, data: dict):
+        """Bulk-load ``{collection_path: {doc_id: fields}}`` with no latency."""
+        with self._lock:
+            for collection_path, docs in data.items():
+                for doc_id, fields in docs.items():
+                    self._write_doc(collection_path, doc_id, _decode_fixture_value(fields))
+            self._notify_watches(set(data))
+
+    def load_fixture(self, path: str):
+        with open(path, "r", encoding="utf-8") as fh:
+            self.load(json.load(fh))
+
+    def dump(self) -> dict:
+        """Return the full store as JSON-serialisable fixture data."""
+        with self._lock:
+            return {
+                collection_path: {
+                    doc_id: _encode_fixture_value(data)
+                    for doc_id, (data, _, _) in docs.items()
+                }
+                for collection_path, docs in self._collections.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            touched = set(self._collections)
+            self._collections.clear()
+            self._notify_watches(touched)
+
+    # -- internals ---------------------------------------------------------
+
+    def _delay_seconds(self, op: str) -> float:
+        base = self.op_latency_ms.get(op, self.latency_ms)
+        if base <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, base + jitter) / 1000.0
+
+    def _connect_seconds(self, channel: str) -> float:
+        """Time left until ``channel`` is connected (the first call starts connecting)."""
+        if self.connect_ms <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            ready = self._connected_at.setdefault(channel, now + self.connect_ms / 1000.0)
+        return max(0.0, ready - now)
+
+    def _delay(self, op: str):
+        seconds = self._connect_seconds("sync") + self._delay_seconds(op)
+        if seconds:
+            time.sleep(seconds)
+
+    async def _adelay(self, op: str):
+        seconds = self._connect_seconds("async") + self._delay_seconds(op)
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    def _scan(self, collection_path: str) -> list:
+        with self._lock:
+            return list(self._collections.get(collection_path, {}).items())
+
+    def _version_of(self, ref: MemoryDocumentReference) -> int:
+        with self._lock:
+            entry = self._collections.get(ref._collection_path, {}).get(ref.id)
+            return entry[1] if entry else 0
+
+    def _read_versioned(self, ref: MemoryDocumentReference):
+        with self._lock:
+            entry = self._collections.get(ref._collection_path, {}).get(ref.id)
+            if entry is None:
+                return MemoryDocumentSnapshot(ref, None), 0
+            data, version, update_time = entry
+            return MemoryDocumentSnapshot(ref, copy.deepcopy(data), update_time), version
+
+    def _read(self, ref: MemoryDocumentReference) -> MemoryDocumentSnapshot:
+        return self._read_versioned(ref)[0]
+
+    def _write_doc(self, collection_path: str, doc_id: str, data: Optional[dict]):
+        docs = self._collections.setdefault(collection_path, {})
+        if data is None:
+            docs.pop(doc_id, None)
+            return
+        self._version += 1
+        docs[doc_id] = (data, self._version, datetime.now(tz=timezone.utc))
+
+    def _commit(self, writes: list, expected_versions: Optional[dict] = None):
+        with self._lock:
+            if expected_versions:
+                for path, version in expected_versions.items():
+                    collection_path, _, doc_id = path.rpartition("/")
+                    entry = self._collections.get(collection_path, {}).get(doc_id)
+                    if (entry[1] if entry else 0) != version:
+                        raise TransactionConflict(path)
+
+            # Validate first so a failing write leaves the store untouched.
+            staged: dict = {}
+            for kind, ref, payload, merge in writes:
+                key = (ref._collection_path, ref.id)
+                if key in staged:
+                    current = staged[key]
+                else:
+                    entry = self._collections.get(ref._collection_path, {}).get(ref.id)
+                    current = copy.deepcopy(entry[0]) if entry else None
+
+                if kind == "create":
+                    if current is not None:
+                        raise AlreadyExists(ref.path)
+                    current = _resolve_transforms(payload)
+                elif kind == "set":
+                    if merge and current is not None:
+                        for field, value in payload.items():
+                            _merge_field(current, field, value)
+                    else:
+                        current = _resolve_transforms(payload)
+                elif kind == "update":
+                    if current is None:
+                        raise NotFound(ref.path)
+                    for field_path, value in payload.items():
+                        _apply_field(current, field_path, value)
+                elif kind == "delete":
+                    current = None
+                staged[key] = current
+
+            for (collection_path, doc_id), data in staged.items():
+                self._write_doc(collection_path, doc_id, data)
+            self._notify_watches({collection_path for collection_path, _ in staged})
+
+    # -- listeners ---------------------------------------------------------
+
+    def _watch(self, query: MemoryQuery, callback: Callable) -> MemoryWatch:
+        watch = MemoryWatch(self, query, callback)
+        with self._lock:
+            if self._notifier is None:
+                self._notifier = threading.Thread(
+                    target=self._deliver_notifications, name="memory-db-listeners",
+                    daemon=True,
+                )
+                self._notifier.start()
+            self._watches.append(watch)
+            self._enqueue(watch, watch._diff())
+        return watch
+
+    def _unwatch(self, watch: MemoryWatch):
+        with self._lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    def _notify_watches(self, collection_paths: set):
+        for watch in self._watches:
+            if watch._query._collection_path in collection_paths:
+                self._enqueue(watch, watch._diff())
+
+    def _enqueue(self, watch: MemoryWatch, diff):
+        if diff is not None:
+            docs, changes = diff
+            self._notifications.put((watch, docs, changes, datetime.now(tz=timezone.utc)))
+
+    def _deliver_notifications(self):
+        while True:
+            watch, docs, changes, read_time = self._notifications.get()
+            if not watch.active:
+                continue
+            try:
+                watch._callback(docs, changes, read_time)
+            except Exception:  # a failing listener must not stop the others
+                logger.exception("Snapshot listener failed")
+
+
+def _merge_field(target: dict, field: str, value):
+    """``set(..., merge=True)`` semantics: nested dicts merge, leaves overwrite."""
+    if isinstance(value, dict) and isinstance(target.get(field), dict):
+        for key, inner in value.items():
+            _merge_field(target[field], key, inner)
+    elif isinstance(value, dict):
+        target[field] = _resolve_transforms(value)
+    else:
+        _apply_field(target, field, value)
+
+
+# ---------------------------------------------------------------------------
+# Async surface (mirrors google.cloud.firestore.AsyncClient)
+# ---------------------------------------------------------------------------
+
+class AsyncMemoryDocumentReference:
+    def __init__(self, ref: MemoryDocumentReference):
+        self._ref = ref
+        self._client = ref._client
+        self.id = ref.id
+
+    @property
+    def path(self) -> str:
+        return self._ref.path
+
+    @property
+    def parent(self) -> "AsyncMemoryCollectionReference":
+        return AsyncMemoryCollectionReference(self._ref.parent)
+
+    def collection(self, name: str) -> "AsyncMemoryCollectionReference":
+        return AsyncMemoryCollectionReference(self._ref.collection(name))
+
+    async def get(self, field_paths=None, transaction=None) -> MemoryDocumentSnapshot:
+        if transaction is not None:
+            return await transaction._get_document(self)
+        await self._client._adelay("get")
+        return _async_snapshot(self._client._read(self._ref))
+
+    async def set(self, data: dict, merge: bool = False):
+        await self._client._adelay("set")
+        self._client._commit([("set", self._ref, data, merge)])
+
+    async def create(self, data: dict):
+        await self._client._adelay("set")
+        self._client._commit([("create", self._ref, data, False)])
+
+    async def update(self, data: dict):
+        await self._client._adelay("update")
+        self._client._commit([("update", self._ref, data, False)])
+
+    async def delete(self):
+        await self._client._adelay("delete")
+        self._client._commit([("delete", self._ref, None, False)])
+
+
+def _async_snapshot(snapshot: MemoryDocumentSnapshot) -> MemoryDocumentSnapshot:
+    return MemoryDocumentSnapshot(
+        AsyncMemoryDocumentReference(snapshot.reference), snapshot._data, snapshot.update_time
+    )
+
+
+class AsyncMemoryQuery:
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, query: MemoryQuery):
+        self._query = query
+        self._client = query._client
+
+    def where(self, *args, **kwargs):
+        return AsyncMemoryQuery(self._query.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs):
+        return AsyncMemoryQuery(self._query.order_by(*args, **kwargs))
+
+    def limit(self, count: int):
+        return AsyncMemoryQuery(self._query.limit(count))
+
+    def offset(self, num_to_skip: int):
+        return AsyncMemoryQuery(self._query.offset(num_to_skip))
+
+    def start_after(self, document_fields_or_snapshot):
+        return AsyncMemoryQuery(self._query.start_after(document_fields_or_snapshot))
+
+    def select(self, field_paths):
+        return AsyncMemoryQuery(self._query.select(field_paths))
+
+    async def stream(self, transaction=None):
+        if transaction is not None:
+            snapshots = await transaction._get_query(self)
+        else:
+            await self._client._adelay("stream")
+            snapshots = [_async_snapshot(snap) for snap in self._query._run()]
+        for snap in snapshots:
+            yield snap
+
+    async def get(self, transaction=None) -> list:
+        return [snap async for snap in self.stream(transaction=transaction)]
+
+    def on_snapshot(self, callback: Callable) -> MemoryWatch:
+        return self._query.on_snapshot(callback)
+
+
+class AsyncMemoryCollectionReference(AsyncMemoryQuery):
+    @property
+    def id(self) -> str:
+        return self._query.id
+
+    def document(self, document_id: Optional[str] = None) -> AsyncMemoryDocumentReference:
+        return AsyncMemoryDocumentReference(self._query.document(document_id))
+
+    async def add(self, data: dict, document_id: Optional[str] = None):
+        ref = self.document(document_id)
+        await ref.create(data)
+        return datetime.now(tz=timezone.utc), ref
+
+
+class AsyncMemoryWriteBatch(MemoryWriteBatch):
+    async def commit(self):
+        await self._client._adelay("commit")
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+        return writes
+
+
+class AsyncMemoryTransaction(AsyncMemoryWriteBatch):
+    """Async twin of :class:`MemoryTransaction`; use with :func:`async_transactional`."""
+
+    def __init__(self, client: "MemoryClient", max_attempts: int = 5):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_versions: dict = {}
+
+    async def _get_document(self, ref: AsyncMemoryDocumentReference):
+        await self._client._adelay("get")
+        snapshot, version = self._client._read_versioned(ref._ref)
+        self._read_versions.setdefault(ref.path, version)
+        return _async_snapshot(snapshot)
+
+    async def _get_documents(self, refs) -> list:
+        await self._client._adelay("get")
+        snapshots = []
+        for ref in refs:
+            snapshot, version = self._client._read_versioned(ref._ref)
+            self._read_versions.setdefault(ref.path, version)
+            snapshots.append(_async_snapshot(snapshot))
+        return snapshots
+
+    async def _get_query(self, query: AsyncMemoryQuery) -> list:
+        await self._client._adelay("stream")
+        snapshots = query._query._run()
+        for snap in snapshots:
+            version = self._client._version_of(snap.reference)
+            self._read_versions.setdefault(snap.reference.path, version)
+        return [_async_snapshot(snap) for snap in snapshots]
+
+    _begin = MemoryTransaction._begin
+    _rollback = MemoryTransaction._rollback
+
+    async def _commit(self):
+        await self._client._adelay("commit")
+        writes, self._writes = self._writes, []
+        self._client._commit(writes, expected_versions=self._read_versions)
+
+
+def async_transactional(to_wrap: Callable) -> Callable:
+    """Drop-in for ``firestore.async_transactional``."""
+
+    async def wrapper(transaction: AsyncMemoryTransaction, *args, **kwargs):
+        for _ in range(transaction._max_attempts):
+            transaction._begin()
+            try:
+                result = await to_wrap(transaction, *args, **kwargs)
+                await transaction._commit()
+                return result
+            except TransactionConflict:
+                transaction._rollback()
+                continue
+            except Exception:
+                transaction._rollback()
+                raise
+        raise ValueError(
+            f"Failed to commit transaction in {transaction._max_attempts} attempts."
+        )
+
+    return wrapper
+
+
+class AsyncMemoryClient:
+    """``AsyncClient``-shaped view over a :class:`MemoryClient` (same data)."""
+
+    def __init__(self, client: MemoryClient):
+        self._client = client
+
+    def collection(self, name: str) -> AsyncMemoryCollectionReference:
+        return AsyncMemoryCollectionReference(self._client.collection(name))
+
+    def document(self, path: str) -> AsyncMemoryDocumentReference:
+        return AsyncMemoryDocumentReference(self._client.document(path))
+
+    def batch(self) -> AsyncMemoryWriteBatch:
+        return AsyncMemoryWriteBatch(self._client)
+
+    def transaction(self, max_attempts: int = 5) -> AsyncMemoryTransaction:
+        return AsyncMemoryTransaction(self._client, max_attempts=max_attempts)
+
+    async def get_all(self, references, field_paths=None, transaction=None):
+        """Fetch several documents in a single round trip."""
+        if transaction is not None:
+            for snapshot in await transaction._get_documents(list(references)):
+                yield snapshot
+            return
+        await self._client._adelay("get")
+        for ref in references:
+            yield _async_snapshot(self._client._read(getattr(ref, "_ref", ref)))
@@ -0,0 +1,103 @@
+"""
+migrate_credentials.py — Re-key credential documents by normalized email.
+
+Moves every ``doctor_credentials`` / ``admin_credentials`` document whose
+ID isn't ``credential_id(email)`` to that ID (normalizing ``email``) and
+copies the DOCTOR_LOGIN_FIELDS profile fields into doctor credentials.
+Safe to re-run; already-migrated documents only get missing profile
+fields backfilled. Two legacy documents with the same email are
+reported and left in place for manual cleanup.
+
+Run from the backend directory, then set LEGACY_CREDENTIAL_LOOKUP=0:
+    python -m app.db.migrate_credentials [--dry-run]
+"""
+
+import os
+import sys
+
+# Add backend dir to path so `app.` imports work when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db.credentials_repo import DOCTOR_LOGIN_FIELDS, credential_id, normalize_email
+from app.db.firebase import db
+
+# Firestore accepts at most 500 writes per batch commit.
+BATCH_WRITE_LIMIT = 500
+
+
+def _doctor_profiles(doctor_ids) -> dict:
+    """``{doctor_id: fields}`` fetched with batched gets."""
+    ids = sorted(set(doctor_ids))
+    profiles = {}
+    for start in range(0, len(ids), BATCH_WRITE_LIMIT):
+        refs = [db.collection("doctors").document(i) for i in ids[start:start + BATCH_WRITE_LIMIT]]
+        for snap in db.get_all(refs):
+            if snap.exists:
+                profiles[snap.id] = snap.to_dict()
+    return profiles
+
+
+def migrate_collection(collection: str, dry_run: bool = False) -> dict:
+    docs = {doc.id: doc.to_dict() for doc in db.collection(collection).stream()}
+    profiles = (
+        _doctor_profiles(data.get("doctor_id") for data in docs.values() if data.get("doctor_id"))
+        if collection == "doctor_credentials" else {}
+    )
+
+    counts = {"moved": 0, "backfilled": 0, "unchanged": 0, "duplicates": 0, "no_email": 0}
+    claimed = {}   # target ID → source ID that will own it
+    writes = []    # (op, doc_id, data)
+    for doc_id, data in sorted(docs.items(), key=lambda item: item[0] != credential_id(item[1].get("email", ""))):
+        if not data.get("email"):
+            counts["no_email"] += 1
+            continue
+        target = credential_id(data["email"])
+        owner = claimed.setdefault(target, doc_id)
+        if owner != doc_id:
+            counts["duplicates"] += 1
+            print(f"⚠  {collection}/{doc_id}: same email as {collection}/{owner} — left in place")
+            continue
+
+        migrated = {**data, "email": normalize_email(data["email"])}
+        profile = profiles.get(data.get("doctor_id"), {})
+        migrated.update({field: profile[field] for field in DOCTOR_LOGIN_FIELDS if field in profile})
+
+        if doc_id == target:
+            if migrated == data:
+                counts["unchanged"] += 1
+            else:
+                counts["backfilled"] += 1
+                writes.append(("set", target, migrated))
+            continue
+        counts["moved"] += 1
+        writes.append(("set", target, migrated))
+        writes.append(("delete", doc_id, None))
+
+    if not dry_run:
+        # A move's set + delete always land in the same batch.
+        batch, pending = db.batch(), 0
+        for index, (op, doc_id, data) in enumerate(writes):
+            ref = db.collection(collection).document(doc_id)
+            if op == "set":
+                batch.set(ref, data)
+            else:
+                batch.delete(ref)
+            pending += 1
+            next_is_delete = index + 1 < len(writes) and writes[index + 1][0] == "delete"
+            if pending >= BATCH_WRITE_LIMIT - 1 and not next_is_delete:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        if pending:
+            batch.commit()
+    return counts
+
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv[1:]
+    for name in ("doctor_credentials", "admin_credentials"):
+        result = migrate_collection(name, dry_run=dry_run)
+        summary = ", ".join(f"{k}={v}" for k, v in result.items())
+        print(f"{'🔎' if dry_run else '✅'}  {name}: {summary}")
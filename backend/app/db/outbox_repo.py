@@ -0,0 +1,217 @@
+"""
+outbox_repo.py — Firestore operations for the email_outbox collection.
+
+Each document is one outgoing email, or a ``kind: "bulk"`` job holding a
+list of messages (e.g. an emergency reschedule fan-out) that the
+dispatcher sends over one SMTP session. Lifecycle:
+
+    pending ──claim──▶ sending ──▶ sent
+       ▲                  │
+       └──── retry ◀──────┴──▶ failed (attempts exhausted)
+
+A claim is a transaction that flips ``pending`` to ``sending`` and sets a
+lease, so several gunicorn workers can drain the queue without sending a
+message twice. A ``sending`` message whose lease expired (worker crashed
+mid-send) is claimable again.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from app.db import firebase
+from app.db.firebase import db, transactional
+
+COLLECTION = "email_outbox"
+
+
+def enqueue_email(to: str, subject: str, html: str, provider: str,
+                  max_attempts: int) -> str:
+    """Persist a pending email. Returns the outbox document ID."""
+    now = datetime.now(tz=timezone.utc)
+    doc_ref = db.collection(COLLECTION).document()
+    doc_ref.set({
+        "to": to,
+        "subject": subject,
+        "html": html,
+        "provider": provider,
+        "status": "pending",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now,
+        "last_error": None,
+    })
+    return doc_ref.id
+
+
+def enqueue_bulk_emails(chunks: list, provider: str, max_attempts: int) -> list:
+    """
+    Persist bulk jobs, one per chunk of ``[(to, subject, html), ...]``,
+    in a single batched write. Returns the outbox document IDs.
+    """
+    now = datetime.now(tz=timezone.utc)
+    batch = db.batch()
+    ids = []
+    for chunk in chunks:
+        doc_ref = db.collection(COLLECTION).document()
+        batch.set(doc_ref, {
+            "kind": "bulk",
+            "messages": [
+                {"to": to, "subject": subject, "html": html}
+                for to, subject, html in chunk
+            ],
+            "to": f"{len(chunk)} recipients",
+            "subject": chunk[0][1],
+            "provider": provider,
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "next_attempt_at": now,
+            "created_at": now,
+            "updated_at": now,
+            "last_error": None,
+        })
+        ids.append(doc_ref.id)
+    batch.commit()
+    return ids
+
+
+@transactional
+def _claim_in_transaction(transaction, doc_ref, lease_until, now):
+    snapshot = doc_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        return None
+    data = snapshot.to_dict()
+    due = data["status"] == "pending" and data["next_attempt_at"] <= now
+    lease_expired = (
+        data["status"] == "sending"
+        and data.get("lease_until") is not None
+        and data["lease_until"] <= now
+    )
+    if not (due or lease_expired):
+        return None  # another worker got there first
+    transaction.update(doc_ref, {
+        "status": "sending",
+        "lease_until": lease_until,
+        "updated_at": now,
+    })
+    return {**data, "id": snapshot.id}
+
+
+def claim_due_emails(limit: int, lease_seconds: int) -> list:
+    """
+    Claim up to ``limit`` messages that are due for (re)delivery.
+    Returns the claimed messages as dicts with 'id'.
+    """
+    now = datetime.now(tz=timezone.utc)
+    lease_until = now + timedelta(seconds=lease_seconds)
+
+    due = list(
+        db.collection(COLLECTION)
+        .where("status", "==", "pending")
+        .where("next_attempt_at", "<=", now)
+        .order_by("next_attempt_at")
+        .limit(limit)
+        .stream()
+    )
+    if len(due) < limit:
+        due += list(
+            db.collection(COLLECTION)
+            .where("status", "==", "sending")
+            .where("lease_until", "<=", now)
+            .limit(limit - len(due))
+            .stream()
+        )
+
+    claimed = []
+    for doc in due:
+        message = _claim_in_transaction(
+            db.transaction(), doc.reference, lease_until, now
+        )
+        if message:
+            claimed.append(message)
+    return claimed
+
+
+def mark_email_sent(message_id: str):
+    """Mark a message delivered and drop its body (may hold temp passwords)."""
+    now = datetime.now(tz=timezone.utc)
+    db.collection(COLLECTION).document(message_id).update({
+        "status": "sent",
+        "sent_at": now,
+        "updated_at": now,
+        "lease_until": firebase.DELETE_FIELD,
+        "html": firebase.DELETE_FIELD,
+        "messages": firebase.DELETE_FIELD,
+    })
+
+
+def mark_email_skipped(message_id: str, reason: str):
+    """
+    Mark a message that will never be sent (e.g. SMTP not configured) and
+    drop its body, like mark_email_sent.
+    """
+    db.collection(COLLECTION).document(message_id).update({
+        "status": "skipped",
+        "last_error": reason,
+        "updated_at": datetime.now(tz=timezone.utc),
+        "lease_until": firebase.DELETE_FIELD,
+        "html": firebase.DELETE_FIELD,
+        "messages": firebase.DELETE_FIELD,
+    })
+
+
+def mark_email_retry(message_id: str, attempts: int, next_attempt_at, error: str,
+                     messages: list = None):
+    """
+    Return a message to the queue after a failed attempt. For bulk jobs,
+    ``messages`` narrows the job to the recipients that still failed.
+    """
+    update = {
+        "status": "pending",
+        "attempts": attempts,
+        "next_attempt_at": next_attempt_at,
+        "last_error": error,
+        "updated_at": datetime.now(tz=timezone.utc),
+        "lease_until": firebase.DELETE_FIELD,
+    }
+    if messages is not None:
+        update["messages"] = messages
+        update["to"] = f"{len(messages)} recipients"
+    db.collection(COLLECTION).document(message_id).update(update)
+
+
+def mark_email_failed(message_id: str, attempts: int, error: str):
+    """
+    Park a message whose attempts are exhausted. Nothing requeues it, so
+    its body is dropped too, like mark_email_sent.
+    """
+    db.collection(COLLECTION).document(message_id).update({
+        "status": "failed",
+        "attempts": attempts,
+        "last_error": error,
+        "updated_at": datetime.now(tz=timezone.utc),
+        "lease_until": firebase.DELETE_FIELD,
+        "html": firebase.DELETE_FIELD,
+        "messages": firebase.DELETE_FIELD,
+    })
+
+
+def list_emails(status: str = None, limit: int = 50) -> list:
+    """Return outbox messages (newest first) without their HTML bodies."""
+    query = db.collection(COLLECTION)
+    if status:
+        query = query.where("status", "==", status)
+    docs = query.order_by("created_at", direction="DESCENDING").limit(limit).stream()
+    result = []
+    for doc in docs:
+        d = doc.to_dict()
+        d.pop("html", None)
+        if "messages" in d:
+            d["recipients"] = [m["to"] for m in d.pop("messages")]
+        d["id"] = doc.id
+        for key in ("created_at", "updated_at", "next_attempt_at", "sent_at", "lease_until"):
+            if key in d and hasattr(d[key], "isoformat"):
+                d[key] = d[key].isoformat()
+        result.append(d)
+    return result
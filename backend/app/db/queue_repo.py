@@ -0,0 +1,26 @@
+"""
+queue_repo.py — Firestore storage for per-doctor patient queues.
+
+One ``doctor_queues/{doctor_id}`` document per doctor holds its
+DoctorQueue (see app.services.doctor_queue). It is only written inside
+transactions that also touch the doctor or the appointment, so the
+queue always agrees with ``current_appointments`` and appointment status.
+"""
+
+from app.db.firebase import db
+from app.services.doctor_queue import DoctorQueue
+
+QUEUE_COLLECTION = "doctor_queues"
+
+
+def queue_ref(doctor_id: str):
+    return db.collection(QUEUE_COLLECTION).document(doctor_id)
+
+
+def get_queue(doctor_id: str) -> DoctorQueue:
+    return DoctorQueue.from_doc(queue_ref(doctor_id).get().to_dict())
+
+
+def read_queue(transaction, doctor_id: str) -> DoctorQueue:
+    """Load the queue as part of ``transaction`` (a read, so before any write)."""
+    return DoctorQueue.from_doc(queue_ref(doctor_id).get(transaction=transaction).to_dict())
@@ -0,0 +1,24 @@
+"""
+reconcile_stats.py — Rebuild the /api/admin/stats counters from a full scan.
+
+Run from the backend directory (ideally while intake is quiet):
+    python -m app.db.reconcile_stats
+"""
+
+import os
+import sys
+
+# Add backend dir to path so `app.` imports work when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db.stats_repo import reconcile_stats
+
+
+if __name__ == "__main__":
+    totals = reconcile_stats()
+    print("✅  Stats counters rebuilt:")
+    for name, value in totals.items():
+        print(f"   {name:<26}{value}")
@@ -1,11 +1,208 @@
-from app.db.firebase import db
-from datetime import datetime
+"""
+resource_repo.py — Bed capacity & occupancy (ICU / ward).
+
+``resources/hospital_resources`` holds the configured totals
+(``icu_total``, ``ward_total``). Occupancy lives in sharded counters at
+``resources/hospital_resources/bed_shards/{0..N-1}``; each shard owns a
+slice of the capacity:
+
+    {icu_capacity, icu_occupied, ward_capacity, ward_occupied}
+
+An admission claims a bed from one shard in a transaction (capacity
+check + increment on that shard only), starting at a random shard and
+probing the others when it is full, so concurrent admissions spread
+over N documents instead of serialising on one. A discharge decrements
+the shard recorded on the appointment. Reading current occupancy sums
+the N shards.
+
+Shards are created from the totals (and the legacy ``icu_occupied`` /
+``ward_occupied`` fields) on first use, or explicitly with
+``python -m app.db.init_bed_shards``.
+"""
+
+import os
+import random
+import threading
+from datetime import datetime, timezone
+
+from app.db.firebase import db, transactional
+
+BED_SHARDS = int(os.environ.get("BED_COUNTER_SHARDS", "10"))
+
+BED_TYPES = {"ICU": "icu", "WARD": "ward"}
+
+_init_lock = threading.Lock()
+
+
+class BedShardsMissing(Exception):
+    """The bed shards have not been initialised yet."""
+
+
+def _resources_ref():
+    return db.collection("resources").document("hospital_resources")
+
+
+def _shards():
+    return _resources_ref().collection("bed_shards")
 
 
 def get_resources():
-    doc = db.collection("resources").document("hospital_resources").get()
+    doc = _resources_ref().get()
     return doc.to_dict()
 
 
-def update_resources(data: dict):
-    db.collection("resources").document("hospital_resources").update(data)
\ No newline at end of file
+def _split(total: int, index: int, shards: int) -> int:
+    return total // shards + (1 if index < total % shards else 0)
+
+
+def init_bed_shards() -> dict:
+    """
+    (Re)build the shards from the configured totals, preserving current
+    occupancy: the sum over existing shards, or the legacy counters on
+    ``hospital_resources`` when no shards exist yet. Run while admissions
+    are quiet — allocations committed during the rebuild may be lost.
+    Returns the resulting totals.
+    """
+    resources = get_resources() or {}
+    existing = list(_shards().stream())
+    if existing:
+        occupied = {
+            prefix: sum(doc.to_dict().get(f"{prefix}_occupied", 0) for doc in existing)
+            for prefix in BED_TYPES.values()
+        }
+    else:
+        occupied = {prefix: resources.get(f"{prefix}_occupied", 0) for prefix in BED_TYPES.values()}
+
+    batch = db.batch()
+    remaining = dict(occupied)
+    for index in range(BED_SHARDS):
+        values = {}
+        for prefix in BED_TYPES.values():
+            capacity = _split(resources.get(f"{prefix}_total", 0), index, BED_SHARDS)
+            # Fill shards in order; any overflow (totals shrunk below
+            # occupancy) lands on the last shard.
+            taken = remaining[prefix] if index == BED_SHARDS - 1 else min(capacity, remaining[prefix])
+            remaining[prefix] -= taken
+            values[f"{prefix}_capacity"] = capacity
+            values[f"{prefix}_occupied"] = taken
+        batch.set(_shards().document(str(index)), values)
+    for doc in existing:
+        if not doc.id.isdigit() or int(doc.id) >= BED_SHARDS:
+            batch.delete(doc.reference)
+    batch.commit()
+
+    return {
+        **{f"{prefix}_total": resources.get(f"{prefix}_total", 0) for prefix in BED_TYPES.values()},
+        **{f"{prefix}_occupied": occupied[prefix] for prefix in BED_TYPES.values()},
+    }
+
+
+def _ensure_shards():
+    with _init_lock:
+        if not _shards().document("0").get().exists:
+            init_bed_shards()
+
+
+@transactional
+def _claim_in_transaction(transaction, shard_ref, prefix):
+    snapshot = shard_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        raise BedShardsMissing(shard_ref.id)
+    data = snapshot.to_dict()
+    occupied = data.get(f"{prefix}_occupied", 0)
+    if occupied >= data.get(f"{prefix}_capacity", 0):
+        return False
+    transaction.update(shard_ref, {
+        f"{prefix}_occupied": occupied + 1,
+        "last_updated": datetime.now(tz=timezone.utc),
+    })
+    return True
+
+
+def claim_bed(bed_type: str):
+    """
+    Occupy one bed of ``bed_type`` ("ICU" / "WARD"). Returns the shard
+    index the bed was taken from, or None if every shard is full.
+    """
+    prefix = BED_TYPES[bed_type]
+    start = random.randrange(BED_SHARDS)
+    for attempt in range(2):
+        try:
+            for offset in range(BED_SHARDS):
+                index = (start + offset) % BED_SHARDS
+                shard_ref = _shards().document(str(index))
+                try:
+                    claimed = _claim_in_transaction(
+                        db.transaction(max_attempts=3), shard_ref, prefix
+                    )
+                except ValueError:  # shard stayed contended — try the next one
+                    continue
+                if claimed:
+                    return index
+            return None
+        except BedShardsMissing:
+            if attempt:
+                raise
+            _ensure_shards()
+
+
+@transactional
+def _release_in_transaction(transaction, appointment_ref):
+    snapshot = appointment_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        return "not_found"
+    appointment = snapshot.to_dict()
+    if appointment.get("status") == "discharged":
+        return "already_discharged"
+
+    prefix = BED_TYPES.get(appointment.get("bed_type"))
+    target = None
+    if prefix:
+        # Prefer the recorded shard; legacy appointments (no bed_shard) and
+        # shards emptied by a rebuild fall back to any occupied shard.
+        recorded = appointment.get("bed_shard")
+        order = sorted(range(BED_SHARDS), key=lambda i: i != recorded)
+        for index in order:
+            ref = _shards().document(str(index))
+            shard = ref.get(transaction=transaction)
+            occupied = (shard.to_dict() or {}).get(f"{prefix}_occupied", 0)
+            if occupied > 0:
+                target = (ref, occupied)
+                break
+
+    now = datetime.now(tz=timezone.utc)
+    if target is not None:
+        transaction.update(target[0], {
+            f"{prefix}_occupied": target[1] - 1,
+            "last_updated": now,
+        })
+    transaction.update(appointment_ref, {"status": "discharged", "discharged_at": now})
+    return "released" if target is not None else "discharged"
+
+
+def release_bed(appointment_id: str) -> str:
+    """
+    Discharge an appointment and free its bed in one transaction, so a
+    bed can't be released twice. Returns "released", "discharged" (no
+    bed to free), "already_discharged" or "not_found".
+    """
+    appointment_ref = db.collection("appointments").document(appointment_id)
+    return _release_in_transaction(db.transaction(), appointment_ref)
+
+
+def get_bed_occupancy() -> dict:
+    """Current totals summed over the shards (one query, N small documents)."""
+    docs = list(_shards().stream())
+    if not docs:
+        with _init_lock:
+            return init_bed_shards()
+    totals = {}
+    for prefix in BED_TYPES.values():
+        totals[f"{prefix}_total"] = 0
+        totals[f"{prefix}_occupied"] = 0
+    for doc in docs:
+        data = doc.to_dict()
+        for prefix in BED_TYPES.values():
+            totals[f"{prefix}_total"] += data.get(f"{prefix}_capacity", 0)
+            totals[f"{prefix}_occupied"] += data.get(f"{prefix}_occupied", 0)
+    return totals
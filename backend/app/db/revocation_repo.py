@@ -0,0 +1,109 @@
+"""
+revocation_repo.py — Revoked JWTs, shared by every worker through Firestore.
+
+Logging out writes ``revoked_tokens/{jti}`` with the token's expiry.
+Each worker mirrors the collection into an in-process dict with an
+``on_snapshot`` listener, so ``is_revoked`` is an O(1) membership test
+on every authenticated request. A revocation is visible in the
+revoking worker immediately and in the others once the listener
+delivers it (typically well under a second).
+
+Until the first snapshot has arrived (or when the list was never
+started, e.g. in scripts) ``is_revoked`` reads the document directly.
+
+Entries are useless once the token has expired: they are dropped from
+memory lazily, and a Firestore TTL policy on ``expires_at`` deletes the
+documents.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.db.firebase import db
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TIMEOUT_SECONDS = float(os.environ.get("REVOCATION_WARMUP_SECONDS", "10"))
+
+
+def _epoch(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value or 0)
+
+
+class RevocationList:
+    """Thread-safe set of revoked token IDs (``jti`` → expiry epoch)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked: dict = {}
+        self._next_prune = 0.0
+        self._ready = threading.Event()
+        self._watch = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self, timeout: float = WARMUP_TIMEOUT_SECONDS) -> bool:
+        """Subscribe to ``revoked_tokens`` and wait for the initial snapshot."""
+        if self._watch is None:
+            self._watch = db.collection("revoked_tokens").on_snapshot(self._on_snapshot)
+        if not self._ready.wait(timeout):
+            logger.warning("Revocation list not warm after %.0fs; reading Firestore until it is", timeout)
+        return self.ready
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self._ready.clear()
+        with self._lock:
+            self._revoked.clear()
+
+    def _on_snapshot(self, docs, changes, read_time):
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    self._revoked.pop(doc.id, None)
+                else:
+                    self._revoked[doc.id] = _epoch((doc.to_dict() or {}).get("expires_at"))
+            self._prune(time.time())
+        self._ready.set()
+
+    def _prune(self, now: float):
+        """Drop expired entries, at most once a minute (caller holds the lock)."""
+        if now < self._next_prune:
+            return
+        self._next_prune = now + 60
+        for jti in [jti for jti, expires in self._revoked.items() if expires <= now]:
+            del self._revoked[jti]
+
+    # -- reads / writes --------------------------------------------------------
+
+    def is_revoked(self, jti: str) -> bool:
+        if not jti:
+            return False
+        if self.ready:
+            return jti in self._revoked
+        return db.collection("revoked_tokens").document(jti).get().exists
+
+    def revoke(self, jti: str, expires_at: datetime, subject: str = ""):
+        """Revoke token ``jti`` for every worker until it expires."""
+        db.collection("revoked_tokens").document(jti).set({
+            "expires_at": expires_at,
+            "revoked_at": datetime.now(tz=timezone.utc),
+            "sub": subject,
+        })
+        with self._lock:
+            self._revoked[jti] = _epoch(expires_at)
+
+
+revocations = RevocationList()
@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 from dotenv import load_dotenv
 load_dotenv()
 
+from app.db.admin_repo import create_admin
 from app.db.firebase import db
 from app.utils.password_utils import hash_password
 
@@ -33,15 +34,7 @@ def seed():
     admin_email = os.environ.get("ADMIN_EMAIL", "admin@aarogyalekha.com")
     admin_password = os.environ.get("ADMIN_PASSWORD", "admin123")
 
-    doc_ref = db.collection("admin_credentials").document()
-    doc_ref.set(
-        {
-            "username": "admin",
-            "email": admin_email,
-            "password_hash": hash_password(admin_password),
-            "role": "admin",
-        }
-    )
+    create_admin("admin", admin_email, hash_password(admin_password))
     print(f"✅  Default admin created  (username=admin, email={admin_email})")
     print("   You can now log in at /admin/login")
 
@@ -0,0 +1,113 @@
+"""
+stats_repo.py — Sharded counters backing /api/admin/stats.
+
+The aggregate lives in ``stats/hospital/shards/{0..N-1}``. Writers add
+``Increment`` deltas to one randomly chosen shard inside the same batch
+that writes the appointment / doctor, so the counters stay exact and
+concurrent intake never contends on a single document (Firestore
+sustains roughly one write per second per document). Readers sum the N
+shards — a constant-size read no matter how many appointments exist.
+
+Counters:
+    total_appointments, emergency_cases, rescheduled_appointments,
+    total_doctors, capacity_doctors (doctors with daily_capacity > 0),
+    workload_sum (sum of workload % over capacity_doctors)
+"""
+
+import os
+import random
+
+from app.db import firebase
+from app.db.firebase import db
+
+STATS_SHARDS = int(os.environ.get("STATS_COUNTER_SHARDS", "10"))
+
+COUNTER_FIELDS = (
+    "total_appointments",
+    "emergency_cases",
+    "rescheduled_appointments",
+    "total_doctors",
+    "capacity_doctors",
+    "workload_sum",
+)
+
+
+def _shards():
+    return db.collection("stats").document("hospital").collection("shards")
+
+
+def add_stats_increments(writer, **deltas):
+    """
+    Stage counter deltas on a random shard within ``writer`` (a write
+    batch or transaction). Zero deltas are dropped.
+    """
+    fields = {name: firebase.Increment(value) for name, value in deltas.items() if value}
+    if not fields:
+        return
+    shard = _shards().document(str(random.randrange(STATS_SHARDS)))
+    writer.set(shard, fields, merge=True)
+
+
+def increment_stats(**deltas):
+    """Apply counter deltas in their own write."""
+    batch = db.batch()
+    add_stats_increments(batch, **deltas)
+    batch.commit()
+
+
+def get_stats():
+    """
+    Sum all shards. Returns a dict of COUNTER_FIELDS, or None if the
+    counters have never been reconciled — increments alone don't count,
+    since they only cover writes made after the counters were deployed.
+    """
+    totals = dict.fromkeys(COUNTER_FIELDS, 0)
+    initialised = False
+    for doc in _shards().stream():
+        data = doc.to_dict()
+        initialised = initialised or bool(data.get("initialised"))
+        for name in COUNTER_FIELDS:
+            totals[name] += data.get(name, 0)
+    return totals if initialised else None
+
+
+def reconcile_stats() -> dict:
+    """
+    Rebuild the counters from a full scan of doctors and appointments.
+
+    Writes the totals to shard 0 and zeroes the others in one batch.
+    Increments committed while the scan runs may be lost, so run it when
+    intake is quiet (or right after deploying the counters).
+    """
+    totals = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    for doc in db.collection("doctors").stream():
+        d = doc.to_dict()
+        totals["total_doctors"] += 1
+        capacity = d.get("daily_capacity", 0)
+        if capacity > 0:
+            totals["capacity_doctors"] += 1
+            totals["workload_sum"] += d.get("current_appointments", 0) / capacity * 100
+
+    query = db.collection("appointments").select(["emergency", "status"])
+    for doc in query.stream():
+        d = doc.to_dict()
+        totals["total_appointments"] += 1
+        if d.get("emergency") == 1:
+            totals["emergency_cases"] += 1
+        if d.get("status") == "rescheduled":
+            totals["rescheduled_appointments"] += 1
+
+    batch = db.batch()
+    for index in range(STATS_SHARDS):
+        if index == 0:
+            values = {**totals, "initialised": True}
+        else:
+            values = dict.fromkeys(COUNTER_FIELDS, 0)
+        batch.set(_shards().document(str(index)), values)
+    # Drop shards left over from a larger STATS_COUNTER_SHARDS setting.
+    for doc in _shards().stream():
+        if not doc.id.isdigit() or int(doc.id) >= STATS_SHARDS:
+            batch.delete(doc.reference)
+    batch.commit()
+    return totals
@@ -5,62 +5,167 @@ Run with:
     uvicorn app.main:app --reload
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import os
 import uuid
+import asyncio
 import string
 import random
 import logging
-from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.services.resource_service import allocate_bed
+from app.services.resource_service import (
+    allocate_bed_async,
+    unallocate_bed_async,
+    discharge_patient_async,
+)
 from app.services.triage_service import compute_emergency
-from app.services.doctor_service import assign_doctor, calculate_workload
-from app.services.wait_time_service import calculate_wait_time
+from app.services.doctor_service import (
+    assign_doctor_async,
+    calculate_workload,
+    preempt_doctor_async,
+    release_doctor,
+)
+from app.services.wait_time_service import MIN_SAMPLES as CONSULTATION_MIN_SAMPLES, estimate_wait_time
 from app.services.severity_service import calculate_severity
+from app.services.symptom_matcher import SymptomMatch, match_symptoms
 from app.services.email_service import (
     send_scheduling_email,
-    send_rescheduling_email,
+    send_rescheduling_emails,
     send_password_reset_email,
 )
-
-from app.db.appointment_repo import (
-    create_appointment,
-    get_all_appointments,
-    get_appointments_by_doctor,
-    get_scheduled_appointments_for_doctor_today,
-    reschedule_appointment,
-)
+from app.services.export_service import iter_ndjson, iter_csv, iter_gzip
+from app.services.email_outbox import start_dispatcher, stop_dispatcher
+from app.services.smtp_pool import close_pool
+
+from app.db.appointment_repo import stream_appointments
+from app.db.aio import appointment_repo as async_appointments
+from app.db.aio import doctor_repo as async_doctors
+from app.db.aio import idempotency_repo
+from app.db.aio import resource_repo as async_resources
 from app.db.doctor_repo import (
     get_all_doctors,
     get_doctor_by_id,
     create_doctor,
-    create_doctor_credentials,
     get_doctor_credentials_by_email,
     update_doctor_password,
 )
-from app.db.admin_repo import (
-    get_admin_by_username,
-    get_admin_by_email,
-    update_admin_password,
+from app.db.doctor_roster import roster
+from app.db.revocation_repo import revocations
+from app.db.consultation_repo import (
+    ConsultationError,
+    complete_consultation,
+    get_department_stats,
+    start_consultation,
+    start_next_consultation,
 )
-
-from app.utils.password_utils import hash_password, verify_password
-from app.utils.jwt_utils import create_token, get_current_user
+from app.db.queue_repo import get_queue
+from app.db.calendar_repo import get_calendar
+from app.services.slot_calendar import calendar_view, local_now
+from app.db.credentials_repo import DOCTOR_LOGIN_FIELDS, find_credentials
+from app.db import firebase
+from app.db.outbox_repo import list_emails
+from app.db.stats_repo import get_stats, reconcile_stats
+from app.db.admin_repo import get_admin_by_username, update_admin_password
+
+from app.utils.password_utils import (
+    PasswordPoolBusy,
+    hash_password_async,
+    verify_password_async,
+    start_password_pool,
+    stop_password_pool,
+)
+from app.utils.jwt_utils import (
+    bearer_token,
+    create_token,
+    get_current_user,
+    require_admin,
+    require_doctor,
+    revoke_token,
+)
+from app.utils.metrics import MetricsMiddleware, render_metrics, stage_timer
+from app.utils.cache import SingleFlightCache
 
 logger = logging.getLogger(__name__)
 
+# Hot read endpoints: concurrent requests share one Firestore read, and the
+# result is reused for READ_CACHE_TTL_SECONDS. Writes invalidate this
+# worker's copy; other workers see the change once their TTL expires.
+doctors_cache = SingleFlightCache("doctors")
+stats_cache = SingleFlightCache("admin_stats")
+# Department consultation estimates, read only for doctors with too few
+# completed consultations of their own.
+consultation_cache = SingleFlightCache("department_consultations")
+
+
+def _invalidate_read_caches():
+    doctors_cache.invalidate()
+    stats_cache.invalidate()
+
 # ---------------------------------------------------------------------------
 # App initialisation
 # ---------------------------------------------------------------------------
+# DB_WARMUP=0 skips the priming reads (the first request then opens the
+# Firestore channels itself).
+DB_WARMUP = os.getenv("DB_WARMUP", "1") != "0"
+
+
+def _start_background_workers():
+    firebase.init_clients()
+    if DB_WARMUP:
+        firebase.warm_up()
+    roster.start()
+    revocations.start()
+    start_dispatcher()
+    start_password_pool()
+
+
+def _stop_background_workers():
+    stop_dispatcher()
+    close_pool()
+    stop_password_pool()
+    revocations.stop()
+    roster.stop()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Everything a request needs is connected before the worker reports
+    # ready, so the first booking doesn't pay for the TLS handshake, auth
+    # token fetch and listener snapshots.
+    imported = time.perf_counter()
+    startup = [run_in_threadpool(_start_background_workers)]
+    if DB_WARMUP:
+        # Connects alongside the sync startup; the async channel is bound
+        # to this event loop, so it can't be opened from the threadpool.
+        startup.append(firebase.warm_up_async())
+    await asyncio.gather(*startup)
+    ready = time.perf_counter()
+    logger.info(
+        "Worker ready in %.2fs (import %.2fs, warm-up %.2fs)",
+        ready - _IMPORT_STARTED, imported - _IMPORT_STARTED, ready - imported,
+    )
+    try:
+        yield
+    finally:
+        await run_in_threadpool(_stop_background_workers)
+
+
 app = FastAPI(
     title="AarogyaLekha — Hospital Coordination System",
     version="3.0.0",
+    lifespan=lifespan,
 )
 
 # CORS — allow the Vite dev server
@@ -70,30 +175,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Idempotent-Replayed", "Retry-After"],
 )
 
-# ---------------------------------------------------------------------------
-# Keyword lists for symptom parsing
-# ---------------------------------------------------------------------------
-SEVERE_KEYWORDS = [
-    "chest pain", "breathlessness", "unconscious", "seizure", "stroke",
-    "heart attack", "severe bleeding", "paralysis", "trauma", "cardiac arrest",
-    "difficulty breathing", "shortness of breath", "fainting", "collapse",
-]
+# Request counters / latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
 
-MODERATE_KEYWORDS = [
-    "fever", "vomiting", "dizziness", "headache", "nausea", "pain",
-    "swelling", "cough", "fatigue", "weakness", "infection", "fracture",
-    "sprain", "diarrhea", "abdominal pain",
-]
+@app.exception_handler(PasswordPoolBusy)
+async def _password_pool_busy(_request, _exc):
+    # Login storm: shed load instead of queueing bcrypt work without bound.
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-ins in progress, please retry"},
+        headers={"Retry-After": "1"},
+    )
 
 
-def parse_symptoms(symptoms_text: str) -> dict:
+# ---------------------------------------------------------------------------
+# Symptom parsing
+# ---------------------------------------------------------------------------
+def parse_symptoms(symptoms_text: str, match: SymptomMatch = None) -> dict:
     """Convert free-text symptoms into boolean flags for the triage engine."""
-    lower = symptoms_text.lower()
+    match = match or match_symptoms(symptoms_text)
     return {
-        "severe_symptoms": any(kw in lower for kw in SEVERE_KEYWORDS),
-        "moderate_symptoms": any(kw in lower for kw in MODERATE_KEYWORDS),
+        "severe_symptoms": match.severe,
+        "moderate_symptoms": match.moderate,
     }
 
 
@@ -106,6 +213,22 @@ def _generate_temp_password(length: int = 12) -> str:
     return "".join(random.SystemRandom().choice(chars) for _ in range(length))
 
 
+MAX_PAGE_SIZE = 500
+
+
+async def _appointments_page(doctor_id, limit, cursor, fields):
+    """Shared handler for the paginated appointment list endpoints."""
+    limit = max(1, min(limit or 50, MAX_PAGE_SIZE))
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        items, next_cursor = await async_appointments.get_appointments_page(
+            doctor_id=doctor_id, limit=limit, cursor=cursor, fields=field_list
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": items, "next_cursor": next_cursor}
+
+
 # ---------------------------------------------------------------------------
 # Routes — Health check
 # ---------------------------------------------------------------------------
@@ -114,19 +237,26 @@ def root():
     return {"message": "AarogyaLekha Backend Running 🚀"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (aggregated across gunicorn workers)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # AUTH — Admin Login (Feature 11)
 # ═══════════════════════════════════════════════════════════════════════════
 @app.post("/api/admin/login")
-def admin_login(credentials: dict):
+async def admin_login(credentials: dict):
     username = credentials.get("username", "").strip()
     password = credentials.get("password", "")
 
     if not username or not password:
         raise HTTPException(status_code=400, detail="Username and password are required")
 
-    admin = get_admin_by_username(username)
-    if not admin or not verify_password(password, admin["password_hash"]):
+    admin = await run_in_threadpool(get_admin_by_username, username)
+    if not admin or not await verify_password_async(password, admin["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_token({
@@ -151,18 +281,26 @@ def admin_login(credentials: dict):
 # AUTH — Doctor Login (Feature 2)
 # ═══════════════════════════════════════════════════════════════════════════
 @app.post("/api/doctor/login")
-def doctor_login(credentials: dict):
+async def doctor_login(credentials: dict):
     email = credentials.get("email", "").strip()
     password = credentials.get("password", "")
 
     if not email or not password:
         raise HTTPException(status_code=400, detail="Email and password are required")
 
-    creds = get_doctor_credentials_by_email(email)
-    if not creds or not verify_password(password, creds["password_hash"]):
+    creds = await run_in_threadpool(get_doctor_credentials_by_email, email)
+    if not creds or not await verify_password_async(password, creds["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    doctor = get_doctor_by_id(creds["doctor_id"])
+    # The credentials document carries the profile fields the response
+    # needs. A warm roster has fresher values at no cost; legacy documents
+    # without the copy fall back to reading the profile. The live
+    # appointment count isn't copied (it changes with every booking), so
+    # it isn't returned here: the dashboard reads it from the profile.
+    if roster.ready or not all(field in creds for field in DOCTOR_LOGIN_FIELDS):
+        doctor = await async_doctors.get_doctor_by_id(creds["doctor_id"])
+    else:
+        doctor = {**creds, "id": creds["doctor_id"]}
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor profile not found")
 
@@ -181,7 +319,6 @@ def doctor_login(credentials: dict):
             "email": email,
             "department": doctor.get("department", ""),
             "daily_capacity": doctor.get("daily_capacity", 0),
-            "current_appointments": doctor.get("current_appointments", 0),
             "is_available": doctor.get("is_available", True),
         },
     }
@@ -191,36 +328,41 @@ def doctor_login(credentials: dict):
 # AUTH — Password Reset (Feature 7)
 # ═══════════════════════════════════════════════════════════════════════════
 @app.post("/api/auth/reset-password")
-def reset_password(body: dict):
+async def reset_password(body: dict):
     email = body.get("email", "").strip()
     if not email:
         raise HTTPException(status_code=400, detail="Email is required")
 
-    temp = _generate_temp_password()
-    hashed = hash_password(temp)
+    # Doctor and admin credentials in one read (a doctor account wins)
+    kind, creds = await run_in_threadpool(find_credentials, email)
+    if creds is None:
+        raise HTTPException(status_code=404, detail="No account found with that email")
 
-    # Try doctor_credentials first
-    creds = get_doctor_credentials_by_email(email)
-    if creds:
-        update_doctor_password(email, hashed)
-        send_password_reset_email(email, temp)
-        return {"success": True, "message": "Temporary password sent to your email"}
+    temp = _generate_temp_password()
+    hashed = await hash_password_async(temp)
+    if kind == "doctor":
+        await run_in_threadpool(update_doctor_password, creds["id"], hashed)
+    else:
+        await run_in_threadpool(update_admin_password, creds["id"], hashed)
+    await run_in_threadpool(send_password_reset_email, email, temp)
+    return {"success": True, "message": "Temporary password sent to your email"}
 
-    # Try admin_credentials
-    admin = get_admin_by_email(email)
-    if admin:
-        update_admin_password(admin["id"], hashed)
-        send_password_reset_email(email, temp)
-        return {"success": True, "message": "Temporary password sent to your email"}
 
-    raise HTTPException(status_code=404, detail="No account found with that email")
+# ═══════════════════════════════════════════════════════════════════════════
+# AUTH — Logout
+# ═══════════════════════════════════════════════════════════════════════════
+@app.post("/api/auth/logout")
+def logout(request: Request, user: dict = Depends(get_current_user)):
+    """Revoke the caller's token in every worker until it would have expired."""
+    revoke_token(bearer_token(request), user)
+    return {"success": True}
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # ADMIN — Register Doctor (Feature 3)
 # ═══════════════════════════════════════════════════════════════════════════
 @app.post("/api/admin/register-doctor")
-def register_doctor(body: dict, _user: dict = Depends(get_current_user)):
+async def register_doctor(body: dict, _user: dict = Depends(require_admin)):
     """Register a new doctor. Admin-only (requires JWT)."""
     required = ["name", "email", "department", "daily_capacity", "password"]
     for field in required:
@@ -228,7 +370,7 @@ def register_doctor(body: dict, _user: dict = Depends(get_current_user)):
             raise HTTPException(status_code=400, detail=f"'{field}' is required")
 
     # Check if email already registered
-    if get_doctor_credentials_by_email(body["email"]):
+    if await run_in_threadpool(get_doctor_credentials_by_email, body["email"]):
         raise HTTPException(status_code=409, detail="A doctor with this email already exists")
 
     # Create doctor profile
@@ -239,21 +381,89 @@ def register_doctor(body: dict, _user: dict = Depends(get_current_user)):
         "is_available": True,
         "current_appointments": 0,
     }
-    doctor_id = create_doctor(doctor_data)
+    pw_hash = await hash_password_async(body["password"])
 
-    # Create credentials
-    pw_hash = hash_password(body["password"])
-    create_doctor_credentials(doctor_id, body["email"], pw_hash)
+    # Profile + credentials in one batch; a concurrent registration of the
+    # same email makes the whole batch fail.
+    try:
+        doctor_id = await run_in_threadpool(create_doctor, doctor_data, body["email"], pw_hash)
+    except firebase.AlreadyExists:
+        raise HTTPException(status_code=409, detail="A doctor with this email already exists")
+    _invalidate_read_caches()
 
     return {"success": True, "doctor_id": doctor_id, "message": "Doctor registered successfully"}
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# ADMIN — Email outbox inspection
+# ═══════════════════════════════════════════════════════════════════════════
+@app.get("/api/admin/email-outbox")
+def email_outbox(status: str = None, limit: int = 50, _user: dict = Depends(require_admin)):
+    """List queued / sent / failed notification emails (newest first)."""
+    if status and status not in ("pending", "sending", "sent", "failed", "skipped"):
+        raise HTTPException(status_code=400, detail=f"Unknown status '{status}'")
+    return list_emails(status=status, limit=max(1, min(limit, 500)))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ADMIN — Streaming appointment export (monthly reporting)
+# ═══════════════════════════════════════════════════════════════════════════
+def _parse_export_bound(value: str, name: str, is_end: bool):
+    """Parse an ISO date/datetime bound; a bare end date includes that whole day."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be an ISO date or datetime")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if is_end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+@app.get("/api/admin/appointments/export")
+def export_appointments(
+    format: str = "ndjson",
+    start: str = None,
+    end: str = None,
+    gzip: bool = False,
+    _user: dict = Depends(require_admin),
+):
+    """
+    Stream appointments as NDJSON or CSV, oldest first, in constant memory.
+    ``start`` is inclusive and ``end`` exclusive (a bare date such as
+    2026-03-31 covers that whole day). ``gzip=true`` compresses on the fly.
+    """
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    start_at = _parse_export_bound(start, "start", is_end=False)
+    end_at = _parse_export_bound(end, "end", is_end=True)
+
+    rows = stream_appointments(start_at, end_at)
+    if format == "csv":
+        body, media_type = iter_csv(rows), "text/csv; charset=utf-8"
+    else:
+        body, media_type = iter_ndjson(rows), "application/x-ndjson"
+
+    filename = f"appointments.{format}"
+    if gzip:
+        body, media_type, filename = iter_gzip(body), "application/gzip", filename + ".gz"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # DOCTOR — Profile & Appointments (Feature 1)
 # ═══════════════════════════════════════════════════════════════════════════
 @app.get("/api/doctor/profile/{doctor_id}")
-def doctor_profile(doctor_id: str, _user: dict = Depends(get_current_user)):
-    doctor = get_doctor_by_id(doctor_id)
+async def doctor_profile(doctor_id: str, _user: dict = Depends(get_current_user)):
+    doctor = await async_doctors.get_doctor_by_id(doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
@@ -265,134 +475,396 @@ def doctor_profile(doctor_id: str, _user: dict = Depends(get_current_user)):
 
 
 @app.get("/api/doctor/appointments/{doctor_id}")
-def doctor_appointments(doctor_id: str, _user: dict = Depends(get_current_user)):
-    return get_appointments_by_doctor(doctor_id)
+async def doctor_appointments(
+    doctor_id: str,
+    limit: int = None,
+    cursor: str = None,
+    fields: str = None,
+    _user: dict = Depends(get_current_user),
+):
+    """
+    Without ``limit``/``cursor`` returns the full list (legacy shape).
+    With them returns ``{"items": [...], "next_cursor": ...}``.
+    """
+    if limit is None and cursor is None:
+        return await async_appointments.get_appointments_by_doctor(doctor_id)
+    return await _appointments_page(doctor_id, limit, cursor, fields)
+
+
+_CONSULTATION_ERRORS = {
+    "not_found": (404, "Appointment not found"),
+    "not_assigned": (403, "Appointment is assigned to another doctor"),
+    "invalid_status": (409, "Appointment is not awaiting this step"),
+    "duration_unknown": (400, "Consultation was never started; send duration_minutes"),
+}
+
+
+def _consultation_http_error(exc: ConsultationError) -> HTTPException:
+    status, detail = _CONSULTATION_ERRORS[exc.reason]
+    return HTTPException(status_code=status, detail=detail)
+
+
+@app.get("/api/doctor/queue")
+def doctor_queue(user: dict = Depends(require_doctor)):
+    """The doctor's waiting patients, most urgent first."""
+    entries = get_queue(user["doctor_id"]).entries()
+    return {"count": len(entries), "queue": entries}
+
+
+@app.get("/api/doctor/calendar")
+def doctor_calendar(date: str = None, user: dict = Depends(require_doctor)):
+    """The doctor's slots for ``date`` (YYYY-MM-DD, default today) as off / free / booked."""
+    day = date or local_now().date().isoformat()
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    doctor = get_doctor_by_id(user["doctor_id"]) or {}
+    slots = calendar_view(doctor, day, get_calendar(user["doctor_id"], day))
+    return {
+        "date": day,
+        "free": sum(1 for s in slots if s["state"] == "free"),
+        "booked": sum(1 for s in slots if s["state"] == "booked"),
+        "slots": slots,
+    }
+
+
+@app.post("/api/doctor/queue/next")
+def next_patient(user: dict = Depends(require_doctor)):
+    """Start the consultation of the most urgent waiting patient."""
+    appointment = start_next_consultation(user["doctor_id"])
+    if appointment is None:
+        raise HTTPException(status_code=404, detail="No patients waiting")
+    return appointment
+
+
+@app.post("/api/doctor/appointments/{appointment_id}/start")
+def start_appointment_consultation(appointment_id: str, user: dict = Depends(require_doctor)):
+    """Mark the patient as being seen (completion is timed from here)."""
+    try:
+        started_at = start_consultation(appointment_id, user["doctor_id"])
+    except ConsultationError as exc:
+        raise _consultation_http_error(exc)
+    return {"success": True, "appointment_id": appointment_id, "started_at": started_at.isoformat()}
+
+
+@app.post("/api/doctor/appointments/{appointment_id}/complete")
+def complete_appointment_consultation(
+    appointment_id: str,
+    body: dict = None,
+    user: dict = Depends(require_doctor),
+):
+    """
+    Close a consultation and feed its duration into the wait-time
+    estimator. Body (optional): ``{"duration_minutes": 12.5}``; without
+    it the duration is measured from /start.
+    """
+    minutes = (body or {}).get("duration_minutes")
+    if minutes is not None and (
+        isinstance(minutes, bool) or not isinstance(minutes, (int, float)) or minutes <= 0
+    ):
+        raise HTTPException(status_code=400, detail="duration_minutes must be a positive number")
+    try:
+        result = complete_consultation(appointment_id, user["doctor_id"], minutes)
+    except ConsultationError as exc:
+        raise _consultation_http_error(exc)
+    consultation_cache.invalidate()
+    return {"success": True, "appointment_id": appointment_id, **result}
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Appointment submission (updated — Features 5, 10)
 # ═══════════════════════════════════════════════════════════════════════════
+async def _timed(stage: str, awaitable):
+    with stage_timer(stage):
+        return await awaitable
+
+
+async def _department_consultation_stats(doctor: dict):
+    """The department's estimate, read only when the doctor's own is too thin."""
+    if (doctor.get("consultation_stats") or {}).get("n", 0) >= CONSULTATION_MIN_SAMPLES:
+        return None
+    department = doctor.get("department", "")
+    return await run_in_threadpool(
+        consultation_cache.get, department, lambda: get_department_stats(department)
+    )
+
+
+_IDEMPOTENCY_SCOPE = "submit_appointment"
+
+
 @app.post("/api/submit-appointment")
-def submit_appointment(patient_data: dict):
+async def submit_appointment(
+    patient_data: dict,
+    response: Response,
+    idempotency_key: str = Header(None),
+):
+    """
+    Book an appointment (see :func:`_submit_appointment`).
+
+    With an ``Idempotency-Key`` header, a retry with the same key and body
+    returns the first attempt's result (``Idempotent-Replayed: true``)
+    without re-running any writes; a retry sent while the first attempt
+    is still running waits for it. Reusing a key with a different body
+    is a 422.
+    """
+    if not idempotency_key:
+        return await _submit_appointment(patient_data)
+    if len(idempotency_key) > idempotency_repo.MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+    body_hash = idempotency_repo.request_hash(patient_data)
+    try:
+        stored = await idempotency_repo.begin(_IDEMPOTENCY_SCOPE, idempotency_key, body_hash)
+    except idempotency_repo.IdempotencyConflict as exc:
+        if exc.reason == "mismatch":
+            raise HTTPException(status_code=422,
+                                detail="Idempotency-Key was already used with a different request")
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still running",
+                            headers={"Retry-After": "1"})
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return stored
+
+    try:
+        result = await _submit_appointment(patient_data)
+    except BaseException:
+        # Nothing is left claimed (_submit_appointment gives back its slot
+        # and bed when it fails), so the retry may run afresh.
+        await idempotency_repo.abandon(_IDEMPOTENCY_SCOPE, idempotency_key)
+        raise
+    try:
+        await idempotency_repo.complete(_IDEMPOTENCY_SCOPE, idempotency_key, result)
+    except Exception as exc:
+        # The booking stands; a retry after the key's lease runs it again.
+        logger.error("Could not store idempotent response for %s: %s", idempotency_key, exc)
+    return result
+
+
+async def _give_back_claims(appointment_id: str, doctor, bed_result):
+    """Undo the doctor slot / queue entry and bed taken for a booking that won't go through."""
+    if doctor and not isinstance(doctor, BaseException):
+        await release_doctor(doctor["id"], appointment_id, doctor.get("slot"))
+    if isinstance(bed_result, dict):
+        await unallocate_bed_async(bed_result)
+
+
+async def _submit_appointment(patient_data: dict):
     """
     Full appointment flow:
       1. Parse symptoms → triage
-      2. Assign doctor (least loaded)
-      3. Calculate wait time
-      4. Allocate bed (ICU / Ward)
-      5. If emergency → reschedule non-emergency appointments for same doctor
-      6. Send confirmation email
+      2. Severity score
+      3. Assign doctor (least loaded with a free calendar slot) and
+         allocate bed (ICU / Ward) concurrently; the patient joins the
+         doctor's severity-ordered queue. If emergency and no doctor has
+         a slot left today → move the fewest less urgent patients of one
+         doctor to make room
+      4. Calculate wait time
+      5. Workload
+      6. Notify patients moved by preemption
       7. Persist to Firestore
-      8. Return enriched response for ReportPanel
+      8. Send confirmation email
+      9. Return enriched response for ReportPanel
     """
 
-    # Parse free-text symptoms into triage flags
-    symptom_flags = parse_symptoms(patient_data.get("symptoms", ""))
-    triage_input = {
-        "age": patient_data.get("age", 0),
-        **symptom_flags,
-    }
-
-    # 1️⃣ TRIAGE
-    emergency_flag = compute_emergency(triage_input)
+    # 1️⃣ TRIAGE — parse free-text symptoms into triage flags
+    with stage_timer("triage"):
+        # One scan of the text feeds both the triage flags and the severity
+        symptom_match = match_symptoms(patient_data.get("symptoms", ""))
+        symptom_flags = parse_symptoms(patient_data.get("symptoms", ""), symptom_match)
+        triage_input = {
+            "age": patient_data.get("age", 0),
+            **symptom_flags,
+        }
+        emergency_flag = compute_emergency(triage_input)
 
     # 2️⃣ SEVERITY SCORE
-    severity_score = calculate_severity(
-        patient_data.get("age", 0),
-        patient_data.get("symptoms", ""),
+    with stage_timer("severity"):
+        severity_score = calculate_severity(
+            patient_data.get("age", 0),
+            patient_data.get("symptoms", ""),
+            match=symptom_match,
+        )
+
+    # 3️⃣ ASSIGN DOCTOR + ALLOCATE BED — independent documents, so the two
+    # claims run concurrently; whichever succeeds is given back if the
+    # other fails.
+    appointment_id = str(uuid.uuid4())
+    queued = {"appointment_id": appointment_id, "severity": severity_score, "emergency": emergency_flag}
+    doctor, bed_result = await asyncio.gather(
+        _timed("assign_doctor", assign_doctor_async(patient_data["department"], queued)),
+        _timed("allocate_bed", allocate_bed_async(emergency_flag)),
+        return_exceptions=True,
     )
 
-    # 3️⃣ ASSIGN DOCTOR
-    doctor = assign_doctor(patient_data["department"])
-    if not doctor:
-        return {"status": "rejected", "reason": "No doctor available in this department"}
-
-    # 4️⃣ CALCULATE WAIT TIME
-    wait_time = calculate_wait_time(doctor)
-
-    # 5️⃣ ALLOCATE BED
-    bed_result = allocate_bed(emergency_flag)
-    if "error" in bed_result:
+    # 🚑 EMERGENCY PREEMPTION (Feature 10) — only when no doctor has a free
+    # slot today: the fewest less urgent patients of one doctor are moved.
+    displaced = []
+    if doctor is None and emergency_flag == 1 and isinstance(bed_result, dict) and "error" not in bed_result:
+        with stage_timer("emergency_reschedule"):
+            try:
+                doctor, displaced = await preempt_doctor_async(
+                    patient_data["department"], queued, "Emergency patient priority"
+                )
+            except Exception as exc:
+                doctor = exc   # handled below like a failed claim: the bed is given back
+
+    failure = next((r for r in (doctor, bed_result) if isinstance(r, BaseException)), None)
+    if failure is not None or not doctor or "error" in bed_result:
+        await _give_back_claims(appointment_id, doctor, bed_result)
+        if failure is not None:
+            raise failure
+        if not doctor:
+            return {"status": "rejected", "reason": "No doctor available in this department"}
         return {"status": "rejected", "reason": bed_result["error"]}
-
-    # 6️⃣ WORKLOAD
-    workload = round(calculate_workload(doctor), 1)
-
-    # 7️⃣ EMERGENCY AUTO-RESCHEDULING (Feature 10)
-    rescheduled_ids = []
-    if emergency_flag == 1:
-        affected = get_scheduled_appointments_for_doctor_today(doctor["id"])
-        for appt in affected:
-            reschedule_appointment(appt["id"], "Emergency patient priority")
-            rescheduled_ids.append(appt["id"])
-            # Send rescheduling email if patient_email exists
-            patient_email = appt.get("patient_email")
-            if patient_email:
+    doctors_cache.invalidate()
+
+    # Until the appointment document exists nothing records the claims
+    # above, so a failure in steps 4-7 must give them back: otherwise the
+    # retry (the idempotency key is released too) would claim a second
+    # slot and bed.
+    try:
+        # 4️⃣ CALCULATE WAIT TIME — from the doctor's streaming consultation estimate
+        with stage_timer("wait_time"):
+            wait = estimate_wait_time(doctor, await _department_consultation_stats(doctor))
+            wait_time = wait["minutes"]
+
+        # 5️⃣ WORKLOAD
+        with stage_timer("workload"):
+            workload = round(calculate_workload(doctor), 1)
+
+        # 6️⃣ NOTIFY PATIENTS MOVED BY PREEMPTION (Feature 10) — already marked
+        # rescheduled in the preemption transaction
+        rescheduled_ids = [appt["id"] for appt in displaced]
+        if displaced:
+            with stage_timer("reschedule_email"):
                 try:
-                    send_rescheduling_email(
-                        patient_email, appt, "Emergency patient priority"
+                    await run_in_threadpool(
+                        send_rescheduling_emails, displaced, "Emergency patient priority"
                     )
                 except Exception as exc:
-                    logger.error("Rescheduling email failed for %s: %s", patient_email, exc)
-
-    # 8️⃣ CREATE APPOINTMENT DOCUMENT
-    appointment_id = str(uuid.uuid4())
-    now = datetime.now(tz=timezone.utc)
-
-    appointment_data = {
-        "patient_name": patient_data["patient_name"],
-        "age": patient_data["age"],
-        "symptoms": patient_data.get("symptoms", ""),
-        "department": patient_data["department"],
-        "patient_email": patient_data.get("patient_email", ""),
-        "severity_score": severity_score,
-        "emergency": emergency_flag,
-        "assigned_doctor_id": doctor["id"],
-        "assigned_doctor_name": doctor["name"],
-        "predicted_wait_minutes": wait_time,
-        "workload_percent": workload,
-        "bed_type": bed_result.get("allocated", "N/A"),
-        "status": "scheduled",
-        "created_at": now.isoformat(),
-    }
-
-    create_appointment(appointment_data, appointment_id)
-
-    # 9️⃣ SEND CONFIRMATION EMAIL (Feature 5)
-    patient_email = patient_data.get("patient_email", "").strip()
-    if patient_email:
+                    logger.error("Rescheduling emails failed for %d patients: %s",
+                                 len(displaced), exc)
+
+        # 7️⃣ CREATE APPOINTMENT DOCUMENT
+        with stage_timer("persist"):
+            now = datetime.now(tz=timezone.utc)
+
+            appointment_data = {
+                "patient_name": patient_data["patient_name"],
+                "age": patient_data["age"],
+                "symptoms": patient_data.get("symptoms", ""),
+                "department": patient_data["department"],
+                "patient_email": patient_data.get("patient_email", ""),
+                "severity_score": severity_score,
+                "emergency": emergency_flag,
+                "assigned_doctor_id": doctor["id"],
+                "assigned_doctor_name": doctor["name"],
+                "predicted_wait_minutes": wait_time,
+                "predicted_wait_p10_minutes": wait["p10"],
+                "predicted_wait_p90_minutes": wait["p90"],
+                "workload_percent": workload,
+                "bed_type": bed_result.get("allocated", "N/A"),
+                "bed_shard": bed_result.get("bed_shard"),
+                "status": "scheduled",
+                "created_at": now.isoformat(),
+            }
+            slot = doctor.get("slot")
+            if slot:
+                appointment_data.update(
+                    slot_date=slot["date"], slot_index=slot["index"], slot_start=slot["start"]
+                )
+
+            await async_appointments.create_appointment(appointment_data, appointment_id)
+    except BaseException:
         try:
-            send_scheduling_email(patient_email, appointment_data)
+            await _give_back_claims(appointment_id, doctor, bed_result)
         except Exception as exc:
-            logger.error("Scheduling email failed for %s: %s", patient_email, exc)
-
-    # 🔟 RESPONSE — matches what ReportPanel expects
-    response = {
-        "appointment_id": appointment_id,
-        "patient_name": patient_data["patient_name"],
-        "age": patient_data["age"],
-        "symptoms": patient_data.get("symptoms", ""),
-        "department": patient_data["department"],
-        "severity_score": severity_score,
-        "emergency": emergency_flag,
-        "assigned_doctor_name": doctor["name"],
-        "predicted_wait_minutes": wait_time,
-        "workload_percent": workload,
-        "bed_type": bed_result.get("allocated", "N/A"),
-        "status": "scheduled",
-        "created_at": now.isoformat(),
-    }
-    if rescheduled_ids:
-        response["rescheduled_appointment_ids"] = rescheduled_ids
+            logger.error("Could not release claims of failed booking %s: %s", appointment_id, exc)
+        raise
+    _invalidate_read_caches()
+
+    # 8️⃣ SEND CONFIRMATION EMAIL (Feature 5)
+    with stage_timer("email"):
+        patient_email = patient_data.get("patient_email", "").strip()
+        if patient_email:
+            try:
+                await run_in_threadpool(send_scheduling_email, patient_email, appointment_data)
+            except Exception as exc:
+                logger.error("Scheduling email failed for %s: %s", patient_email, exc)
+
+    # 9️⃣ RESPONSE — matches what ReportPanel expects
+    with stage_timer("response"):
+        response = {
+            "appointment_id": appointment_id,
+            "patient_name": patient_data["patient_name"],
+            "age": patient_data["age"],
+            "symptoms": patient_data.get("symptoms", ""),
+            "department": patient_data["department"],
+            "severity_score": severity_score,
+            "emergency": emergency_flag,
+            "assigned_doctor_name": doctor["name"],
+            "predicted_wait_minutes": wait_time,
+            "predicted_wait_p10_minutes": wait["p10"],
+            "predicted_wait_p90_minutes": wait["p90"],
+            "workload_percent": workload,
+            "bed_type": bed_result.get("allocated", "N/A"),
+            "status": "scheduled",
+            "created_at": now.isoformat(),
+        }
+        if slot:
+            response["slot_start"] = slot["start"]
+            response["slot_end"] = slot["end"]
+        if rescheduled_ids:
+            response["rescheduled_appointment_ids"] = rescheduled_ids
 
     return response
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# Batch triage (mass-casualty intake)
+# ═══════════════════════════════════════════════════════════════════════════
+MAX_TRIAGE_BATCH = 10_000
+
+
+@app.post("/api/triage/batch")
+def triage_batch_endpoint(body: dict):
+    """
+    Score many patients in one call without booking them.
+    Body: ``{"patients": [{"age": 70, "symptoms": "..."}, ...]}``.
+    Returns severity scores and emergency flags in input order, identical
+    to what /api/submit-appointment computes per patient.
+    """
+    patients = body.get("patients")
+    if not isinstance(patients, list) or not patients:
+        raise HTTPException(status_code=400, detail="'patients' must be a non-empty list")
+    if len(patients) > MAX_TRIAGE_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_TRIAGE_BATCH} patients per batch")
+    for index, patient in enumerate(patients):
+        if not isinstance(patient, dict):
+            raise HTTPException(status_code=400, detail=f"patients[{index}] must be an object")
+        age = patient.get("age", 0)
+        if isinstance(age, bool) or not isinstance(age, (int, float)):
+            raise HTTPException(status_code=400, detail=f"patients[{index}].age must be a number")
+        if not isinstance(patient.get("symptoms", ""), str):
+            raise HTTPException(status_code=400, detail=f"patients[{index}].symptoms must be a string")
+
+    # Imported here: numpy is only needed by this endpoint, so workers that
+    # never score a batch don't pay for it at startup.
+    from app.services.batch_triage import triage_batch
+
+    return {"count": len(patients), "results": triage_batch(patients)}
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Existing list endpoints (unchanged)
 # ═══════════════════════════════════════════════════════════════════════════
 @app.get("/api/doctors")
 def list_doctors():
+    return doctors_cache.get("all", _load_doctor_list)
+
+
+def _load_doctor_list():
     doctors = get_all_doctors()
     result = []
     for doc in doctors:
@@ -410,29 +882,62 @@ def list_doctors():
 
 
 @app.get("/api/appointments")
-def list_appointments():
-    return get_all_appointments()
+async def list_appointments(limit: int = None, cursor: str = None, fields: str = None):
+    """
+    Without ``limit``/``cursor`` returns the full list (legacy shape).
+    With them returns ``{"items": [...], "next_cursor": ...}``, newest
+    first; ``fields=a,b`` restricts the returned fields.
+    """
+    if limit is None and cursor is None:
+        return await async_appointments.get_all_appointments()
+    return await _appointments_page(None, limit, cursor, fields)
 
 
 @app.get("/api/admin/stats")
 def admin_stats():
-    doctors = get_all_doctors()
-    appointments = get_all_appointments()
+    """O(1) read of the sharded stats counters (see stats_repo), cached briefly."""
+    return stats_cache.get("hospital", _load_admin_stats)
 
-    total_doctors = len(doctors)
-    total_appointments = len(appointments)
-    emergency_cases = sum(1 for a in appointments if a.get("emergency") == 1)
 
-    workloads = [
-        calculate_workload(d)
-        for d in doctors
-        if d.get("daily_capacity", 0) > 0
-    ]
-    avg_workload = round(sum(workloads) / len(workloads), 1) if workloads else 0
+def _load_admin_stats():
+    stats = get_stats()
+    if stats is None:
+        # First read after deploying the counters — seed them from a scan.
+        stats = reconcile_stats()
+
+    capacity_doctors = stats["capacity_doctors"]
+    avg_workload = (
+        round(stats["workload_sum"] / capacity_doctors, 1) if capacity_doctors else 0
+    )
 
     return {
-        "total_doctors": total_doctors,
-        "total_appointments": total_appointments,
-        "emergency_cases": emergency_cases,
+        "total_doctors": stats["total_doctors"],
+        "total_appointments": stats["total_appointments"],
+        "emergency_cases": stats["emergency_cases"],
         "avg_workload": avg_workload,
-    }
\ No newline at end of file
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Bed occupancy & discharge
+# ═══════════════════════════════════════════════════════════════════════════
+@app.get("/api/admin/beds")
+async def bed_occupancy(_user: dict = Depends(require_admin)):
+    """Current ICU / ward occupancy, summed over the bed counter shards."""
+    beds = await async_resources.get_bed_occupancy()
+    return {
+        **beds,
+        "icu_available": max(beds["icu_total"] - beds["icu_occupied"], 0),
+        "ward_available": max(beds["ward_total"] - beds["ward_occupied"], 0),
+    }
+
+
+@app.post("/api/appointments/{appointment_id}/discharge")
+async def discharge_appointment(appointment_id: str, _user: dict = Depends(get_current_user)):
+    """Discharge a patient and free the ICU / ward bed held by the appointment."""
+    outcome = await discharge_patient_async(appointment_id)
+    if outcome == "not_found":
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    if outcome == "already_discharged":
+        raise HTTPException(status_code=409, detail="Appointment already discharged")
+    return {"success": True, "appointment_id": appointment_id, "bed_released": outcome == "released"}
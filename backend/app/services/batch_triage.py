@@ -0,0 +1,86 @@
+"""
+batch_triage.py
+---------------
+Vectorised severity scoring and triage for many patients at once
+(mass-casualty intake).
+
+Produces exactly what ``calculate_severity`` and ``compute_emergency``
+(fed by ``parse_symptoms``) return for each record, but computes age
+bands, keyword weights and triage rules as NumPy array operations over
+the whole batch. The only per-record Python work is the single symptom
+scan, which yields matched term indexes; those are flattened into one
+index array and reduced with ``np.bincount``.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+from app.services.severity_service import MAX_SEVERITY
+from app.services.symptom_matcher import MATCHER
+
+# Per-term attribute vectors, aligned with MATCHER.terms.
+_TERM_WEIGHTS = np.array([term.weight for term in MATCHER.terms], dtype=np.int64)
+_TERM_SEVERE = np.array([term.severe for term in MATCHER.terms], dtype=np.int64)
+_TERM_MODERATE = np.array([term.moderate for term in MATCHER.terms], dtype=np.int64)
+
+
+def score_batch(ages: Sequence, symptoms: Sequence[str]) -> dict:
+    """
+    Score ``len(ages)`` patients in one call.
+
+    Parameters
+    ----------
+    ages : sequence of int or float
+        Patient ages in years.
+    symptoms : sequence of str
+        Free-text symptom descriptions, aligned with ``ages``.
+
+    Returns
+    -------
+    dict
+        ``{"severity_score": ndarray[int64], "emergency": ndarray[int64]}``
+        in input order.
+    """
+    if len(ages) != len(symptoms):
+        raise ValueError("ages and symptoms must have the same length")
+    count = len(ages)
+    age = np.asarray(ages, dtype=np.float64)
+
+    # One scan per text → flat (record, term) incidence pairs.
+    matches = [MATCHER.scan_indices(text or "") for text in symptoms]
+    lengths = np.fromiter((len(found) for found in matches), dtype=np.int64, count=count)
+    record_idx = np.repeat(np.arange(count), lengths)
+    term_idx = np.fromiter(
+        (index for found in matches for index in found), dtype=np.int64, count=int(lengths.sum())
+    )
+
+    weight = np.bincount(record_idx, weights=_TERM_WEIGHTS[term_idx], minlength=count)
+    severe = np.bincount(record_idx, weights=_TERM_SEVERE[term_idx], minlength=count) > 0
+    moderate = np.bincount(record_idx, weights=_TERM_MODERATE[term_idx], minlength=count) > 0
+
+    # severity_service._age_score: +2 at ≥ 65, +1 at ≥ 45
+    age_score = np.where(age >= 65, 2, np.where(age >= 45, 1, 0))
+    severity = np.minimum(age_score + weight.astype(np.int64), MAX_SEVERITY)
+
+    # triage_service.compute_emergency: severe, or elderly (> 65) + moderate
+    emergency = (severe | ((age > 65) & moderate)).astype(np.int64)
+
+    return {"severity_score": severity, "emergency": emergency}
+
+
+def triage_batch(records: List[dict]) -> List[dict]:
+    """
+    Score a list of ``{"age": ..., "symptoms": ...}`` records.
+    Returns ``[{"severity_score": int, "emergency": 0 | 1}, ...]`` in input order.
+    """
+    scores = score_batch(
+        [record.get("age", 0) for record in records],
+        [record.get("symptoms", "") for record in records],
+    )
+    return [
+        {"severity_score": severity, "emergency": emergency}
+        for severity, emergency in zip(
+            scores["severity_score"].tolist(), scores["emergency"].tolist()
+        )
+    ]
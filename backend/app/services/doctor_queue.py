@@ -0,0 +1,103 @@
+"""
+doctor_queue.py
+---------------
+Per-doctor queue of waiting patients, most urgent first.
+
+The queue is persisted as ``doctor_queues/{doctor_id}``:
+
+    {"heap": [{"id": appointment_id, "severity": 7, "emergency": 1, "seq": 42}, ...],
+     "seq": 42}
+
+``heap`` is stored in heapq layout — a binary min-heap on
+(emergency first, higher severity first, booking order) — so loading it
+needs no re-heapify and ``push`` / ``pop`` are O(log n) sift operations.
+
+Emergency preemption uses ``displace``: it removes only the ``count``
+least urgent entries, and only ones less urgent than the newcomer, so a
+full doctor can take an emergency by moving the fewest patients possible.
+"""
+
+import heapq
+
+
+def _key(entry: dict) -> tuple:
+    return (-int(entry.get("emergency", 0)), -float(entry.get("severity", 0)), entry["seq"])
+
+
+class DoctorQueue:
+    """Heap of waiting appointments for one doctor."""
+
+    def __init__(self, heap: list = None, seq: int = 0):
+        # (key, entry) pairs; keys are unique because ``seq`` is.
+        self._heap = [(_key(entry), entry) for entry in heap or ()]
+        self._seq = seq
+
+    @classmethod
+    def from_doc(cls, data: dict = None) -> "DoctorQueue":
+        data = data or {}
+        return cls(data.get("heap"), data.get("seq", 0))
+
+    def to_doc(self) -> dict:
+        return {"heap": [entry for _, entry in self._heap], "seq": self._seq}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, appointment_id: str):
+        return any(entry["id"] == appointment_id for _, entry in self._heap)
+
+    def entries(self) -> list:
+        """Entries in the order the doctor will see them."""
+        return [entry for _, entry in sorted(self._heap)]
+
+    def new_entry(self, appointment_id: str, severity, emergency: int) -> dict:
+        self._seq += 1
+        return {"id": appointment_id, "severity": severity, "emergency": emergency, "seq": self._seq}
+
+    def push(self, entry: dict):
+        heapq.heappush(self._heap, (_key(entry), entry))
+
+    def pop(self):
+        """Remove and return the most urgent entry, or None if empty."""
+        return heapq.heappop(self._heap)[1] if self._heap else None
+
+    def position(self, entry: dict) -> int:
+        """How many queued entries will be seen before ``entry`` (O(n))."""
+        key = _key(entry)
+        return sum(1 for other, _ in self._heap if other < key)
+
+    def least_urgent(self):
+        """The entry that would be displaced first, or None if empty (O(n))."""
+        return max(self._heap)[1] if self._heap else None
+
+    def remove(self, appointment_id: str) -> bool:
+        """Drop ``appointment_id`` wherever it sits (O(n))."""
+        for index, (_, entry) in enumerate(self._heap):
+            if entry["id"] == appointment_id:
+                self._heap[index] = self._heap[-1]
+                self._heap.pop()
+                heapq.heapify(self._heap)
+                return True
+        return False
+
+    def less_urgent_than(self, newcomer: dict) -> list:
+        """Entries ``newcomer`` would be seen before, least urgent first (O(n log n))."""
+        limit = _key(newcomer)
+        return [entry for key, entry in sorted(self._heap, reverse=True) if key > limit]
+
+    def displace(self, newcomer: dict, count: int):
+        """
+        Remove and return the ``count`` least urgent entries that are all
+        less urgent than ``newcomer``; None (queue untouched) if there
+        aren't that many.
+        """
+        if count <= 0:
+            return []
+        limit = _key(newcomer)
+        victims = heapq.nlargest(count, self._heap)
+        if len(victims) < count or victims[-1][0] <= limit:
+            return None
+        ids = {entry["id"] for _, entry in victims}
+        self._heap = [item for item in self._heap if item[1]["id"] not in ids]
+        heapq.heapify(self._heap)
+        return [entry for _, entry in victims]
@@ -4,10 +4,29 @@ doctor_service.py
 Handles doctor selection and workload logic.
 """
 
-from app.db.doctor_repo import (
-    get_doctors_by_department,
-    update_doctor_appointments
-)
+import asyncio
+import logging
+import os
+import random
+
+from app.db.aio import calendar_repo as async_calendar_repo
+from app.db.aio import doctor_repo as async_doctor_repo
+from app.db.doctor_repo import SlotContention
+from app.services.slot_calendar import SLOT_POLICY, booking_days, plan_slots
+from app.utils.metrics import DOCTOR_ASSIGNMENT_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# Passes over a department's candidates before giving up under contention.
+ASSIGNMENT_MAX_ROUNDS = int(os.environ.get("ASSIGNMENT_MAX_ROUNDS", "5"))
+
+_ASSIGNED = DOCTOR_ASSIGNMENT_EVENTS.labels("assigned")
+_RETRY = DOCTOR_ASSIGNMENT_EVENTS.labels("retry")
+_CONFLICT = DOCTOR_ASSIGNMENT_EVENTS.labels("conflict")
+_FALLBACK = DOCTOR_ASSIGNMENT_EVENTS.labels("fallback")
+_ABORT = DOCTOR_ASSIGNMENT_EVENTS.labels("abort")
+_NO_CAPACITY = DOCTOR_ASSIGNMENT_EVENTS.labels("no_capacity")
+_PREEMPTED = DOCTOR_ASSIGNMENT_EVENTS.labels("preempted")
 
 
 def calculate_workload(doctor: dict) -> float:
@@ -20,35 +39,123 @@ def calculate_workload(doctor: dict) -> float:
     ) * 100
 
 
-def assign_doctor(department: str):
-    """
-    Selects the least loaded available doctor
-    from the given department and updates
-    appointment count.
+async def assign_doctor_async(department: str, patient: dict = None):
     """
+    Take a slot with a doctor of ``department`` and book it into their
+    calendar; returns the updated doctor, or None if nobody has room.
 
-    doctors = get_doctors_by_department(department)
+    Each round reads the department's calendars for the booking horizon
+    in one query, ranks one free slot per doctor with
+    ``slot_calendar.plan_slots`` — least loaded doctor first on the
+    earliest day anyone has room, slot chosen by SLOT_POLICY — and claims
+    candidates in that order. Emergencies take the earliest slot and only
+    today's: with none left they get None here and go to
+    preempt_doctor_async. A claim fails over to the next candidate if the
+    doctor filled up or the slot was taken since the calendars were read. Given ``patient``
+    (``{"appointment_id", "severity", "emergency"}``) the claim also adds
+    them to the chosen doctor's queue. The returned doctor carries
+    ``slot`` (see slot_calendar.slot_info).
+    """
+    emergency = bool(patient and patient.get("emergency"))
+    policy = "first_fit" if emergency else SLOT_POLICY
+    for round_ in range(ASSIGNMENT_MAX_ROUNDS):
+        doctors = [
+            d for d in await async_doctor_repo.get_doctors_by_department(department)
+            if d.get("current_appointments", 0) < d.get("daily_capacity", 0)
+        ]
+        if not doctors:
+            break
+        days = booking_days(horizon=1) if emergency else booking_days()
+        calendars = await async_calendar_repo.get_department_calendars(
+            department, [day for day, _ in days]
+        )
+        planned = plan_slots(doctors, calendars, days, policy)
 
-    # Filter doctors who still have capacity
-    available_doctors = [
-        d for d in doctors
-        if d["current_appointments"] < d["daily_capacity"]
-        and d["is_available"] is True
-    ]
+        contended = False
+        for tried, (candidate, day, index) in enumerate(planned):
+            if tried:
+                _FALLBACK.inc()
+            try:
+                selected, attempts = await async_doctor_repo.claim_doctor_slot(
+                    candidate["id"], patient=patient, slot=(day, index)
+                )
+            except SlotContention:
+                _CONFLICT.inc()
+                contended = True
+                continue
+            if attempts > 1:
+                _RETRY.inc(attempts - 1)
+            if selected:
+                _ASSIGNED.inc()
+                return selected
+            # Full, or the slot went to a concurrent booking: re-plan
+            # with fresh calendars rather than give up.
+            contended = True
 
-    if not available_doctors:
+        if not contended:
+            break
+        await asyncio.sleep(random.uniform(0, 0.01 * 2 ** round_))
+    else:
+        _ABORT.inc()
+        logger.warning("Doctor assignment in %s aborted after %d contended rounds",
+                       department, ASSIGNMENT_MAX_ROUNDS)
         return None
 
-    # Sort by lowest workload %
-    available_doctors.sort(key=calculate_workload)
+    _NO_CAPACITY.inc()
+    return None
 
-    selected = available_doctors[0]
 
-    # Update Firestore appointment count
-    new_count = selected["current_appointments"] + 1
-    update_doctor_appointments(selected["id"], new_count)
+async def release_doctor(doctor_id: str, appointment_id: str = None, slot: dict = None):
+    """Give back the slot taken by assign_doctor_async when a booking is abandoned."""
+    await async_doctor_repo.release_doctor_slot(
+        doctor_id, appointment_id, (slot["date"], slot["index"]) if slot else None
+    )
 
-    # Return updated doctor info
-    selected["current_appointments"] = new_count
 
-    return selected
\ No newline at end of file
+def _displacement_order(doctors: list, queues: dict) -> list:
+    """
+    Doctors to try preempting, cheapest first: fewest patients over
+    capacity to move (none for a doctor with room), then the least urgent
+    patient at the back of the queue (the one who would be moved). Empty
+    queues go after non-empty ones with the same overflow.
+    """
+    def cost(doctor):
+        queue = queues.get(doctor["id"])
+        least_urgent = queue.least_urgent() if queue else None
+        overflow = max(0, doctor.get("current_appointments", 0) + 1 - doctor.get("daily_capacity", 0))
+        if least_urgent is None:
+            return (overflow, 1, 0, 0.0)
+        return (overflow, 0, int(least_urgent["emergency"]), float(least_urgent["severity"]))
+    return sorted(doctors, key=lambda d: (cost(d), d["id"]))
+
+
+async def preempt_doctor_async(department: str, patient: dict, reason: str):
+    """
+    Place an emergency ``patient`` when no doctor in ``department`` has a
+    slot left today, by rescheduling the fewest less urgent waiting
+    patients of one doctor (usually exactly one) so the emergency gets a
+    slot today (see doctor_repo.preempt_doctor_slot). If no doctor can
+    free one, the emergency is placed without a slot where there is
+    capacity (they are still first in the queue). Returns ``(doctor,
+    moved appointments)`` or ``(None, [])`` when nobody less urgent can
+    be moved.
+    """
+    doctors = [
+        d for d in await async_doctor_repo.get_doctors_by_department(department)
+        if d.get("daily_capacity", 0) > 0
+    ]
+    queues = await async_doctor_repo.get_queues([d["id"] for d in doctors])
+    ordered = _displacement_order(doctors, queues)
+    for require_slot in (True, False):
+        for doctor in ordered:
+            try:
+                selected, moved = await async_doctor_repo.preempt_doctor_slot(
+                    doctor["id"], patient, reason, require_slot=require_slot
+                )
+            except SlotContention:
+                _CONFLICT.inc()
+                continue
+            if selected:
+                _PREEMPTED.inc()
+                return selected, moved
+    return None, []
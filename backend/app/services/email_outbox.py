@@ -0,0 +1,276 @@
+"""
+email_outbox.py — Durable asynchronous delivery of outgoing email.
+
+Request handlers call ``queue_email`` which writes one ``email_outbox``
+document and returns immediately. A background dispatcher thread in every
+worker drains due messages: it claims them transactionally, sends them
+through a per-provider token bucket, and on failure re-queues them with
+exponential backoff until ``EMAIL_MAX_ATTEMPTS`` is reached.
+
+Reads config from environment variables:
+    EMAIL_OUTBOX_DISPATCHER        "0" disables the dispatcher in this process
+    EMAIL_OUTBOX_POLL_SECONDS      idle poll interval (default 2)
+    EMAIL_OUTBOX_BATCH_SIZE        messages claimed per poll (default 20)
+    EMAIL_OUTBOX_LEASE_SECONDS     claim lease before another worker may retry (default 120)
+    EMAIL_RATE_PER_SECOND          sends per second per provider per worker (default 5, 0 = unlimited)
+    EMAIL_RATE_BURST               token bucket burst size (default 10)
+    EMAIL_MAX_ATTEMPTS             attempts before a message is parked as failed (default 6)
+    EMAIL_RETRY_BASE_SECONDS       first retry delay, doubled each attempt (default 30)
+    EMAIL_RETRY_MAX_SECONDS        retry delay cap (default 3600)
+    EMAIL_BULK_CHUNK_SIZE          messages per bulk job document (default 100)
+"""
+
+import os
+import random
+import logging
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from app.db.outbox_repo import (
+    enqueue_email,
+    enqueue_bulk_emails,
+    claim_due_emails,
+    mark_email_sent,
+    mark_email_skipped,
+    mark_email_retry,
+    mark_email_failed,
+)
+from app.utils.metrics import EMAIL_OUTBOX_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+def _get_outbox_config():
+    """Read outbox config from environment at call time."""
+    return {
+        "enabled": os.environ.get("EMAIL_OUTBOX_DISPATCHER", "1") != "0",
+        "poll_seconds": float(os.environ.get("EMAIL_OUTBOX_POLL_SECONDS", "2")),
+        "batch_size": int(os.environ.get("EMAIL_OUTBOX_BATCH_SIZE", "20")),
+        "lease_seconds": int(os.environ.get("EMAIL_OUTBOX_LEASE_SECONDS", "120")),
+        "rate_per_second": float(os.environ.get("EMAIL_RATE_PER_SECOND", "5")),
+        "burst": int(os.environ.get("EMAIL_RATE_BURST", "10")),
+        "max_attempts": int(os.environ.get("EMAIL_MAX_ATTEMPTS", "6")),
+        "retry_base_seconds": float(os.environ.get("EMAIL_RETRY_BASE_SECONDS", "30")),
+        "retry_max_seconds": float(os.environ.get("EMAIL_RETRY_MAX_SECONDS", "3600")),
+        # Keeps a bulk job well under Firestore's 1 MiB document limit.
+        "bulk_chunk_size": int(os.environ.get("EMAIL_BULK_CHUNK_SIZE", "100")),
+    }
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """
+    Delay before the next attempt after ``attempts`` failures:
+    ``base * 2^(attempts-1)`` capped at ``cap``, with 50–100 % jitter so
+    workers that failed together don't retry in lockstep.
+    """
+    delay = min(base * (2 ** max(attempts - 1, 0)), cap)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting sends to one provider (rate 0 = unlimited)."""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        if rate_per_second < 0:
+            raise ValueError(f"rate_per_second must be >= 0, got {rate_per_second}")
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event: threading.Event = None):
+        """Block until a token is available (or ``stop_event`` is set)."""
+        if not self.rate:
+            return stop_event is None or not stop_event.is_set()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class OutboxDispatcher:
+    """Background thread that drains the email outbox."""
+
+    def __init__(self, sender, bulk_sender, config: dict):
+        self._sender = sender
+        self._bulk_sender = bulk_sender
+        self._config = config
+        self._buckets: dict = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="email-outbox-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self):
+        self._wake.set()
+
+    def _bucket(self, provider: str) -> TokenBucket:
+        bucket = self._buckets.get(provider)
+        if bucket is None:
+            bucket = TokenBucket(self._config["rate_per_second"], self._config["burst"])
+            self._buckets[provider] = bucket
+        return bucket
+
+    def _run(self):
+        cfg = self._config
+        while not self._stop.is_set():
+            try:
+                messages = claim_due_emails(cfg["batch_size"], cfg["lease_seconds"])
+            except Exception as exc:
+                logger.error("Email outbox poll failed: %s", exc)
+                messages = []
+
+            for message in messages:
+                if self._stop.is_set():
+                    break  # unsent claims are retried once their lease expires
+                self._deliver(message)
+
+            if len(messages) < cfg["batch_size"]:
+                self._wake.wait(cfg["poll_seconds"])
+                self._wake.clear()
+
+    def _deliver(self, message: dict):
+        if message.get("kind") == "bulk":
+            self._deliver_bulk(message)
+            return
+
+        if not self._bucket(message.get("provider", "")).acquire(self._stop):
+            return
+
+        try:
+            sent = self._sender(message["to"], message["subject"], message["html"])
+        except Exception as exc:
+            self._record_failure(message, exc)
+            return
+
+        if sent:
+            mark_email_sent(message["id"])
+            EMAIL_OUTBOX_EVENTS.labels("sent").inc()
+        else:
+            mark_email_skipped(message["id"], "SMTP not configured")
+            EMAIL_OUTBOX_EVENTS.labels("skipped").inc()
+
+    def _deliver_bulk(self, message: dict):
+        """
+        Send a bulk job over one SMTP session, taking one token per message
+        as it goes; retry only the failures (including any left unsent
+        because the dispatcher is stopping).
+        """
+        pending = message.get("messages", [])
+        bucket = self._bucket(message.get("provider", ""))
+
+        try:
+            results = self._bulk_sender(
+                [(m["to"], m["subject"], m["html"]) for m in pending],
+                throttle=lambda: bucket.acquire(self._stop),
+            )
+        except Exception as exc:
+            self._record_failure(message, exc)
+            return
+
+        if results is None:
+            mark_email_skipped(message["id"], "SMTP not configured")
+            EMAIL_OUTBOX_EVENTS.labels("skipped").inc(len(pending))
+            return
+
+        failed = [m for m, err in zip(pending, results) if err is not None]
+        EMAIL_OUTBOX_EVENTS.labels("sent").inc(len(pending) - len(failed))
+        if not failed:
+            mark_email_sent(message["id"])
+            return
+        first_error = next(err for err in results if err is not None)
+        self._record_failure(message, first_error, remaining=failed)
+
+    def _record_failure(self, message: dict, exc: Exception, remaining: list = None):
+        cfg = self._config
+        attempts = message.get("attempts", 0) + 1
+        max_attempts = message.get("max_attempts", cfg["max_attempts"])
+        if attempts >= max_attempts:
+            logger.error("Email %s to %s failed permanently: %s",
+                         message["id"], message["to"], exc)
+            mark_email_failed(message["id"], attempts, str(exc))
+            EMAIL_OUTBOX_EVENTS.labels("failed").inc()
+        else:
+            delay = backoff_seconds(
+                attempts, cfg["retry_base_seconds"], cfg["retry_max_seconds"]
+            )
+            next_at = datetime.now(tz=timezone.utc) + timedelta(seconds=delay)
+            logger.warning("Email %s to %s failed (attempt %d), retrying in %.1fs: %s",
+                           message["id"], message["to"], attempts, delay, exc)
+            mark_email_retry(message["id"], attempts, next_at, str(exc), messages=remaining)
+            EMAIL_OUTBOX_EVENTS.labels("retried").inc()
+
+
+_dispatcher = None
+
+
+def queue_email(to: str, subject: str, html_body: str, provider: str) -> str:
+    """Persist an email in the outbox and nudge the local dispatcher."""
+    message_id = enqueue_email(
+        to, subject, html_body, provider, _get_outbox_config()["max_attempts"]
+    )
+    EMAIL_OUTBOX_EVENTS.labels("queued").inc()
+    if _dispatcher is not None:
+        _dispatcher.wake()
+    return message_id
+
+
+def queue_bulk_email(messages: list, provider: str) -> list:
+    """
+    Persist ``[(to, subject, html_body), ...]`` as bulk outbox jobs (one
+    batched write) and nudge the local dispatcher.
+    """
+    cfg = _get_outbox_config()
+    size = max(1, cfg["bulk_chunk_size"])
+    chunks = [messages[i:i + size] for i in range(0, len(messages), size)]
+    ids = enqueue_bulk_emails(chunks, provider, cfg["max_attempts"])
+    EMAIL_OUTBOX_EVENTS.labels("queued").inc(len(messages))
+    if _dispatcher is not None:
+        _dispatcher.wake()
+    return ids
+
+
+def start_dispatcher():
+    """Start this worker's dispatcher thread (no-op if disabled or running)."""
+    global _dispatcher
+    cfg = _get_outbox_config()
+    if not cfg["enabled"] or _dispatcher is not None:
+        return
+    from app.services.email_service import _send_html_email, _send_html_emails
+
+    _dispatcher = OutboxDispatcher(_send_html_email, _send_html_emails, cfg)
+    _dispatcher.start()
+    logger.info("Email outbox dispatcher started.")
+
+
+def stop_dispatcher():
+    """Stop the dispatcher; in-flight claims are retried after their lease."""
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
@@ -4,16 +4,22 @@ email_service.py — SMTP email notifications for AarogyaLekha.
 Reads config from environment variables:
     SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD
 
+The public helpers render the message and queue it in the durable outbox
+(see email_outbox.py); the actual SMTP send happens on the dispatcher
+thread, never inside a request handler.
+
 If any config is missing the functions log a warning and return silently,
 so the application never crashes due to missing email config.
 """
 
 import os
-import smtplib
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from app.services.email_outbox import queue_email, queue_bulk_email
+from app.services.smtp_pool import get_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,28 +33,75 @@ def _get_smtp_config():
     }
 
 
-def _send_html_email(to: str, subject: str, html_body: str):
-    """Low-level send. Logs warning and returns if SMTP is not configured."""
-    cfg = _get_smtp_config()
-    if not (cfg["host"] and cfg["user"] and cfg["password"]):
-        logger.warning("SMTP not configured — email to %s skipped.", to)
-        return
+def _smtp_configured(cfg: dict) -> bool:
+    return bool(cfg["host"] and cfg["user"] and cfg["password"])
+
 
+def _build_message(sender: str, to: str, subject: str, html_body: str) -> str:
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
-    msg["From"] = cfg["user"]
+    msg["From"] = sender
     msg["To"] = to
     msg.attach(MIMEText(html_body, "html"))
+    return msg.as_string()
+
+
+def _send_html_email(to: str, subject: str, html_body: str) -> bool:
+    """
+    Low-level send, called by the outbox dispatcher.
+
+    Returns False if SMTP is not configured and True once sent; SMTP
+    errors propagate so the dispatcher can retry.
+    """
+    cfg = _get_smtp_config()
+    if not _smtp_configured(cfg):
+        logger.warning("SMTP not configured — email to %s skipped.", to)
+        return False
 
-    try:
-        with smtplib.SMTP(cfg["host"], cfg["port"]) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(cfg["user"], cfg["password"])
-            server.sendmail(cfg["user"], to, msg.as_string())
-        logger.info("Email sent to %s: %s", to, subject)
-    except Exception as exc:
-        logger.error("Failed to send email to %s: %s", to, exc)
+    msg = _build_message(cfg["user"], to, subject, html_body)
+    get_pool(cfg).send(cfg["user"], to, msg)
+    logger.info("Email sent to %s: %s", to, subject)
+    return True
+
+
+def _send_html_emails(messages: list, throttle=None):
+    """
+    Bulk send ``[(to, subject, html_body), ...]`` over one pooled SMTP
+    session, called by the outbox dispatcher. ``throttle`` is passed to
+    ``SMTPConnectionPool.send_many`` (rate limiting per message).
+
+    Returns None if SMTP is not configured, else one entry per message:
+    None if sent or the exception that message failed with.
+    """
+    cfg = _get_smtp_config()
+    if not _smtp_configured(cfg):
+        logger.warning("SMTP not configured — %d emails skipped.", len(messages))
+        return None
+    envelopes = [
+        (cfg["user"], to, _build_message(cfg["user"], to, subject, html_body))
+        for to, subject, html_body in messages
+    ]
+    results = get_pool(cfg).send_many(envelopes, throttle=throttle)
+    logger.info("Bulk email: %d/%d sent", results.count(None), len(results))
+    return results
+
+
+def _queue_html_email(to: str, subject: str, html_body: str):
+    """Queue a message in the outbox. Logs warning and returns if SMTP is not configured."""
+    cfg = _get_smtp_config()
+    if not _smtp_configured(cfg):
+        logger.warning("SMTP not configured — email to %s skipped.", to)
+        return None
+    return queue_email(to, subject, html_body, cfg["host"])
+
+
+def _queue_bulk_html_email(messages: list):
+    """Queue ``[(to, subject, html_body), ...]`` as bulk outbox jobs."""
+    cfg = _get_smtp_config()
+    if not _smtp_configured(cfg):
+        logger.warning("SMTP not configured — %d emails skipped.", len(messages))
+        return []
+    return queue_bulk_email(messages, cfg["host"])
 
 
 # ---------------------------------------------------------------------------
@@ -90,11 +143,10 @@ def send_scheduling_email(to: str, appointment_data: dict):
         </div>
     </div>
     """
-    _send_html_email(to, "✅ Appointment Confirmed — AarogyaLekha", html)
+    _queue_html_email(to, "✅ Appointment Confirmed — AarogyaLekha", html)
 
 
-def send_rescheduling_email(to: str, appointment_data: dict, reason: str):
-    """Send rescheduling notification email."""
+def _rescheduling_html(appointment_data: dict, reason: str) -> str:
     patient = appointment_data.get("patient_name", "Patient")
     doctor = appointment_data.get("assigned_doctor_name", "N/A")
     department = appointment_data.get("department", "N/A")
@@ -122,7 +174,30 @@ def send_rescheduling_email(to: str, appointment_data: dict, reason: str):
         </div>
     </div>
     """
-    _send_html_email(to, "⚠️ Appointment Rescheduled — AarogyaLekha", html)
+    return html
+
+
+RESCHEDULE_SUBJECT = "⚠️ Appointment Rescheduled — AarogyaLekha"
+
+
+def send_rescheduling_email(to: str, appointment_data: dict, reason: str):
+    """Send rescheduling notification email."""
+    _queue_html_email(to, RESCHEDULE_SUBJECT, _rescheduling_html(appointment_data, reason))
+
+
+def send_rescheduling_emails(appointments: list, reason: str):
+    """
+    Notify every patient in ``appointments`` that has a ``patient_email``,
+    queued as bulk outbox jobs (one write per chunk) and sent over a single
+    SMTP session by the dispatcher.
+    """
+    messages = [
+        (appt["patient_email"], RESCHEDULE_SUBJECT, _rescheduling_html(appt, reason))
+        for appt in appointments
+        if appt.get("patient_email")
+    ]
+    if messages:
+        _queue_bulk_html_email(messages)
 
 
 def send_password_reset_email(to: str, temp_password: str):
@@ -150,4 +225,4 @@ def send_password_reset_email(to: str, temp_password: str):
         </div>
     </div>
     """
-    _send_html_email(to, "🔑 Password Reset — AarogyaLekha", html)
+    _queue_html_email(to, "🔑 Password Reset — AarogyaLekha", html)
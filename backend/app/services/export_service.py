@@ -0,0 +1,85 @@
+"""
+export_service.py
+-----------------
+Streaming serialisers for bulk appointment exports.
+
+Every function takes and returns an iterator, so an export of any size is
+produced row by row in constant memory: Firestore stream → NDJSON / CSV
+lines → (optional) gzip → HTTP response body.
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator
+
+# Column order of the CSV export.
+EXPORT_COLUMNS = [
+    "id",
+    "created_at",
+    "patient_name",
+    "age",
+    "department",
+    "symptoms",
+    "severity_score",
+    "emergency",
+    "assigned_doctor_id",
+    "assigned_doctor_name",
+    "predicted_wait_minutes",
+    "workload_percent",
+    "bed_type",
+    "status",
+    "rescheduled_reason",
+]
+
+# Rows are buffered into chunks of about this size before being yielded,
+# so the response isn't written one tiny frame per row.
+CHUNK_BYTES = 64 * 1024
+
+
+def _chunked(pieces: Iterable[str]) -> Iterator[bytes]:
+    buffer, size = [], 0
+    for piece in pieces:
+        data = piece.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    """One JSON object per line."""
+    return _chunked(
+        json.dumps(row, default=str, ensure_ascii=False) + "\n" for row in rows
+    )
+
+
+def iter_csv(rows: Iterable[dict], columns: list = EXPORT_COLUMNS) -> Iterator[bytes]:
+    """CSV with a header row; unknown fields are dropped, missing ones left blank."""
+
+    def lines():
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate(0)
+        yield out.getvalue()
+
+    return _chunked(lines())
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into gzip format on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 → gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -4,44 +4,52 @@ resource_service.py
 Handles ICU and Ward allocation logic.
 """
 
-from app.db.resource_repo import get_resources, update_resources
-from datetime import datetime
+from app.db.aio import resource_repo as async_resource_repo
+from app.db.resource_repo import claim_bed, release_bed
 
 
 def allocate_bed(emergency_flag: int):
-
-    resources = get_resources()
-
-    icu_total = resources["icu_total"]
-    icu_occupied = resources["icu_occupied"]
-
-    ward_total = resources["ward_total"]
-    ward_occupied = resources["ward_occupied"]
+    """
+    Occupies an ICU bed for emergencies, a ward bed otherwise.
+    Returns {"allocated": "ICU" | "WARD", "bed_shard": n} or {"error": ...};
+    the shard is stored on the appointment so discharge frees the same bed.
+    """
 
     if emergency_flag == 1:
         # ICU Allocation
-        if icu_occupied >= icu_total:
+        shard = claim_bed("ICU")
+        if shard is None:
             return {"error": "No ICU beds available"}
-
-        icu_occupied += 1
-
-        update_resources({
-            "icu_occupied": icu_occupied,
-            "last_updated": datetime.utcnow()
-        })
-
-        return {"allocated": "ICU"}
+        return {"allocated": "ICU", "bed_shard": shard}
 
     else:
         # Ward Allocation
-        if ward_occupied >= ward_total:
+        shard = claim_bed("WARD")
+        if shard is None:
             return {"error": "No ward beds available"}
+        return {"allocated": "WARD", "bed_shard": shard}
+
+
+def discharge_patient(appointment_id: str) -> str:
+    """Marks an appointment discharged and frees its bed."""
+    return release_bed(appointment_id)
+
+
+async def allocate_bed_async(emergency_flag: int):
+    """Async twin of :func:`allocate_bed`."""
+    bed_type = "ICU" if emergency_flag == 1 else "WARD"
+    shard = await async_resource_repo.claim_bed(bed_type)
+    if shard is None:
+        return {"error": "No ICU beds available" if bed_type == "ICU" else "No ward beds available"}
+    return {"allocated": bed_type, "bed_shard": shard}
+
 
-        ward_occupied += 1
+async def unallocate_bed_async(bed_result: dict):
+    """Give back a bed from allocate_bed_async when the booking is abandoned."""
+    if "allocated" in bed_result:
+        await async_resource_repo.unclaim_bed(bed_result["allocated"], bed_result["bed_shard"])
 
-        update_resources({
-            "ward_occupied": ward_occupied,
-            "last_updated": datetime.utcnow()
-        })
 
-        return {"allocated": "WARD"}
\ No newline at end of file
+async def discharge_patient_async(appointment_id: str) -> str:
+    """Async twin of :func:`discharge_patient`."""
+    return await async_resource_repo.release_bed(appointment_id)
@@ -7,18 +7,8 @@ Calculates a severity score (0–10) from patient age and symptom description.
 This score is consumed downstream by triage_service to set the emergency flag.
 """
 
-# ---------------------------------------------------------------------------
-# Symptom keyword → weight mapping.
-# Keys must be lowercase. Values should reflect clinical urgency.
-# ---------------------------------------------------------------------------
-SYMPTOM_WEIGHTS: dict[str, int] = {
-    "unconscious": 5,
-    "chest pain": 4,
-    "breathing difficulty": 4,
-    "fever": 2,
-    "headache": 1,
-    "vomiting": 1,
-}
+# SYMPTOM_WEIGHTS now lives with the rest of the clinical vocabulary.
+from app.services.symptom_matcher import SYMPTOM_WEIGHTS, SymptomMatch, match_symptoms  # noqa: F401
 
 # Maximum allowed severity score
 MAX_SEVERITY: int = 10
@@ -45,28 +35,24 @@ def _age_score(age: int) -> int:
     return 0
 
 
-def _symptom_score(symptoms_lower: str) -> int:
+def _symptom_score(symptoms: str) -> int:
     """
     Return cumulative symptom-based severity contribution.
 
     Parameters
     ----------
-    symptoms_lower : str
-        Patient symptom description pre-converted to lowercase.
+    symptoms : str
+        Patient symptom description (case-insensitive).
 
     Returns
     -------
     int
-        Sum of weights for all matched symptom keywords.
+        Sum of weights for all matched symptom keywords (whole words).
     """
-    return sum(
-        weight
-        for keyword, weight in SYMPTOM_WEIGHTS.items()
-        if keyword in symptoms_lower
-    )
+    return match_symptoms(symptoms).weight
 
 
-def calculate_severity(age: int, symptoms: str) -> int:
+def calculate_severity(age: int, symptoms: str, match: SymptomMatch = None) -> int:
     """
     Calculate a rule-based severity score for a patient.
 
@@ -79,6 +65,9 @@ def calculate_severity(age: int, symptoms: str) -> int:
         Patient age in years (must be > 0).
     symptoms : str
         Free-text symptom description (case-insensitive).
+    match : SymptomMatch, optional
+        Result of ``match_symptoms(symptoms)`` when the caller already
+        scanned the text (saves a second pass).
 
     Returns
     -------
@@ -94,7 +83,7 @@ def calculate_severity(age: int, symptoms: str) -> int:
     >>> calculate_severity(50, "Fever and vomiting")
     4
     """
-    symptoms_lower: str = symptoms.lower()
+    weight: int = match.weight if match is not None else _symptom_score(symptoms)
 
-    total: int = _age_score(age) + _symptom_score(symptoms_lower)
+    total: int = _age_score(age) + weight
     return min(total, MAX_SEVERITY)
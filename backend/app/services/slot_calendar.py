@@ -0,0 +1,205 @@
+"""
+slot_calendar.py
+----------------
+Bitmap day calendars for doctors and the free-slot search used by intake.
+
+A day is 96 fixed 15-minute slots (hospital local time,
+HOSPITAL_TIMEZONE). A doctor's bookings for one day are a 96-bit integer
+— bit i set = slot i taken — stored as 12 bytes in
+``doctor_calendars/{doctor_id}_{YYYY-MM-DD}`` and updated inside the
+slot-claim transaction, so two bookings can never take the same bit.
+
+Shift hours come from the doctor's ``shift_start`` / ``shift_end``
+("HH:MM", default DOCTOR_SHIFT_START / DOCTOR_SHIFT_END); a shift that
+ends before it starts wraps past midnight within the same calendar day.
+
+Free slots are ``shift & ~booked & not-yet-started``, so the search is a
+handful of integer operations per doctor per day:
+
+    first_fit   earliest free slot (lowest set bit)
+    best_fit    earliest slot in the shortest free gap that fits, which
+                keeps long gaps open for longer appointments
+
+``plan_slots`` runs that over a department's doctors across the next
+BOOKING_HORIZON_DAYS days and yields one candidate per doctor, best
+first, so a claim that loses a race falls through to the next doctor.
+"Best" keeps the least-loaded balancing intake always had: the earliest
+day with room wins, then the lowest workload on that day, and only then
+the slot the policy picked.
+"""
+
+import heapq
+import os
+from datetime import datetime, time as dt_time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES      # 96
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+BITMAP_BYTES = SLOTS_PER_DAY // 8            # 12
+
+HOSPITAL_TIMEZONE = ZoneInfo(os.environ.get("HOSPITAL_TIMEZONE", "Asia/Kolkata"))
+DEFAULT_SHIFT_START = os.environ.get("DOCTOR_SHIFT_START", "09:00")
+DEFAULT_SHIFT_END = os.environ.get("DOCTOR_SHIFT_END", "17:00")
+BOOKING_HORIZON_DAYS = int(os.environ.get("BOOKING_HORIZON_DAYS", "7"))
+SLOT_POLICY = os.environ.get("SLOT_POLICY", "first_fit")
+
+
+# ---------------------------------------------------------------------------
+# Bitmaps
+# ---------------------------------------------------------------------------
+
+def encode(bits: int) -> bytes:
+    return bits.to_bytes(BITMAP_BYTES, "little")
+
+
+def decode(data) -> int:
+    return int.from_bytes(data or b"", "little") & FULL_DAY
+
+
+def _slot_of(hhmm: str, round_up: bool = False) -> int:
+    hours, minutes = (int(part) for part in hhmm.split(":"))
+    total = hours * 60 + minutes
+    return -(-total // SLOT_MINUTES) if round_up else total // SLOT_MINUTES
+
+
+@lru_cache(maxsize=256)
+def _range_mask(start: str, end: str) -> int:
+    first, last = _slot_of(start), min(_slot_of(end, round_up=True), SLOTS_PER_DAY)
+    if last > first:
+        return ((1 << (last - first)) - 1) << first
+    # Overnight shift: evening part plus early-morning part of the same day.
+    return (FULL_DAY >> first << first) | ((1 << last) - 1)
+
+
+def shift_mask(doctor: dict) -> int:
+    """Slots inside ``doctor``'s shift."""
+    return _range_mask(
+        doctor.get("shift_start") or DEFAULT_SHIFT_START,
+        doctor.get("shift_end") or DEFAULT_SHIFT_END,
+    )
+
+
+def first_fit(free: int, length: int = 1):
+    """Lowest slot starting ``length`` consecutive free slots, or None."""
+    fits = free
+    for offset in range(1, length):
+        fits &= free >> offset
+    return (fits & -fits).bit_length() - 1 if fits else None
+
+
+def free_runs(free: int):
+    """Yield ``(start, length)`` of each run of free slots, earliest first."""
+    while free:
+        start = (free & -free).bit_length() - 1
+        shifted = free >> start
+        length = (shifted ^ (shifted + 1)).bit_length() - 1   # trailing ones
+        yield start, length
+        free &= ~(((1 << length) - 1) << start)
+
+
+def best_fit(free: int, length: int = 1):
+    """``(start, gap)`` in the shortest free run of at least ``length``, or None."""
+    best = None
+    for start, run in free_runs(free):
+        if run >= length and (best is None or run < best[1]):
+            best = (start, run)
+            if run == length:
+                break
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Days
+# ---------------------------------------------------------------------------
+
+def local_now() -> datetime:
+    return datetime.now(tz=HOSPITAL_TIMEZONE)
+
+
+def booking_days(now: datetime = None, horizon: int = BOOKING_HORIZON_DAYS) -> list:
+    """
+    ``[(date "YYYY-MM-DD", first bookable slot), ...]`` for today and the
+    next ``horizon - 1`` days; today starts at the next slot boundary.
+    """
+    now = (now or local_now()).astimezone(HOSPITAL_TIMEZONE)
+    minutes = now.hour * 60 + now.minute
+    next_slot = minutes // SLOT_MINUTES + (1 if minutes % SLOT_MINUTES or now.second else 0)
+    days = [(now.date().isoformat(), next_slot)]
+    for offset in range(1, horizon):
+        days.append(((now.date() + timedelta(days=offset)).isoformat(), 0))
+    return [(day, first) for day, first in days if first < SLOTS_PER_DAY]
+
+
+def slot_start(day: str, index: int) -> datetime:
+    midnight = datetime.combine(datetime.fromisoformat(day).date(), dt_time(), HOSPITAL_TIMEZONE)
+    return midnight + timedelta(minutes=index * SLOT_MINUTES)
+
+
+def slot_info(day: str, index: int, length: int = 1) -> dict:
+    start = slot_start(day, index)
+    return {
+        "date": day,
+        "index": index,
+        "length": length,
+        "start": start.isoformat(),
+        "end": (start + timedelta(minutes=length * SLOT_MINUTES)).isoformat(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Department search
+# ---------------------------------------------------------------------------
+
+def plan_slots(doctors: list, calendars: dict, days: list,
+               policy: str = SLOT_POLICY, length: int = 1):
+    """
+    Yield one ``(doctor, date, slot index)`` per doctor with a free slot,
+    best first (``slot_info`` turns the winner into times).
+
+    ``calendars`` maps ``(doctor_id, date)`` → booked bitmap (int);
+    missing days are empty. Each doctor is offered on their earliest day
+    with room, at the slot ``policy`` picks. Candidates are ordered by
+    that day, then workload (``current_appointments / daily_capacity``),
+    then slot, then ID. They are heapified and popped lazily, so the
+    usual case — the first claim succeeds — costs O(n), not a sort.
+    """
+    windows = [(i, day, FULL_DAY >> first << first) for i, (day, first) in enumerate(days)]
+    use_best_fit = policy == "best_fit"
+    candidates = []
+    for position, doctor in enumerate(doctors):
+        doctor_id = doctor["id"]
+        shift = shift_mask(doctor)
+        for day_index, day, window in windows:
+            free = shift & window & ~calendars.get((doctor_id, day), 0)
+            if not free:
+                continue
+            if use_best_fit:
+                fit = best_fit(free, length)
+                if fit is None:
+                    continue
+                index, rank = fit[0], fit[1]
+            else:
+                index = first_fit(free, length)
+                if index is None:
+                    continue
+                rank = index
+            load = doctor.get("current_appointments", 0) / (doctor.get("daily_capacity", 0) or 1)
+            candidates.append((day_index, load, rank, index, doctor_id, position, day))
+            break
+    heapq.heapify(candidates)
+    while candidates:
+        _, _, _, index, _, position, day = heapq.heappop(candidates)
+        yield doctors[position], day, index
+
+
+def calendar_view(doctor: dict, day: str, booked: int) -> list:
+    """Every slot of ``day`` as ``{"index", "start", "state"}`` (off / free / booked)."""
+    shift = shift_mask(doctor)
+    view = []
+    for index in range(SLOTS_PER_DAY):
+        bit = 1 << index
+        state = "booked" if booked & bit else "free" if shift & bit else "off"
+        view.append({"index": index, "start": slot_start(day, index).isoformat(), "state": state})
+    return view
@@ -11,8 +11,6 @@ Orchestrates:
 
 from typing import Any, Optional
 
-from app.services.doctor_service import assign_doctor
-
 
 def _workload_ratio(doctor: dict[str, Any]) -> float:
     """
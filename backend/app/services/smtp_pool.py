@@ -0,0 +1,250 @@
+"""
+smtp_pool.py — Pool of authenticated, reusable SMTP sessions.
+
+Opening an SMTP session costs a TCP connect, EHLO, STARTTLS and AUTH —
+several round trips before the first byte of mail. The pool keeps up to
+``max_size`` sessions logged in, hands them out LIFO (so the warmest one
+is reused), probes sessions that sat idle with NOOP before reuse, and
+transparently reconnects once if the server dropped the session.
+
+Reads config from environment variables (in addition to SMTP_*):
+    SMTP_POOL_SIZE           max open sessions per worker (default 2)
+    SMTP_POOL_IDLE_SECONDS   sessions idle longer than this are closed (default 60)
+    SMTP_STARTTLS            "0" disables STARTTLS (local relays / test sinks)
+
+Usage:
+    pool = get_pool(cfg)
+    pool.send(from_addr, to, msg_string)
+    pool.send_many([(from_addr, to, msg_string), ...])
+"""
+
+import os
+import smtplib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sessions idle for less than this are trusted without a NOOP probe.
+NOOP_AFTER_SECONDS = 1.0
+
+
+class SendAborted(Exception):
+    """A message in ``send_many`` was not sent because ``throttle`` said stop."""
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of logged-in ``smtplib.SMTP`` sessions."""
+
+    def __init__(self, host: str, port: int, user: str = "", password: str = "",
+                 starttls: bool = True, max_size: int = 2,
+                 idle_seconds: float = 60.0, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.max_size = max(1, max_size)
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+
+        self._idle: list = []          # stack of (session, last_used)
+        self._open = 0                 # sessions checked out + idle
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"connects": 0, "reuses": 0, "noop_failures": 0, "reconnects": 0}
+
+    # -- session lifecycle ---------------------------------------------------
+
+    def _connect(self) -> smtplib.SMTP:
+        session = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            session.ehlo()
+            if self.starttls:
+                session.starttls()
+                session.ehlo()
+            if self.user and self.password:
+                session.login(self.user, self.password)
+        except Exception:
+            _close_quietly(session)
+            raise
+        self.stats["connects"] += 1
+        return session
+
+    def _alive(self, session: smtplib.SMTP) -> bool:
+        try:
+            return session.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                # Drop sessions that idled past the server's likely timeout.
+                while self._idle and now - self._idle[0][1] > self.idle_seconds:
+                    stale, _ = self._idle.pop(0)
+                    self._open -= 1
+                    _close_quietly(stale)
+                if self._idle:
+                    session, last_used = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    session, last_used = None, None
+                    break
+                self._cond.wait()
+
+        if session is None:
+            try:
+                return self._connect()
+            except Exception:
+                self._discard(None)
+                raise
+
+        if time.monotonic() - last_used > NOOP_AFTER_SECONDS and not self._alive(session):
+            self.stats["noop_failures"] += 1
+            _close_quietly(session)
+            try:
+                return self._connect()
+            except Exception:
+                self._discard(None)
+                raise
+        self.stats["reuses"] += 1
+        return session
+
+    def _checkin(self, session: smtplib.SMTP):
+        with self._cond:
+            if not self._closed:
+                self._idle.append((session, time.monotonic()))
+                self._cond.notify()
+                return
+            self._open -= 1
+        _close_quietly(session)
+
+    def _discard(self, session):
+        if session is not None:
+            _close_quietly(session)
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    # -- sending -------------------------------------------------------------
+
+    def _send_on(self, session, from_addr: str, to: str, msg: str):
+        """Send over ``session``; returns the (possibly reconnected) session."""
+        try:
+            session.sendmail(from_addr, to, msg)
+            return session
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server closed an idle session between NOOP and send.
+            self.stats["reconnects"] += 1
+            _close_quietly(session)
+            session = self._connect()
+            session.sendmail(from_addr, to, msg)
+            return session
+
+    def send(self, from_addr: str, to: str, msg: str):
+        """Send one message over a pooled session."""
+        self.send_many([(from_addr, to, msg)], raise_errors=True)
+
+    def send_many(self, messages, raise_errors: bool = False, throttle=None) -> list:
+        """
+        Send ``[(from_addr, to, msg), ...]`` over a single session.
+
+        Returns one entry per message: ``None`` on success or the exception
+        that message failed with. A recipient refusal doesn't end the
+        session; a connection failure that survives one reconnect aborts
+        the remaining messages with that error.
+
+        ``throttle()`` is called before each message (e.g. a rate limiter's
+        blocking acquire); if it returns False the remaining messages are
+        not sent and fail with ``SendAborted``.
+        """
+        results = []
+        session = self._checkout()
+        healthy = True
+        try:
+            for index, (from_addr, to, msg) in enumerate(messages):
+                if throttle is not None and not throttle():
+                    results.extend([SendAborted("send aborted before delivery")]
+                                   * (len(messages) - index))
+                    break
+                try:
+                    session = self._send_on(session, from_addr, to, msg)
+                    results.append(None)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError,
+                        smtplib.SMTPSenderRefused) as exc:
+                    if raise_errors:
+                        raise
+                    results.append(exc)
+                except Exception as exc:
+                    healthy = False
+                    if raise_errors:
+                        raise
+                    results.extend([exc] * (len(messages) - index))
+                    break
+        finally:
+            if healthy:
+                self._checkin(session)
+            else:
+                self._discard(session)
+        return results
+
+    def close(self):
+        """Close every idle session (checked-out ones close on check-in)."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for session, _ in idle:
+            _close_quietly(session)
+
+
+def _close_quietly(session):
+    try:
+        session.quit()
+    except Exception:
+        try:
+            session.close()
+        except Exception:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Process-wide pool, rebuilt if the SMTP config changes
+# ---------------------------------------------------------------------------
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(cfg: dict) -> SMTPConnectionPool:
+    """Return the shared pool for SMTP config ``cfg`` (see email_service)."""
+    global _pool, _pool_key
+    key = (cfg["host"], cfg["port"], cfg["user"], cfg["password"])
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.close()
+            _pool = SMTPConnectionPool(
+                cfg["host"], cfg["port"], cfg["user"], cfg["password"],
+                starttls=os.environ.get("SMTP_STARTTLS", "1") != "0",
+                max_size=int(os.environ.get("SMTP_POOL_SIZE", "2")),
+                idle_seconds=float(os.environ.get("SMTP_POOL_IDLE_SECONDS", "60")),
+            )
+            _pool_key = key
+        return _pool
+
+
+def close_pool():
+    """Close the shared pool's idle sessions (called at shutdown)."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool, _pool_key = None, None
@@ -0,0 +1,162 @@
+"""
+symptom_matcher.py
+------------------
+Single-pass symptom keyword matcher shared by triage and severity scoring.
+
+All clinical terms (severe / moderate triage keywords and severity
+weights) are compiled once, at import, into an Aho–Corasick automaton
+whose alphabet is whole words. ``match_symptoms`` splits the lowercased
+text into words, walks them once and returns every matched term together
+with the triage flags and the severity weight, so scanning cost depends
+on the text length, not on the vocabulary size.
+
+Working on words makes matches respect word boundaries: "pain" matches
+"chest pain" but not "painting". Words are runs of letters and digits,
+so "chest   pain" and "chest-pain" match "chest pain". A plural "s" on
+a term's last word is accepted ("headaches").
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, NamedTuple
+
+# ---------------------------------------------------------------------------
+# Vocabulary. Keys must be lowercase.
+# ---------------------------------------------------------------------------
+SEVERE_KEYWORDS = [
+    "chest pain", "breathlessness", "unconscious", "seizure", "stroke",
+    "heart attack", "severe bleeding", "paralysis", "trauma", "cardiac arrest",
+    "difficulty breathing", "shortness of breath", "fainting", "collapse",
+]
+
+MODERATE_KEYWORDS = [
+    "fever", "vomiting", "dizziness", "headache", "nausea", "pain",
+    "swelling", "cough", "fatigue", "weakness", "infection", "fracture",
+    "sprain", "diarrhea", "abdominal pain",
+]
+
+# Symptom keyword → severity weight (clinical urgency).
+SYMPTOM_WEIGHTS: Dict[str, int] = {
+    "unconscious": 5,
+    "chest pain": 4,
+    "breathing difficulty": 4,
+    "fever": 2,
+    "headache": 1,
+    "vomiting": 1,
+}
+
+
+class SymptomMatch(NamedTuple):
+    """Result of one scan."""
+
+    terms: FrozenSet[str]
+    severe: bool
+    moderate: bool
+    weight: int  # sum of SYMPTOM_WEIGHTS over distinct matched terms
+
+
+class _Term(NamedTuple):
+    text: str
+    severe: bool
+    moderate: bool
+    weight: int
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+_NO_MATCH = SymptomMatch(terms=frozenset(), severe=False, moderate=False, weight=0)
+
+
+class SymptomMatcher:
+    """Word-level Aho–Corasick automaton over a fixed vocabulary of lowercase terms."""
+
+    def __init__(self, severe: Iterable[str] = (), moderate: Iterable[str] = (),
+                 weights: Dict[str, int] = None):
+        severe, moderate, weights = set(severe), set(moderate), dict(weights or {})
+        vocabulary = sorted(severe | moderate | set(weights))
+        self._terms = [
+            _Term(term, term in severe, term in moderate, weights.get(term, 0))
+            for term in vocabulary
+        ]
+
+        # Word sequences to recognise: each term, plus its plural unless
+        # that spelling is a term of its own.
+        patterns = {}
+        for index, term in enumerate(self._terms):
+            patterns[tuple(_WORD.findall(term.text))] = index
+        for index, term in enumerate(self._terms):
+            words = tuple(_WORD.findall(term.text))
+            if words:
+                patterns.setdefault(words[:-1] + (words[-1] + "s",), index)
+
+        # goto[state] maps a word to the next state; state 0 is the root.
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]   # state → term indexes ending here
+        for words, index in patterns.items():
+            state = 0
+            for word in words:
+                nxt = self._goto[state].get(word)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][word] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (index,)
+
+        # Breadth-first pass to set failure links and inherit their outputs.
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, nxt in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def __len__(self):
+        return len(self._terms)
+
+    @property
+    def terms(self) -> list:
+        """Vocabulary in index order, as ``(text, severe, moderate, weight)``."""
+        return list(self._terms)
+
+    def scan_indices(self, text: str) -> set:
+        """Indexes (into ``terms``) of every vocabulary term in ``text``, in one pass."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for word in _WORD.findall(text.lower()):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def scan(self, text: str) -> SymptomMatch:
+        """Find every vocabulary term in ``text`` in a single pass."""
+        found = self.scan_indices(text)
+        if not found:
+            return _NO_MATCH
+
+        terms = [self._terms[index] for index in found]
+        return SymptomMatch(
+            terms=frozenset(term.text for term in terms),
+            severe=any(term.severe for term in terms),
+            moderate=any(term.moderate for term in terms),
+            weight=sum(term.weight for term in terms),
+        )
+
+
+# Built once at import and shared by every request.
+MATCHER = SymptomMatcher(SEVERE_KEYWORDS, MODERATE_KEYWORDS, SYMPTOM_WEIGHTS)
+
+
+def match_symptoms(symptoms: str) -> SymptomMatch:
+    """Scan free-text symptoms against the clinical vocabulary."""
+    return MATCHER.scan(symptoms or "")
@@ -1,12 +1,108 @@
 """
 wait_time_service.py
 --------------------
-Calculates predicted wait time based on doctor load.
+Calculates predicted wait time based on doctor load and observed
+consultation durations.
+
+Each doctor (and each department) carries a streaming estimate of its
+consultation length — an exponentially weighted mean and variance —
+stored as three numbers:
+
+    consultation_stats = {"n": completed consultations,
+                          "mean": minutes, "var": minutes²}
+
+``update_consultation_stats`` folds one completed consultation into that
+state in O(1); nothing ever rescans appointment history. Recent
+consultations weigh more (CONSULTATION_EWMA_ALPHA, default 0.1 ≈ the
+last ~20 consultations), and the first 1/alpha observations use a plain
+running mean so a new doctor's estimate isn't anchored to the default.
+
+Wait time for k patients ahead is the sum of k consultations: mean
+k·μ and variance k·σ², reported with normal-approximation percentile
+bounds. Doctors with fewer than CONSULTATION_MIN_SAMPLES completed
+consultations borrow their department's estimate, then fall back to
+``avg_consultation_time`` (default 15 min).
 """
 
-def calculate_wait_time(doctor: dict) -> int:
+import math
+import os
+
+EWMA_ALPHA = float(os.environ.get("CONSULTATION_EWMA_ALPHA", "0.1"))
+MIN_SAMPLES = int(os.environ.get("CONSULTATION_MIN_SAMPLES", "5"))
+
+DEFAULT_CONSULTATION_MINUTES = 15
+# Spread assumed before any durations are observed (coefficient of variation).
+DEFAULT_CONSULTATION_CV = 0.5
+# Durations are clamped to this range so one forgotten "complete" click
+# can't swamp the estimate.
+MIN_CONSULTATION_MINUTES = 1
+MAX_CONSULTATION_MINUTES = 240
+
+# Standard-normal z of the 90th percentile (the 10th is its mirror image).
+_Z_90 = 1.2816
+
+
+def update_consultation_stats(stats: dict, minutes: float, alpha: float = EWMA_ALPHA) -> dict:
+    """Return ``stats`` with one more consultation of ``minutes`` folded in."""
+    minutes = min(max(float(minutes), MIN_CONSULTATION_MINUTES), MAX_CONSULTATION_MINUTES)
+    n = int((stats or {}).get("n", 0))
+    if n == 0:
+        return {"n": 1, "mean": minutes, "var": 0.0}
+    mean = float(stats["mean"])
+    var = float(stats.get("var", 0.0))
+    weight = max(alpha, 1.0 / (n + 1))
+    diff = minutes - mean
+    step = weight * diff
+    return {
+        "n": n + 1,
+        "mean": mean + step,
+        "var": (1 - weight) * (var + diff * step),
+    }
+
+
+def consultation_estimate(doctor: dict, department_stats: dict = None) -> tuple:
+    """
+    ``(mean, variance, source)`` of one consultation with ``doctor``;
+    ``source`` is "doctor", "department" or "default".
+    """
+    for source, stats in (("doctor", doctor.get("consultation_stats")),
+                          ("department", department_stats)):
+        if stats and stats.get("n", 0) >= MIN_SAMPLES:
+            return float(stats["mean"]), float(stats.get("var", 0.0)), source
+    mean = float(doctor.get("avg_consultation_time", DEFAULT_CONSULTATION_MINUTES))
+    return mean, (DEFAULT_CONSULTATION_CV * mean) ** 2, "default"
+
+
+def patients_waiting(doctor: dict) -> int:
+    """Assigned patients whose consultation hasn't been completed yet."""
+    completed = (doctor.get("consultation_stats") or {}).get("n", 0)
+    return max(doctor.get("current_appointments", 0) - completed, 0)
+
+
+def estimate_wait_time(doctor: dict, department_stats: dict = None) -> dict:
     """
-    Wait time = current_appointments × avg_consultation_time (default 15 min)
+    Wait for a patient just booked with ``doctor``: the ``queue_position``
+    set by the claim when known, else everyone else still waiting is
+    ahead of them.
+
+        {"minutes": expected, "p10": ..., "p90": ..., "patients_ahead": k,
+         "source": "doctor" | "department" | "default"}
     """
-    avg_time = doctor.get("avg_consultation_time", 15)
-    return doctor.get("current_appointments", 0) * avg_time
\ No newline at end of file
+    ahead = doctor.get("queue_position")
+    if ahead is None:
+        ahead = max(patients_waiting(doctor) - 1, 0)
+    mean, var, source = consultation_estimate(doctor, department_stats)
+    expected = ahead * mean
+    spread = math.sqrt(ahead * var)
+    return {
+        "minutes": round(expected),
+        "p10": max(round(expected - _Z_90 * spread), 0),
+        "p90": round(expected + _Z_90 * spread),
+        "patients_ahead": ahead,
+        "source": source,
+    }
+
+
+def calculate_wait_time(doctor: dict, department_stats: dict = None) -> int:
+    """Expected wait in minutes (see estimate_wait_time)."""
+    return estimate_wait_time(doctor, department_stats)["minutes"]
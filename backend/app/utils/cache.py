@@ -0,0 +1,103 @@
+"""
+cache.py — Single-flight TTL cache for hot read endpoints.
+
+Concurrent callers asking for the same key while it is being loaded wait
+for that one in-flight load instead of each running their own Firestore
+scan; the result is then served from memory until the TTL expires or a
+write invalidates it.
+
+The cache is per worker process: ``invalidate()`` clears this worker
+only, other gunicorn workers catch up when their TTL expires.
+
+Usage:
+    from app.utils.cache import SingleFlightCache
+
+    doctors_cache = SingleFlightCache("doctors", ttl_seconds=5)
+    doctors = doctors_cache.get("all", get_all_doctors)
+    doctors_cache.invalidate()
+"""
+
+import os
+import threading
+import time
+
+from app.utils.metrics import READ_CACHE_EVENTS
+
+DEFAULT_TTL_SECONDS = float(os.environ.get("READ_CACHE_TTL_SECONDS", "5"))
+
+
+class _InFlight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """Thread-safe TTL cache where each key is loaded by at most one caller at a time."""
+
+    def __init__(self, name: str, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict = {}      # key → (value, expires_at)
+        self._inflight: dict = {}     # key → _InFlight
+        self._generation = 0          # bumped by invalidate()
+        self._lock = threading.Lock()
+        self._hit = READ_CACHE_EVENTS.labels(name, "hit")
+        self._miss = READ_CACHE_EVENTS.labels(name, "miss")
+        self._coalesced = READ_CACHE_EVENTS.labels(name, "coalesced")
+        self.counts = {"hit": 0, "miss": 0, "coalesced": 0}
+
+    def get(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.counts["hit"] += 1
+                self._hit.inc()
+                return entry[0]
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                leader = False
+                self.counts["coalesced"] += 1
+                self._coalesced.inc()
+            else:
+                leader = True
+                flight = _InFlight()
+                self._inflight[key] = flight
+                generation = self._generation
+                self.counts["miss"] += 1
+                self._miss.inc()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                # A write that invalidated mid-load may not be reflected in
+                # this result, so only cache it if no invalidation happened.
+                if flight.error is None and generation == self._generation:
+                    self._entries[key] = (flight.value, time.monotonic() + self.ttl_seconds)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, key=None):
+        """Drop ``key`` (or every key) so the next read reloads."""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -1,24 +1,44 @@
 """
-jwt_utils.py — JWT token creation, decoding, and FastAPI dependency.
+jwt_utils.py — JWT token creation, decoding, and FastAPI dependencies.
+
+Verified tokens are kept in a bounded LRU (TOKEN_CACHE_SIZE entries per
+worker, default 10000) until they expire, so repeat requests with the
+same token skip the parse + HMAC check. Every request, cached or not,
+is checked against the shared revocation list (see revocation_repo);
+``revoke_token`` is how logout invalidates a token before its expiry.
+Tokens carry a ``jti`` for that purpose — ones issued before it was
+added can't be revoked individually and simply run out.
 
 Usage:
     from app.utils.jwt_utils import create_token, decode_token, get_current_user
+    from app.utils.jwt_utils import require_admin, require_doctor
 """
 
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 
 import jwt
-from fastapi import Request, HTTPException
+from fastapi import Depends, Request, HTTPException
+
+from app.db.revocation_repo import revocations
+from app.utils.metrics import READ_CACHE_EVENTS
 
 JWT_SECRET = os.environ.get("JWT_SECRET", "aarogyalekha-default-secret-change-me")
 JWT_ALGORITHM = "HS256"
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "10000"))
 
 
 def create_token(payload: dict, expires_hours: int = 24) -> str:
-    """Create a signed JWT with the given payload and expiry."""
+    """Create a signed JWT with the given payload, a unique ``jti`` and expiry."""
     data = payload.copy()
-    data["exp"] = datetime.now(tz=timezone.utc) + timedelta(hours=expires_hours)
+    now = datetime.now(tz=timezone.utc)
+    data["iat"] = now
+    data["exp"] = now + timedelta(hours=expires_hours)
+    data["jti"] = uuid.uuid4().hex
     return jwt.encode(data, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
@@ -32,6 +52,87 @@ def decode_token(token: str) -> dict:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+# ---------------------------------------------------------------------------
+# Verified-token cache
+# ---------------------------------------------------------------------------
+
+class TokenCache:
+    """LRU of ``token → claims`` whose entries lapse at the token's ``exp``."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._entries: OrderedDict = OrderedDict()  # token → (claims, exp epoch)
+        self._lock = threading.Lock()
+        self._hit = READ_CACHE_EVENTS.labels("tokens", "hit")
+        self._miss = READ_CACHE_EVENTS.labels("tokens", "miss")
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._entries.move_to_end(token)
+                    self._hit.inc()
+                    return entry[0]
+                del self._entries[token]
+        self._miss.inc()
+        return None
+
+    def put(self, token: str, claims: dict):
+        expires = claims.get("exp")
+        if expires is None:
+            return  # never cache a token that doesn't expire
+        with self._lock:
+            self._entries[token] = (claims, float(expires))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+def verify_token(token: str) -> dict:
+    """Claims of a valid, unrevoked ``token`` (cached). Raises HTTPException(401)."""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        token_cache.put(token, claims)
+    if revocations.is_revoked(claims.get("jti")):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return claims
+
+
+def revoke_token(token: str, claims: dict):
+    """Revoke ``token`` (already verified → ``claims``) in every worker."""
+    if claims.get("jti"):
+        revocations.revoke(
+            claims["jti"],
+            datetime.fromtimestamp(claims["exp"], tz=timezone.utc),
+            subject=str(claims.get("sub", "")),
+        )
+    token_cache.discard(token)
+
+
+# ---------------------------------------------------------------------------
+# FastAPI dependencies
+# ---------------------------------------------------------------------------
+
+def bearer_token(request: Request) -> str:
+    """The raw token from ``Authorization: Bearer ...``. Raises HTTPException(401)."""
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
+    return auth_header[7:]  # strip "Bearer "
+
+
 def get_current_user(request: Request) -> dict:
     """
     FastAPI dependency – extracts the JWT from the Authorization header
@@ -42,8 +143,18 @@ def get_current_user(request: Request) -> dict:
         def protected_route(user: dict = Depends(get_current_user)):
             ...
     """
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-    token = auth_header[7:]  # strip "Bearer "
-    return decode_token(token)
+    return verify_token(bearer_token(request))
+
+
+def require_admin(user: dict = Depends(get_current_user)) -> dict:
+    """Like get_current_user, but 403 unless the token is an admin's."""
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+
+def require_doctor(user: dict = Depends(get_current_user)) -> dict:
+    """Like get_current_user, but 403 unless the token is a doctor's."""
+    if user.get("role") != "doctor":
+        raise HTTPException(status_code=403, detail="Doctor access required")
+    return user
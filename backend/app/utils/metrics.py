@@ -0,0 +1,179 @@
+"""
+metrics.py — Prometheus instrumentation for AarogyaLekha.
+
+Exposes per-stage latency histograms for the appointment intake pipeline,
+per-route request, latency and error metrics, and read-cache counters.
+
+Under gunicorn, ``start.sh`` sets ``PROMETHEUS_MULTIPROC_DIR`` so every
+worker writes its samples to shared mmap files and ``/metrics`` returns
+the aggregate across all workers. Without it the in-process registry is
+used (``uvicorn --reload`` during development).
+
+Usage:
+    from app.utils.metrics import stage_timer
+
+    with stage_timer("triage"):
+        ...
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Step names of submit_appointment, in pipeline order.
+INTAKE_STAGES = (
+    "triage",
+    "severity",
+    "assign_doctor",
+    "wait_time",
+    "allocate_bed",
+    "workload",
+    "emergency_reschedule",
+    "reschedule_email",
+    "persist",
+    "email",
+    "response",
+)
+
+# Stages range from microseconds (triage) to seconds (SMTP), so the
+# buckets span both ends.
+_STAGE_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+STAGE_LATENCY = Histogram(
+    "intake_stage_duration_seconds",
+    "Latency of each submit_appointment pipeline stage",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template, method and status code",
+    ["method", "route", "status"],
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "End-to-end HTTP request latency by route template",
+    ["method", "route"],
+    buckets=_STAGE_BUCKETS,
+)
+
+ERRORS = Counter(
+    "http_request_errors_total",
+    "Requests that failed with a 5xx response or an unhandled exception",
+    ["method", "route", "kind"],
+)
+
+EMAIL_OUTBOX_EVENTS = Counter(
+    "email_outbox_events_total",
+    "Email outbox lifecycle events (queued, sent, retried, failed, skipped)",
+    ["event"],
+)
+
+DOCTOR_ASSIGNMENT_EVENTS = Counter(
+    "doctor_assignment_events_total",
+    "Doctor assignment: assigned, retry (claim transaction re-run), "
+    "conflict (candidate skipped after repeated conflicts), fallback "
+    "(moved to the next candidate), abort (gave up under contention), "
+    "no_capacity (no doctor with spare capacity), preempted (emergency "
+    "placed by rescheduling less urgent patients)",
+    ["event"],
+)
+
+READ_CACHE_EVENTS = Counter(
+    "read_cache_events_total",
+    "Single-flight read cache lookups by outcome (hit, miss, coalesced)",
+    ["cache", "event"],
+)
+
+PASSWORD_POOL_EVENTS = Counter(
+    "password_pool_events_total",
+    "bcrypt process pool calls: submitted, rejected (queue-depth limit reached)",
+    ["event"],
+)
+
+# Resolve label children once so the hot path does no label lookups.
+_STAGE_CHILDREN = {name: STAGE_LATENCY.labels(name) for name in INTAKE_STAGES}
+
+
+def stage_timer(stage: str):
+    """Context manager that records the duration of one intake stage."""
+    return _STAGE_CHILDREN[stage].time()
+
+
+def render_metrics() -> tuple:
+    """Return ``(body, content_type)`` for the /metrics endpoint."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Gunicorn ``child_exit`` hook: drop live gauges of a dead worker."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request counts, latency and errors.
+
+    Routes are labelled by their template (``/api/doctor/profile/{doctor_id}``)
+    rather than the raw path to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            route = _route_label(scope)
+            ERRORS.labels(scope["method"], route, "exception").inc()
+            REQUESTS.labels(scope["method"], route, "500").inc()
+            raise
+        else:
+            route = _route_label(scope)
+            status = status_holder[0]
+            REQUESTS.labels(scope["method"], route, str(status)).inc()
+            if status >= 500:
+                ERRORS.labels(scope["method"], route, "server_error").inc()
+        finally:
+            # Failed requests count too: they are often the slowest.
+            REQUEST_LATENCY.labels(scope["method"], _route_label(scope)).observe(
+                time.perf_counter() - start
+            )
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -1,12 +1,44 @@
 """
 password_utils.py — bcrypt-based password hashing for AarogyaLekha.
 
+bcrypt costs ~250 ms of CPU per call by design. Request handlers use the
+async variants, which run bcrypt in a small pool of worker processes so
+a login storm neither blocks the event loop nor competes for this
+worker's GIL with intake requests. At most ``PASSWORD_POOL_MAX_PENDING``
+calls may be queued or running per worker; beyond that the call fails
+fast with ``PasswordPoolBusy`` (the routes answer 503 + Retry-After)
+instead of letting the queue — and every login's latency — grow without
+bound.
+
+The pool processes run at a lower scheduling priority, so when the CPU
+is saturated the kernel favours the process serving intake requests.
+
+Reads config from environment variables:
+    PASSWORD_POOL_WORKERS       bcrypt processes per app worker (default 2;
+                                0 = hash in the worker's threadpool)
+    PASSWORD_POOL_MAX_PENDING   queued + running calls before rejecting (default 32)
+    PASSWORD_POOL_NICE          niceness added to the pool processes (default 10)
+
 Usage:
     from app.utils.password_utils import hash_password, verify_password
+    ok = await verify_password_async(plain, stored_hash)   # in async routes
 """
 
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import bcrypt
 
+from app.utils.metrics import PASSWORD_POOL_EVENTS
+
+POOL_WORKERS = int(os.environ.get("PASSWORD_POOL_WORKERS", "2"))
+POOL_MAX_PENDING = int(os.environ.get("PASSWORD_POOL_MAX_PENDING", "32"))
+POOL_NICE = int(os.environ.get("PASSWORD_POOL_NICE", "10"))
+
 
 def hash_password(plain: str) -> str:
     """Hash a plaintext password and return the bcrypt hash as a UTF-8 string."""
@@ -16,3 +48,96 @@ def hash_password(plain: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     """Compare a plaintext password against a stored bcrypt hash."""
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+
+
+# ---------------------------------------------------------------------------
+# Process pool
+# ---------------------------------------------------------------------------
+
+class PasswordPoolBusy(Exception):
+    """Too many password hashes are already queued in this worker."""
+
+
+_pool = None
+_pending = 0
+_pool_lock = threading.Lock()
+
+_SUBMITTED = PASSWORD_POOL_EVENTS.labels("submitted")
+_REJECTED = PASSWORD_POOL_EVENTS.labels("rejected")
+
+
+def _lower_priority(increment: int):
+    if increment and hasattr(os, "nice"):
+        os.nice(increment)
+
+
+def start_password_pool():
+    """
+    Create the worker processes (called at startup; otherwise on first
+    use). Returns the executor, or None when PASSWORD_POOL_WORKERS is 0.
+    """
+    global _pool
+    if POOL_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # "spawn": forking a worker that already runs gRPC / listener
+            # threads is unsafe, and the children only need bcrypt.
+            _pool = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_lower_priority,
+                initargs=(POOL_NICE,),
+            )
+            # Start the processes now rather than on the first login.
+            for _ in range(POOL_WORKERS):
+                _pool.submit(int)
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stop_password_pool():
+    """Shut the worker processes down (called at shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run(fn, *args):
+    global _pending
+    with _pool_lock:
+        if _pending >= POOL_MAX_PENDING:
+            _REJECTED.inc()
+            raise PasswordPoolBusy(f"{_pending} password hashes pending")
+        _pending += 1
+    _SUBMITTED.inc()
+    try:
+        pool = _pool or start_password_pool()  # None → default threadpool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # A child died (e.g. OOM-killed); start a fresh pool next call.
+            _discard_pool(pool)
+            raise
+    finally:
+        with _pool_lock:
+            _pending -= 1
+
+
+async def hash_password_async(plain: str) -> str:
+    """:func:`hash_password` in the process pool. Raises PasswordPoolBusy."""
+    return await _run(hash_password, plain)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """:func:`verify_password` in the process pool. Raises PasswordPoolBusy."""
+    return await _run(verify_password, plain, hashed)
@@ -0,0 +1 @@
+# Benchmark suites for the AarogyaLekha backend (run from the backend directory)
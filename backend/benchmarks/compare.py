@@ -0,0 +1,57 @@
+"""
+compare.py — Diff two benchmark result files.
+
+    python -m benchmarks.compare results/v3.0.json results/v3.1.json
+
+Prints throughput and latency percentiles side by side with the relative
+change for every phase present in both runs.
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors"]
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(baseline: dict, candidate: dict) -> list:
+    """Return rows of ``(phase, metric, baseline, candidate, change)``."""
+    rows = []
+    for phase, old in baseline.get("results", {}).items():
+        new = candidate.get("results", {}).get(phase)
+        if new is None:
+            continue
+        for metric in METRICS:
+            if metric in old and metric in new:
+                rows.append((phase, metric, old[metric], new[metric],
+                             _change(old[metric], new[metric])))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = _load(args.baseline), _load(args.candidate)
+    print(f"baseline:  {baseline.get('git_revision')}  {baseline.get('started_at')}")
+    print(f"candidate: {candidate.get('git_revision')}  {candidate.get('started_at')}")
+    print(f"{'phase':<22}{'metric':<16}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    for phase, metric, old, new, change in compare(baseline, candidate):
+        print(f"{phase:<22}{metric:<16}{old:>12}{new:>12}{change:>10}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
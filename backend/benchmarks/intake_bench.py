@@ -0,0 +1,138 @@
+"""
+intake_bench.py — End-to-end load benchmark for the appointment pipeline.
+
+Seeds the memory storage backend with synthetic doctors and resources,
+then measures throughput and p50/p95/p99 latency for:
+
+    POST /api/submit-appointment
+    GET  /api/doctors
+    GET  /api/appointments
+    GET  /api/admin/stats
+
+Run from the backend directory:
+
+    python -m benchmarks.intake_bench --requests 500 --concurrency 16 \
+        --latency-ms 20 --jitter-ms 5 --output results/intake.json
+
+``--mode uvicorn`` runs the app in a real uvicorn subprocess instead of
+in-process. SMTP settings are cleared so no real email is sent. Results
+are written as JSON (see ``benchmarks.compare`` to diff two runs).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.load_driver import (
+    BACKEND_DIR,
+    inprocess_client,
+    run_phase,
+    uvicorn_client,
+)
+from benchmarks.synthetic import SyntheticData
+
+SCHEMA_VERSION = 1
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--requests", type=int, default=300,
+                        help="intake requests to send")
+    parser.add_argument("--read-requests", type=int, default=100,
+                        help="requests per read endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--doctors-per-department", type=int, default=4)
+    parser.add_argument("--historic-appointments", type=int, default=0,
+                        help="pre-existing appointments to seed")
+    parser.add_argument("--severe-ratio", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated Firestore round-trip latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="write JSON results to this path")
+    return parser.parse_args(argv)
+
+
+async def _run(args) -> dict:
+    data = SyntheticData(
+        seed=args.seed,
+        doctors_per_department=args.doctors_per_department,
+        severe_ratio=args.severe_ratio,
+    )
+    fixture = data.fixture(historic_appointments=args.historic_appointments)
+    patients = data.patients(args.requests)
+
+    env = {
+        "MEMORY_DB_LATENCY_MS": str(args.latency_ms),
+        "MEMORY_DB_JITTER_MS": str(args.jitter_ms),
+        "MEMORY_DB_SEED": str(args.seed),
+        # Never send real mail from a benchmark.
+        "SMTP_HOST": "",
+        "SMTP_USER": "",
+        "SMTP_PASSWORD": "",
+    }
+
+    if args.mode == "inprocess":
+        os.environ.update(env)
+        target = inprocess_client(fixture)
+    else:
+        target = uvicorn_client(fixture, env)
+
+    phases = {}
+    async with target as client:
+        phases["submit_appointment"] = await run_phase(
+            client,
+            lambda c, i: c.post("/api/submit-appointment", json=patients[i]),
+            args.requests, args.concurrency,
+        )
+        for name, path in (
+            ("list_doctors", "/api/doctors"),
+            ("list_appointments", "/api/appointments"),
+            ("admin_stats", "/api/admin/stats"),
+        ):
+            phases[name] = await run_phase(
+                client, lambda c, i, p=path: c.get(p),
+                args.read_requests, args.concurrency,
+            )
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "benchmark": "intake",
+        "started_at": datetime.now(tz=timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": phases,
+    }
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    report = asyncio.run(_run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
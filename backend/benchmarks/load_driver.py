@@ -0,0 +1,173 @@
+"""
+load_driver.py — Closed-loop HTTP load driver used by the benchmark suites.
+
+Drives the FastAPI app either in-process (httpx ASGI transport, no sockets)
+or against a real uvicorn server started as a subprocess, keeping a fixed
+number of requests in flight and recording per-request latency.
+"""
+
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies_s: list, errors: int, elapsed_s: float) -> dict:
+    """Reduce raw latencies (seconds) to the numbers we report and compare."""
+    ordered = sorted(latencies_s)
+    count = len(ordered)
+    to_ms = 1000.0
+    return {
+        "requests": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed_s, 4),
+        "throughput_rps": round(count / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / count * to_ms, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * to_ms, 3),
+        "p95_ms": round(percentile(ordered, 95) * to_ms, 3),
+        "p99_ms": round(percentile(ordered, 99) * to_ms, 3),
+        "max_ms": round(ordered[-1] * to_ms, 3) if count else 0.0,
+    }
+
+
+async def run_phase(client: httpx.AsyncClient,
+                    make_request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+                    total: int, concurrency: int) -> dict:
+    """
+    Issue ``total`` requests with at most ``concurrency`` in flight.
+
+    ``make_request(client, i)`` sends the i-th request; any non-2xx status
+    or transport error counts as an error and is excluded from latencies.
+    """
+    latencies: list = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+# ---------------------------------------------------------------------------
+# Targets
+# ---------------------------------------------------------------------------
+
+@asynccontextmanager
+async def inprocess_client(fixture: dict):
+    """
+    Yield an httpx client bound directly to ``app.main:app``, inside the
+    app's lifespan (warm-up, listeners, worker pools) like ``uvicorn_client``
+    — ``ASGITransport`` alone never runs it.
+    """
+    os.environ["DB_BACKEND"] = "memory"
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+    from app.db.firebase import db
+    db.reset()
+    db.load(fixture)
+
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     timeout=120.0) as client:
+            yield client
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def write_fixture(fixture: dict) -> str:
+    """Write ``fixture`` to a temp file for MEMORY_DB_FIXTURE; the caller deletes it."""
+    from app.db.memory_store import MemoryClient
+
+    # Round-trip through a store so datetimes get the fixture encoding.
+    staging = MemoryClient()
+    staging.load(fixture)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+        json.dump(staging.dump(), fh)
+        return fh.name
+
+
+@asynccontextmanager
+async def uvicorn_client(fixture: dict, env: dict):
+    """
+    Start ``uvicorn app.main:app`` on a free port with the memory backend
+    preloaded from ``fixture`` and yield a client pointed at it.
+
+    Only one worker is started: each process has its own memory store.
+    """
+    fixture_path = write_fixture(fixture)
+    port = free_port()
+    proc_env = {
+        **os.environ,
+        **env,
+        "DB_BACKEND": "memory",
+        "MEMORY_DB_FIXTURE": fixture_path,
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=proc_env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120.0,
+                                     limits=httpx.Limits(max_connections=1000)) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    if proc.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("uvicorn failed to start")
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        os.unlink(fixture_path)
@@ -0,0 +1,152 @@
+"""
+login_bench.py — Intake latency during a login storm (shift change).
+
+Seeds the memory backend with synthetic doctors plus bcrypt credentials
+for ``--accounts`` of them, then measures:
+
+    intake_alone          POST /api/submit-appointment on its own
+    intake_during_logins  the same intake load while doctors log in
+    logins                POST /api/doctor/login, run alongside the above
+
+Compare a run with the bcrypt process pool against one that hashes in
+the worker's threadpool (``--pool-workers 0``):
+
+    python -m benchmarks.login_bench --mode uvicorn --requests 400 \
+        --logins 200 --login-concurrency 32 --output results/login.json
+    python -m benchmarks.login_bench --mode uvicorn --pool-workers 0 ...
+
+Logins rejected by the queue-depth limit (503) are reported in
+``logins.rejected`` and count as errors.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+from app.utils.password_utils import hash_password
+from benchmarks.intake_bench import SCHEMA_VERSION, _git_revision
+from benchmarks.load_driver import inprocess_client, run_phase, uvicorn_client
+from benchmarks.synthetic import SyntheticData
+
+PASSWORD = "shift-change-42"
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--requests", type=int, default=300,
+                        help="intake requests per intake phase")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="intake requests in flight")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    parser.add_argument("--accounts", type=int, default=32,
+                        help="doctors given login credentials")
+    parser.add_argument("--pool-workers", type=int, default=2,
+                        help="PASSWORD_POOL_WORKERS (0 = hash in the threadpool)")
+    parser.add_argument("--max-pending", type=int, default=32,
+                        help="PASSWORD_POOL_MAX_PENDING")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated Firestore round-trip latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="write JSON results to this path")
+    return parser.parse_args(argv)
+
+
+def _with_credentials(fixture: dict, accounts: int) -> tuple:
+    """Add doctor_credentials for the first ``accounts`` doctors; return (fixture, emails)."""
+    password_hash = hash_password(PASSWORD)
+    credentials, emails = {}, []
+    for doctor_id in sorted(fixture["doctors"])[:accounts]:
+        email = f"{doctor_id}@bench.test"
+        credentials[f"cred_{doctor_id}"] = {
+            "doctor_id": doctor_id,
+            "email": email,
+            "password_hash": password_hash,
+        }
+        emails.append(email)
+    return {**fixture, "doctor_credentials": credentials}, emails
+
+
+async def _run(args) -> dict:
+    data = SyntheticData(seed=args.seed)
+    fixture, emails = _with_credentials(data.fixture(), args.accounts)
+    patients = data.patients(2 * args.requests)
+
+    env = {
+        "MEMORY_DB_LATENCY_MS": str(args.latency_ms),
+        "MEMORY_DB_JITTER_MS": str(args.jitter_ms),
+        "MEMORY_DB_SEED": str(args.seed),
+        "PASSWORD_POOL_WORKERS": str(args.pool_workers),
+        "PASSWORD_POOL_MAX_PENDING": str(args.max_pending),
+        # Never send real mail from a benchmark.
+        "SMTP_HOST": "",
+        "SMTP_USER": "",
+        "SMTP_PASSWORD": "",
+    }
+
+    if args.mode == "inprocess":
+        os.environ.update(env)
+        target = inprocess_client(fixture)
+    else:
+        target = uvicorn_client(fixture, env)
+
+    def intake(offset):
+        return lambda c, i: c.post("/api/submit-appointment", json=patients[offset + i])
+
+    rejected = 0
+
+    async def login(client, i):
+        nonlocal rejected
+        response = await client.post("/api/doctor/login", json={
+            "email": emails[i % len(emails)], "password": PASSWORD,
+        })
+        rejected += response.status_code == 503
+        return response
+
+    phases = {}
+    async with target as client:
+        # Start the bcrypt processes (if any) before timing anything.
+        await login(client, 0)
+        phases["intake_alone"] = await run_phase(
+            client, intake(0), args.requests, args.concurrency,
+        )
+        phases["intake_during_logins"], phases["logins"] = await asyncio.gather(
+            run_phase(client, intake(args.requests), args.requests, args.concurrency),
+            run_phase(client, login, args.logins, args.login_concurrency),
+        )
+        phases["logins"]["rejected"] = rejected
+
+    alone, storm = phases["intake_alone"], phases["intake_during_logins"]
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "benchmark": "login",
+        "started_at": datetime.now(tz=timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": phases,
+        "intake_p99_ratio": round(storm["p99_ms"] / alone["p99_ms"], 2) if alone["p99_ms"] else None,
+    }
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    report = asyncio.run(_run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+slot_bench.py — Free-slot search over a department: per-slot scan vs. bitmap calendars.
+
+Intake picks a slot for a patient by searching every doctor of the
+department over the booking horizon. This benchmark builds random
+calendars (``--occupancy`` of each shift booked) and reports
+microseconds per search for:
+
+    slot_scan          loop over each doctor's slots as a list of booleans
+    bitmap_first_fit   ``plan_slots(..., "first_fit")`` to the best candidate
+    bitmap_best_fit    ``plan_slots(..., "best_fit")`` to the best candidate
+
+Run from the backend directory:
+
+    python -m benchmarks.slot_bench --doctors 50,300,1000 \
+        --occupancy 0.7 --output results/slots.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.services.slot_calendar import (
+    SLOTS_PER_DAY,
+    booking_days,
+    plan_slots,
+    shift_mask,
+)
+
+_SHIFTS = (("09:00", "17:00"), ("08:00", "14:00"), ("14:00", "22:00"), ("20:00", "08:00"))
+
+
+def make_department(count: int, days: list, occupancy: float, rng: random.Random):
+    doctors, calendars = [], {}
+    for n in range(count):
+        start, end = rng.choice(_SHIFTS)
+        doctor = {
+            "id": f"doc-{n:05d}",
+            "shift_start": start,
+            "shift_end": end,
+            "current_appointments": rng.randint(0, 40),
+            "daily_capacity": 40,
+        }
+        doctors.append(doctor)
+        shift = shift_mask(doctor)
+        for day, _ in days:
+            booked = 0
+            for index in range(SLOTS_PER_DAY):
+                if shift >> index & 1 and rng.random() < occupancy:
+                    booked |= 1 << index
+            calendars[(doctor["id"], day)] = booked
+    return doctors, calendars
+
+
+def slot_scan(doctors: list, calendars: dict, days: list):
+    """The straightforward search: one Python-level check per slot."""
+    best = None
+    for doctor in doctors:
+        shift = shift_mask(doctor)
+        on_shift = [bool(shift >> i & 1) for i in range(SLOTS_PER_DAY)]
+        for day_index, (day, first) in enumerate(days):
+            booked = calendars.get((doctor["id"], day), 0)
+            taken = [bool(booked >> i & 1) for i in range(SLOTS_PER_DAY)]
+            found = next(
+                (i for i in range(first, SLOTS_PER_DAY) if on_shift[i] and not taken[i]), None
+            )
+            if found is not None:
+                key = (day_index, found, doctor["id"])
+                if best is None or key < best:
+                    best = key
+                break
+    return best
+
+
+def _per_search_us(fn, repeat: int, inner: int) -> float:
+    fn()  # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best / inner * 1e6, 1)
+
+
+def bench_size(count: int, args, rng: random.Random) -> dict:
+    days = booking_days(horizon=args.horizon)
+    doctors, calendars = make_department(count, days, args.occupancy, rng)
+
+    scan_us = _per_search_us(lambda: slot_scan(doctors, calendars, days), args.repeat, args.inner)
+    first_us = _per_search_us(
+        lambda: next(plan_slots(doctors, calendars, days, "first_fit"), None), args.repeat, args.inner
+    )
+    best_us = _per_search_us(
+        lambda: next(plan_slots(doctors, calendars, days, "best_fit"), None), args.repeat, args.inner
+    )
+    return {
+        "doctors": count,
+        "days": len(days),
+        "slot_scan_us": scan_us,
+        "bitmap_first_fit_us": first_us,
+        "bitmap_best_fit_us": best_us,
+        "first_fit_us_per_doctor": round(first_us / count, 2),
+        "speedup_first_fit": round(scan_us / first_us, 1) if first_us else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bitmap slot search vs. per-slot scan")
+    parser.add_argument("--doctors", default="50,300,1000",
+                        help="comma-separated department sizes")
+    parser.add_argument("--horizon", type=int, default=7, help="booking days searched")
+    parser.add_argument("--occupancy", type=float, default=0.7,
+                        help="fraction of shift slots already booked")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--inner", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results = [bench_size(int(count), args, rng) for count in args.doctors.split(",")]
+
+    report = {
+        "benchmark": "slot_search",
+        "started_at": datetime.now(tz=timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+smtp_bench.py — SMTP throughput: fresh connection per message vs. pooled.
+
+Starts a local aiosmtpd sink (accepts and discards mail) and measures
+messages per second for:
+
+    per_message_connect   the pre-pool behaviour: connect + EHLO + send + QUIT
+    pooled_single         one ``pool.send`` call per message
+    pooled_bulk_fanout    one ``pool.send_many`` call for a reschedule fan-out
+
+Run from the backend directory:
+
+    python -m benchmarks.smtp_bench --messages 500 --fanout 50 \
+        --output results/smtp.json
+
+``--handshake-delay-ms`` adds a server-side delay to every EHLO to mimic
+a remote provider's handshake latency (the local sink answers in µs).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import smtplib
+import sys
+import time
+from datetime import datetime, timezone
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP as SMTPServer
+
+from app.services.smtp_pool import SMTPConnectionPool
+from benchmarks.load_driver import free_port
+
+SENDER = "bench@aarogyalekha.test"
+MESSAGE = (
+    "Subject: Appointment Rescheduled\r\n"
+    f"From: {SENDER}\r\n"
+    "To: patient@example.test\r\n"
+    "\r\n"
+    + "Your appointment has been rescheduled.\r\n" * 40
+)
+
+
+class _SinkHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted"
+
+
+class _SlowHandshakeSMTP(SMTPServer):
+    delay_s = 0.0
+
+    async def smtp_EHLO(self, hostname):
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        await super().smtp_EHLO(hostname)
+
+
+class _SinkController(Controller):
+    def factory(self):
+        return _SlowHandshakeSMTP(self.handler)
+
+
+def _rate(count: int, elapsed: float) -> dict:
+    return {
+        "messages": count,
+        "elapsed_s": round(elapsed, 4),
+        "messages_per_second": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def bench_per_message_connect(host, port, count) -> dict:
+    start = time.perf_counter()
+    for i in range(count):
+        with smtplib.SMTP(host, port) as server:
+            server.ehlo()
+            server.sendmail(SENDER, f"patient{i}@example.test", MESSAGE)
+    return _rate(count, time.perf_counter() - start)
+
+
+def bench_pooled_single(pool, count) -> dict:
+    start = time.perf_counter()
+    for i in range(count):
+        pool.send(SENDER, f"patient{i}@example.test", MESSAGE)
+    return _rate(count, time.perf_counter() - start)
+
+
+def bench_pooled_bulk(pool, count, fanout) -> dict:
+    start = time.perf_counter()
+    sent = 0
+    while sent < count:
+        batch = [
+            (SENDER, f"patient{sent + j}@example.test", MESSAGE)
+            for j in range(min(fanout, count - sent))
+        ]
+        errors = [r for r in pool.send_many(batch) if r is not None]
+        if errors:
+            raise RuntimeError(f"bulk send failed: {errors[0]}")
+        sent += len(batch)
+    return _rate(count, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SMTP pooled vs. unpooled throughput")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--fanout", type=int, default=50,
+                        help="messages per send_many call (reschedule fan-out size)")
+    parser.add_argument("--handshake-delay-ms", type=float, default=0.0)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    _SlowHandshakeSMTP.delay_s = args.handshake_delay_ms / 1000.0
+    handler = _SinkHandler()
+    host, port = "127.0.0.1", free_port()
+    controller = _SinkController(handler, hostname=host, port=port)
+    controller.start()
+
+    try:
+        pool = SMTPConnectionPool(host, port, starttls=False, max_size=1)
+        results = {
+            "per_message_connect": bench_per_message_connect(host, port, args.messages),
+            "pooled_single": bench_pooled_single(pool, args.messages),
+            "pooled_bulk_fanout": bench_pooled_bulk(pool, args.messages, args.fanout),
+        }
+        pool.close()
+    finally:
+        controller.stop()
+
+    baseline = results["per_message_connect"]["messages_per_second"] or 1
+    for name, row in results.items():
+        row["speedup_vs_per_message_connect"] = round(row["messages_per_second"] / baseline, 2)
+
+    report = {
+        "benchmark": "smtp",
+        "started_at": datetime.now(tz=timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "pool_stats": pool.stats,
+        "sink_received": handler.received,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
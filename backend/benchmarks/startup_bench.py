@@ -0,0 +1,178 @@
+"""
+startup_bench.py — Worker cold start: import-to-ready and first-request latency.
+
+Starts ``uvicorn app.main:app`` (memory backend, synthetic fixture) as a
+fresh subprocess per run and measures:
+
+    import_to_ready   process spawn → first successful GET /  (interpreter
+                      start, imports, lifespan startup incl. warm-up)
+    first_intake      the first POST /api/submit-appointment
+    second_intake     the one after it (steady state, for comparison)
+    first_doctors     the first GET /api/doctors
+
+Each measurement is the median over ``--runs`` processes, once with the
+startup warm-up (DB_WARMUP=1) and once without (DB_WARMUP=0).
+``--connect-ms`` sets MEMORY_DB_CONNECT_MS, the simulated one-off cost of
+opening a Firestore channel, which is what the warm-up moves out of the
+first request:
+
+    python -m benchmarks.startup_bench --runs 5 --latency-ms 20 \
+        --connect-ms 400 --output results/startup.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.intake_bench import SCHEMA_VERSION, _git_revision
+from benchmarks.load_driver import BACKEND_DIR, free_port, write_fixture
+from benchmarks.synthetic import SyntheticData
+
+READY_POLL_SECONDS = 0.01
+READY_TIMEOUT_SECONDS = 60
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5,
+                        help="fresh processes per configuration")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="simulated Firestore round-trip latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--connect-ms", type=float, default=400.0,
+                        help="simulated channel connect cost (MEMORY_DB_CONNECT_MS)")
+    parser.add_argument("--output", help="write JSON results to this path")
+    return parser.parse_args(argv)
+
+
+def _with_bed_shards(fixture: dict) -> dict:
+    """
+    ``fixture`` plus its bed shards, as ``init_bed_shards`` would leave a
+    deployed database — otherwise the first claim would build them and
+    that one-off cost would be counted as a cold start.
+    """
+    os.environ["DB_BACKEND"] = "memory"
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from app.db.firebase import db
+    from app.db.resource_repo import init_bed_shards
+
+    db.reset()
+    db.load(fixture)
+    init_bed_shards()
+    return db.dump()
+
+
+async def _cold_start(fixture_path: str, env: dict, patients: list) -> dict:
+    """Start one worker, time it to ready and through its first requests."""
+    port = free_port()
+    proc_env = {
+        **os.environ,
+        **env,
+        "DB_BACKEND": "memory",
+        "MEMORY_DB_FIXTURE": fixture_path,
+    }
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=proc_env,
+    )
+    timings = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120.0) as client:
+            while True:
+                try:
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    if proc.poll() is not None or time.perf_counter() - started > READY_TIMEOUT_SECONDS:
+                        raise RuntimeError("uvicorn failed to start")
+                    await asyncio.sleep(READY_POLL_SECONDS)
+            timings["import_to_ready_ms"] = (time.perf_counter() - started) * 1000
+
+            for name, send in (
+                ("first_intake_ms", lambda: client.post("/api/submit-appointment", json=patients[0])),
+                ("second_intake_ms", lambda: client.post("/api/submit-appointment", json=patients[1])),
+                ("first_doctors_ms", lambda: client.get("/api/doctors")),
+            ):
+                t0 = time.perf_counter()
+                response = await send()
+                response.raise_for_status()
+                timings[name] = (time.perf_counter() - t0) * 1000
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return timings
+
+
+async def _run(args) -> dict:
+    data = SyntheticData(seed=args.seed)
+    fixture_path = write_fixture(_with_bed_shards(data.fixture()))
+    patients = data.patients(2)
+    base_env = {
+        "MEMORY_DB_LATENCY_MS": str(args.latency_ms),
+        "MEMORY_DB_JITTER_MS": str(args.jitter_ms),
+        "MEMORY_DB_CONNECT_MS": str(args.connect_ms),
+        "MEMORY_DB_SEED": str(args.seed),
+        # Never send real mail from a benchmark.
+        "SMTP_HOST": "",
+        "SMTP_USER": "",
+        "SMTP_PASSWORD": "",
+    }
+
+    results = {}
+    try:
+        for label, warmup in (("warmup", "1"), ("no_warmup", "0")):
+            runs = [
+                await _cold_start(fixture_path, {**base_env, "DB_WARMUP": warmup}, patients)
+                for _ in range(args.runs)
+            ]
+            results[label] = {
+                metric: round(statistics.median(run[metric] for run in runs), 3)
+                for metric in runs[0]
+            }
+            results[label]["runs"] = len(runs)
+    finally:
+        os.unlink(fixture_path)
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "benchmark": "startup",
+        "started_at": datetime.now(tz=timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    report = asyncio.run(_run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+symptom_bench.py — Symptom keyword matching: per-keyword substring loop vs. compiled matcher.
+
+The old ``parse_symptoms`` / ``_symptom_score`` ran ``kw in text`` once
+per keyword, so cost grew with the vocabulary. ``SymptomMatcher`` scans
+each text once regardless of vocabulary size. This benchmark grows a
+synthetic clinical vocabulary and reports microseconds per text for:
+
+    substring_loop     ``[kw for kw in vocabulary if kw in text]``
+    compiled_matcher   ``SymptomMatcher.scan(text)``
+
+Run from the backend directory:
+
+    python -m benchmarks.symptom_bench --sizes 25,250,2500,10000 \
+        --texts 2000 --output results/symptom.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.services.symptom_matcher import (
+    MODERATE_KEYWORDS,
+    SEVERE_KEYWORDS,
+    SYMPTOM_WEIGHTS,
+    SymptomMatcher,
+)
+
+_SYLLABLES = (
+    "ab", "al", "an", "ar", "bra", "car", "cer", "chi", "co", "derm", "di",
+    "en", "gas", "hem", "hy", "itis", "lo", "ma", "neu", "o", "pa", "per",
+    "pho", "ra", "sis", "sto", "tho", "tri", "ul", "ver",
+)
+_FILLER = ("and", "since", "yesterday", "with", "mild", "severe", "left", "right", "patient", "reports")
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    """Real keywords plus synthetic one- to three-word clinical-looking terms."""
+    vocabulary = set(SEVERE_KEYWORDS) | set(MODERATE_KEYWORDS) | set(SYMPTOM_WEIGHTS)
+    while len(vocabulary) < size:
+        words = [
+            "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        vocabulary.add(" ".join(words))
+    return sorted(vocabulary)
+
+
+def make_texts(vocabulary: list, count: int, rng: random.Random) -> list:
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(4, 12)):
+            words.append(rng.choice(vocabulary) if rng.random() < 0.3 else rng.choice(_FILLER))
+        texts.append(" ".join(words).capitalize())
+    return texts
+
+
+def _per_text_us(fn, texts: list, repeat: int) -> float:
+    for text in texts:  # warm-up
+        fn(text)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return round(best / len(texts) * 1e6, 2)
+
+
+def bench_size(size: int, text_count: int, repeat: int, rng: random.Random) -> dict:
+    vocabulary = make_vocabulary(size, rng)
+    texts = make_texts(vocabulary, text_count, rng)
+
+    start = time.perf_counter()
+    matcher = SymptomMatcher(severe=vocabulary)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def substring_loop(text):
+        lower = text.lower()
+        return [kw for kw in vocabulary if kw in lower]
+
+    loop_us = _per_text_us(substring_loop, texts, repeat)
+    matcher_us = _per_text_us(matcher.scan, texts, repeat)
+    return {
+        "vocabulary_size": len(vocabulary),
+        "build_ms": round(build_ms, 2),
+        "substring_loop_us_per_text": loop_us,
+        "compiled_matcher_us_per_text": matcher_us,
+        "speedup": round(loop_us / matcher_us, 2) if matcher_us else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Symptom matcher vs. substring loop")
+    parser.add_argument("--sizes", default="25,250,2500,10000",
+                        help="comma-separated vocabulary sizes")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results = [
+        bench_size(int(size), args.texts, args.repeat, rng)
+        for size in args.sizes.split(",")
+    ]
+
+    report = {
+        "benchmark": "symptom_matcher",
+        "started_at": datetime.now(tz=timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+synthetic.py — Seeded generator for benchmark data.
+
+Produces a memory-backend fixture (doctors, hospital resources and an
+optional backlog of historic appointments) plus a stream of intake
+payloads for ``POST /api/submit-appointment``. The same seed always yields
+the same data, so runs are comparable across releases.
+"""
+
+import random
+from datetime import datetime, timezone, timedelta
+
+DEPARTMENTS = [
+    "General Medicine", "Cardiology", "Neurology", "Orthopedics",
+    "Pediatrics", "Dermatology", "ENT", "Gastroenterology",
+]
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Ishaan", "Ananya", "Diya", "Saanvi", "Kavya",
+    "Rohan", "Meera", "Arjun", "Priya", "Kabir", "Nisha", "Rahul", "Sneha",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Iyer", "Reddy", "Nair", "Gupta", "Khan", "Das",
+    "Mehta", "Joshi", "Kulkarni", "Singh",
+]
+
+# Mix of severe / moderate / benign phrases so every triage branch is hit.
+SEVERE_SYMPTOMS = [
+    "chest pain", "breathlessness", "unconscious", "seizure", "stroke",
+    "severe bleeding", "difficulty breathing", "fainting",
+]
+MODERATE_SYMPTOMS = [
+    "fever", "vomiting", "dizziness", "headache", "nausea", "cough",
+    "fatigue", "abdominal pain", "swelling", "sprain",
+]
+BENIGN_SYMPTOMS = [
+    "mild rash", "itchy eyes", "routine checkup", "follow-up visit",
+    "sore throat", "runny nose",
+]
+
+
+class SyntheticData:
+    """Deterministic source of doctors, resources and patient payloads."""
+
+    def __init__(self, seed: int = 42, doctors_per_department: int = 4,
+                 daily_capacity: int = 10_000, severe_ratio: float = 0.05):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.doctors_per_department = doctors_per_department
+        self.daily_capacity = daily_capacity
+        self.severe_ratio = severe_ratio
+
+    def _name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def doctors(self) -> dict:
+        """Return ``{doctor_id: fields}`` for every department."""
+        result = {}
+        for d_idx, department in enumerate(DEPARTMENTS):
+            for n in range(self.doctors_per_department):
+                doctor_id = f"doc-{d_idx:02d}-{n:02d}"
+                result[doctor_id] = {
+                    "name": f"Dr. {self._name()}",
+                    "department": department,
+                    "daily_capacity": self.daily_capacity,
+                    "current_appointments": 0,
+                    "is_available": True,
+                    # Round-the-clock calendars so load runs are not capped
+                    # by slot supply (like daily_capacity above).
+                    "shift_start": "00:00",
+                    "shift_end": "24:00",
+                }
+        return result
+
+    def symptoms(self) -> str:
+        roll = self.rng.random()
+        if roll < self.severe_ratio:
+            parts = [self.rng.choice(SEVERE_SYMPTOMS), self.rng.choice(MODERATE_SYMPTOMS)]
+        elif roll < 0.6:
+            parts = self.rng.sample(MODERATE_SYMPTOMS, k=self.rng.randint(1, 3))
+        else:
+            parts = [self.rng.choice(BENIGN_SYMPTOMS)]
+        return " and ".join(parts)
+
+    def patient(self, index: int) -> dict:
+        """Return one intake payload for ``POST /api/submit-appointment``."""
+        return {
+            "patient_name": self._name(),
+            "age": self.rng.randint(1, 95),
+            "symptoms": self.symptoms(),
+            "department": self.rng.choice(DEPARTMENTS),
+            "patient_email": f"patient{index}@example.test",
+        }
+
+    def patients(self, count: int) -> list:
+        return [self.patient(i) for i in range(count)]
+
+    def historic_appointments(self, doctors: dict, count: int) -> dict:
+        """Pre-existing appointments spread over the past 90 days."""
+        now = datetime.now(tz=timezone.utc)
+        doctor_ids = sorted(doctors)
+        result = {}
+        for i in range(count):
+            doctor_id = self.rng.choice(doctor_ids)
+            doctor = doctors[doctor_id]
+            payload = self.patient(i)
+            result[f"hist-{i:07d}"] = {
+                **payload,
+                "department": doctor["department"],
+                "severity_score": self.rng.randint(0, 10),
+                "emergency": 1 if self.rng.random() < self.severe_ratio else 0,
+                "assigned_doctor_id": doctor_id,
+                "assigned_doctor_name": doctor["name"],
+                "predicted_wait_minutes": self.rng.randint(0, 240),
+                "workload_percent": 0,
+                "bed_type": "WARD",
+                "status": "completed",
+                "created_at": now - timedelta(minutes=self.rng.randint(60 * 24, 60 * 24 * 90)),
+            }
+        return result
+
+    def fixture(self, historic_appointments: int = 0) -> dict:
+        """Return a ``MemoryClient.load()`` fixture for a fresh hospital."""
+        doctors = self.doctors()
+        return {
+            "doctors": doctors,
+            "resources": {
+                "hospital_resources": {
+                    "icu_total": 1_000_000,
+                    "icu_occupied": 0,
+                    "ward_total": 1_000_000,
+                    "ward_occupied": 0,
+                },
+            },
+            "appointments": self.historic_appointments(doctors, historic_appointments),
+        }
@@ -0,0 +1,13 @@
+"""
+gunicorn.conf.py — Gunicorn server hooks (loaded by start.sh).
+
+Workers share Prometheus samples through PROMETHEUS_MULTIPROC_DIR; when a
+worker exits its live-gauge files must be marked dead so /metrics stops
+reporting them.
+"""
+
+
+def child_exit(server, worker):
+    from app.utils.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -5,7 +5,13 @@
 # Make sure we're in the right directory
 cd "$(dirname "$0")"
 
+# Shared directory for Prometheus samples so /metrics aggregates all workers.
+# It is wiped on every start so counters from a previous deploy don't leak in.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/aarogyalekha-metrics}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start the application using Gunicorn (production standard for FastAPI)
 # Binding to 0.0.0.0 and port provided by Render (default 10000)
 # Using 4 worker processes for concurrency
-exec gunicorn app.main:app --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:${PORT:-10000}
+exec gunicorn app.main:app --config gunicorn.conf.py --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:${PORT:-10000}
@@ -0,0 +1,23 @@
+"""
+Shared fixtures. Every test runs against the in-memory Firestore stand-in
+(app.db.memory_store) with no simulated latency, reset between tests.
+"""
+
+import os
+
+os.environ["DB_BACKEND"] = "memory"
+os.environ.setdefault("MEMORY_DB_LATENCY_MS", "0")
+# bcrypt in the test process instead of a worker pool.
+os.environ.setdefault("PASSWORD_POOL_WORKERS", "0")
+
+import pytest
+
+from app.db.firebase import db
+
+
+@pytest.fixture
+def store():
+    """The memory store, emptied before and after the test."""
+    db.reset()
+    yield db
+    db.reset()
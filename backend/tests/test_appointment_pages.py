@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.db.aio.appointment_repo import get_appointments_page
+from app.db.appointment_repo import _decode_cursor, _encode_cursor
+
+T0 = datetime(2025, 3, 10, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def appointments(store):
+    """Seven appointments; b/c and e/f share a timestamp, so ties break on ID."""
+    rows = {"a": 0, "b": 1, "c": 1, "d": 2, "e": 3, "f": 3, "g": 4}
+    for appointment_id, minute in rows.items():
+        store.collection("appointments").document(appointment_id).set({
+            "patient_name": appointment_id.upper(),
+            "assigned_doctor_id": "d1" if appointment_id in "aceg" else "d2",
+            "status": "scheduled",
+            "created_at": T0 + timedelta(minutes=minute),
+        })
+    return ["g", "f", "e", "d", "c", "b", "a"]   # newest first, then ID descending
+
+
+def _all_pages(limit, **kwargs):
+    ids, cursor, pages = [], None, 0
+    while True:
+        items, cursor = asyncio.run(get_appointments_page(limit=limit, cursor=cursor, **kwargs))
+        ids += [item["id"] for item in items]
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 50])
+def test_pages_cover_every_row_once_in_order(appointments, limit):
+    ids, pages = _all_pages(limit)
+
+    assert ids == appointments
+    assert pages == max(1, -(-len(appointments) // limit))
+
+
+def test_pages_filtered_by_doctor(appointments):
+    ids, _ = _all_pages(2, doctor_id="d1")
+
+    assert ids == ["g", "e", "c", "a"]
+
+
+def test_projection_keeps_created_at_for_the_cursor(appointments):
+    items, cursor = asyncio.run(get_appointments_page(limit=2, fields=["patient_name"]))
+
+    assert [set(item) for item in items] == [{"id", "patient_name", "created_at"}] * 2
+    assert cursor is not None
+
+
+def test_cursor_round_trip():
+    cursor = _encode_cursor(T0, "doc/with=odd chars")
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == (T0, "doc/with=odd chars")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", _encode_cursor(T0, "x")[:-4]])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
+
+
+def test_endpoint_pages_and_rejects_bad_cursors(appointments):
+    client = TestClient(main.app)
+
+    first = client.get("/api/appointments", params={"limit": 4}).json()
+    second = client.get("/api/appointments", params={"limit": 4, "cursor": first["next_cursor"]}).json()
+
+    assert [item["id"] for item in first["items"] + second["items"]] == appointments
+    assert second["next_cursor"] is None
+    assert client.get("/api/appointments", params={"cursor": "garbage"}).status_code == 400
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.services.batch_triage import score_batch, triage_batch
+from app.services.severity_service import calculate_severity
+from app.services.symptom_matcher import MODERATE_KEYWORDS, SEVERE_KEYWORDS, SYMPTOM_WEIGHTS
+from app.services.triage_service import compute_emergency
+
+AGES = [0, 30, 44, 44.9, 45, 64, 65, 65.5, 66, 90]
+NOISE = ["and", "since", "painting", "feverish", "mild", "the", "chest", "breathing"]
+
+
+def _single(age, symptoms):
+    """What /api/submit-appointment computes for one patient."""
+    flags = main.parse_symptoms(symptoms)
+    return {
+        "severity_score": calculate_severity(age, symptoms),
+        "emergency": compute_emergency({"age": age, **flags}),
+    }
+
+
+def _corpus(size, seed=7):
+    rng = random.Random(seed)
+    words = SEVERE_KEYWORDS + MODERATE_KEYWORDS + list(SYMPTOM_WEIGHTS) + NOISE
+    records = []
+    for _ in range(size):
+        parts = rng.sample(words, rng.randint(0, 5))
+        text = rng.choice([" ", ", ", "-", "  "]).join(parts)
+        records.append({"age": rng.choice(AGES), "symptoms": rng.choice([text, text.upper()])})
+    return records
+
+
+def test_batch_matches_single_patient_scoring():
+    records = _corpus(2000)
+
+    assert triage_batch(records) == [_single(r["age"], r["symptoms"]) for r in records]
+
+
+def test_batch_results_are_plain_ints():
+    result, = triage_batch([{"age": 70, "symptoms": "cough"}])
+    assert result == {"severity_score": 2, "emergency": 1}
+    assert type(result["severity_score"]) is int and type(result["emergency"]) is int
+
+
+def test_empty_and_missing_fields():
+    assert triage_batch([{}, {"age": 50, "symptoms": ""}]) == [
+        {"severity_score": 0, "emergency": 0},
+        {"severity_score": 1, "emergency": 0},
+    ]
+
+
+def test_lengths_must_match():
+    with pytest.raises(ValueError):
+        score_batch([30, 40], ["fever"])
+
+
+def test_endpoint_scores_in_input_order():
+    records = _corpus(50, seed=11)
+
+    response = TestClient(main.app).post("/api/triage/batch", json={"patients": records})
+
+    assert response.status_code == 200
+    assert response.json() == {"count": 50, "results": [_single(r["age"], r["symptoms"]) for r in records]}
+
+
+@pytest.mark.parametrize("body, status", [
+    ({"patients": []}, 400),
+    ({"patients": [{"age": "70"}]}, 400),
+    ({"patients": [{"age": True}]}, 400),
+    ({"patients": [{"age": 70, "symptoms": ["cough"]}]}, 400),
+    ({"patients": ["cough"]}, 400),
+    ({"patients": [{"age": 1}] * (main.MAX_TRIAGE_BATCH + 1)}, 413),
+])
+def test_endpoint_validates_the_batch(body, status):
+    assert TestClient(main.app).post("/api/triage/batch", json=body).status_code == status
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.db import resource_repo
+from app.db.aio import resource_repo as async_resource_repo
+from app.db.resource_repo import BED_SHARDS, claim_bed, get_bed_occupancy, init_bed_shards, release_bed
+
+
+@pytest.fixture
+def beds(store):
+    store.collection("resources").document("hospital_resources").set({
+        "icu_total": 3, "ward_total": 25, "icu_occupied": 1, "ward_occupied": 0,
+    })
+    return store
+
+
+def _shard(store, index):
+    return store.collection("resources").document("hospital_resources") \
+        .collection("bed_shards").document(str(index)).get().to_dict()
+
+
+def test_shards_split_the_totals_and_keep_legacy_occupancy(beds):
+    init_bed_shards()
+
+    shards = [_shard(beds, index) for index in range(BED_SHARDS)]
+    assert sum(shard["icu_capacity"] for shard in shards) == 3
+    ward = [shard["ward_capacity"] for shard in shards]
+    assert sum(ward) == 25 and max(ward) - min(ward) <= 1
+    assert get_bed_occupancy() == {"icu_total": 3, "icu_occupied": 1, "ward_total": 25, "ward_occupied": 0}
+
+
+def test_claims_stop_at_capacity(beds):
+    # Shards are created on first use.
+    claimed = [claim_bed("ICU") for _ in range(3)]
+
+    assert None not in claimed[:2] and claimed[2] is None   # one ICU bed was already taken
+    assert get_bed_occupancy()["icu_occupied"] == 3
+
+
+def test_concurrent_claims_never_overbook(beds):
+    async def claim_all():
+        return await asyncio.gather(*(async_resource_repo.claim_bed("WARD") for _ in range(40)))
+
+    claimed = asyncio.run(claim_all())
+
+    assert sum(shard is not None for shard in claimed) == 25
+    assert asyncio.run(async_resource_repo.get_bed_occupancy())["ward_occupied"] == 25
+
+
+def test_discharge_frees_the_recorded_shard_once(beds):
+    shard = claim_bed("WARD")
+    beds.collection("appointments").document("a1").set({"bed_type": "WARD", "bed_shard": shard})
+
+    assert release_bed("a1") == "released"
+    assert _shard(beds, shard)["ward_occupied"] == 0
+    assert release_bed("a1") == "already_discharged"
+    assert release_bed("missing") == "not_found"
+    assert get_bed_occupancy()["ward_occupied"] == 0
+
+
+def test_discharge_falls_back_when_the_recorded_shard_is_empty(beds):
+    init_bed_shards()   # the legacy ICU bed lands on shard 0
+    beds.collection("appointments").document("legacy").set({"bed_type": "ICU", "bed_shard": 2})
+
+    assert asyncio.run(async_resource_repo.release_bed("legacy")) == "released"
+    assert get_bed_occupancy()["icu_occupied"] == 0
+
+
+def test_unclaim_gives_back_an_unrecorded_bed(beds):
+    shard = asyncio.run(async_resource_repo.claim_bed("ICU"))
+
+    assert asyncio.run(async_resource_repo.unclaim_bed("ICU", shard)) is True
+    assert get_bed_occupancy()["icu_occupied"] == 1
+    empty = next(index for index in range(BED_SHARDS) if _shard(beds, index)["icu_occupied"] == 0)
+    assert asyncio.run(async_resource_repo.unclaim_bed("ICU", empty)) is False
+
+
+def test_rebuild_keeps_occupancy(beds, monkeypatch):
+    for _ in range(5):
+        claim_bed("WARD")
+    monkeypatch.setattr(resource_repo, "BED_SHARDS", 4)
+
+    init_bed_shards()
+
+    assert get_bed_occupancy()["ward_occupied"] == 5
+    assert len(list(beds.collection("resources").document("hospital_resources")
+                    .collection("bed_shards").stream())) == 4
@@ -0,0 +1,64 @@
+import asyncio
+
+from app.db.aio import doctor_repo
+from app.db.consultation_repo import start_next_consultation
+from app.db.queue_repo import get_queue
+from app.services.doctor_queue import DoctorQueue
+
+
+def _seed(store, queued):
+    """Doctor ``d`` with ``queued`` = [(id, severity, appointment status or None)]."""
+    store.collection("doctors").document("d").set({
+        "name": "Dr. D", "department": "ENT", "is_available": True,
+        "daily_capacity": 10, "current_appointments": len(queued),
+    })
+    queue = DoctorQueue()
+    for appointment_id, severity, status in queued:
+        queue.push(queue.new_entry(appointment_id, severity, 0))
+        if status is not None:
+            store.collection("appointments").document(appointment_id).set({
+                "status": status, "assigned_doctor_id": "d", "severity_score": severity,
+            })
+    store.collection("doctor_queues").document("d").set(queue.to_doc())
+
+
+def _queued_ids():
+    return [entry["id"] for entry in get_queue("d").entries()]
+
+
+def test_starts_the_most_urgent_patient(store):
+    _seed(store, [("low", 2, "scheduled"), ("high", 8, "scheduled")])
+
+    appointment = start_next_consultation("d")
+
+    assert appointment["id"] == "high"
+    assert store.collection("appointments").document("high").get().to_dict()["status"] == "in_consultation"
+    assert _queued_ids() == ["low"]
+
+
+def test_drops_patients_who_can_no_longer_be_seen(store):
+    _seed(store, [("low", 2, "scheduled"), ("gone", 8, "discharged")])
+
+    assert start_next_consultation("d")["id"] == "low"
+    assert _queued_ids() == []
+
+
+def test_booking_in_flight_stays_queued(store):
+    store.collection("doctors").document("d").set({
+        "name": "Dr. D", "department": "ENT", "is_available": True,
+        "daily_capacity": 10, "current_appointments": 0,
+    })
+    patient = {"appointment_id": "appt-1", "severity": 5, "emergency": 0}
+    claimed, _ = asyncio.run(doctor_repo.claim_doctor_slot("d", patient=patient))
+    assert claimed is not None
+
+    # The appointment document isn't written yet.
+    assert start_next_consultation("d") is None
+    assert _queued_ids() == ["appt-1"]
+
+
+def test_skips_in_flight_booking_for_the_next_patient(store):
+    _seed(store, [("pending", 9, None), ("low", 2, "scheduled")])
+
+    assert start_next_consultation("d")["id"] == "low"
+    assert _queued_ids() == ["pending"]
@@ -0,0 +1,113 @@
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.db import credentials_repo
+from app.db.credentials_repo import credential_id
+from app.db.migrate_credentials import migrate_collection
+
+PROFILE = {
+    "name": "Dr. Rao", "department": "ENT", "daily_capacity": 8,
+    "current_appointments": 3, "is_available": True,
+}
+NO_CHANGES = {"moved": 0, "backfilled": 0, "unchanged": 0, "duplicates": 0, "no_email": 0}
+
+
+def _hash(password):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=4)).decode()
+
+
+def _seed_legacy(store, email="Rao@Example.com", password="secret"):
+    """A pre-migration doctor: auto-ID credentials holding only the login fields."""
+    store.collection("doctors").document("d1").set(dict(PROFILE))
+    ref = store.collection("doctor_credentials").document()
+    ref.set({"email": email, "password_hash": _hash(password), "doctor_id": "d1"})
+    return ref.id
+
+
+def _credentials(store):
+    return {doc.id: doc.to_dict() for doc in store.collection("doctor_credentials").stream()}
+
+
+def test_legacy_document_moves_to_its_email_key(store):
+    legacy_id = _seed_legacy(store, email=" Rao@Example.com ")
+
+    assert migrate_collection("doctor_credentials") == {**NO_CHANGES, "moved": 1}
+
+    creds = _credentials(store)
+    assert list(creds) == [credential_id("rao@example.com")]
+    (data,) = creds.values()
+    assert legacy_id not in creds
+    assert data["email"] == "rao@example.com"
+    assert data["doctor_id"] == "d1"
+    assert {field: data[field] for field in credentials_repo.DOCTOR_LOGIN_FIELDS} == {
+        "name": "Dr. Rao", "department": "ENT", "daily_capacity": 8, "is_available": True,
+    }
+    assert "current_appointments" not in data
+
+
+def test_rerun_changes_nothing(store):
+    _seed_legacy(store)
+    migrate_collection("doctor_credentials")
+    before = _credentials(store)
+
+    assert migrate_collection("doctor_credentials") == {**NO_CHANGES, "unchanged": 1}
+    assert _credentials(store) == before
+
+
+def test_keyed_document_gets_missing_fields_backfilled(store):
+    store.collection("doctors").document("d1").set(dict(PROFILE))
+    key = credential_id("rao@example.com")
+    store.collection("doctor_credentials").document(key).set(
+        {"email": "rao@example.com", "password_hash": "x", "doctor_id": "d1"})
+
+    assert migrate_collection("doctor_credentials") == {**NO_CHANGES, "backfilled": 1}
+    assert _credentials(store)[key]["department"] == "ENT"
+
+
+def test_duplicate_emails_are_left_in_place(store):
+    first = store.collection("admin_credentials").document()
+    first.set({"email": "admin@example.com", "password_hash": "a"})
+    second = store.collection("admin_credentials").document()
+    second.set({"email": " ADMIN@example.com", "password_hash": "b"})
+    store.collection("admin_credentials").document().set({"password_hash": "c"})
+
+    counts = migrate_collection("admin_credentials")
+
+    assert counts == {**NO_CHANGES, "moved": 1, "duplicates": 1, "no_email": 1}
+    ids = {doc.id for doc in store.collection("admin_credentials").stream()}
+    assert credential_id("admin@example.com") in ids
+    assert len(ids) == 3   # one moved, the duplicate and the email-less doc stay
+
+
+def test_dry_run_writes_nothing(store):
+    _seed_legacy(store)
+    before = _credentials(store)
+
+    assert migrate_collection("doctor_credentials", dry_run=True) == {**NO_CHANGES, "moved": 1}
+    assert _credentials(store) == before
+
+
+@pytest.mark.parametrize("migrated", [False, True], ids=["legacy-lookup", "migrated"])
+def test_legacy_account_can_log_in(store, migrated):
+    _seed_legacy(store)
+    if migrated:
+        migrate_collection("doctor_credentials")
+
+    # Legacy documents hold the email as it was typed at sign-up.
+    response = TestClient(main.app).post(
+        "/api/doctor/login", json={"email": "Rao@Example.com", "password": "secret"})
+
+    assert response.status_code == 200
+    assert response.json()["user"]["id"] == "d1"
+
+
+def test_unmigrated_account_is_unknown_without_legacy_lookup(store, monkeypatch):
+    _seed_legacy(store)
+    monkeypatch.setattr(credentials_repo, "LEGACY_LOOKUP", False)
+
+    response = TestClient(main.app).post(
+        "/api/doctor/login", json={"email": "rao@example.com", "password": "secret"})
+
+    assert response.status_code == 401
@@ -0,0 +1,55 @@
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.db.credentials_repo import credential_id
+from app.db.doctor_repo import create_doctor
+from app.db.doctor_roster import roster
+
+PROFILE = {
+    "name": "Dr. Rao", "department": "ENT", "daily_capacity": 8,
+    "current_appointments": 3, "is_available": True,
+}
+
+
+def _hash(password):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=4)).decode()
+
+
+@pytest.fixture
+def client(store):
+    assert not roster.ready
+    return TestClient(main.app)
+
+
+def test_doctor_login_reads_only_the_credentials(client, store):
+    doctor_id = create_doctor(dict(PROFILE), "Rao@Example.com", _hash("secret"))
+    # Login must not depend on the profile: drop it to prove it isn't read.
+    store.collection("doctors").document(doctor_id).delete()
+
+    response = client.post("/api/doctor/login", json={"email": " rao@example.COM ", "password": "secret"})
+
+    assert response.status_code == 200
+    user = response.json()["user"]
+    assert user == {
+        "id": doctor_id, "name": "Dr. Rao", "email": "rao@example.COM", "department": "ENT",
+        "daily_capacity": 8, "is_available": True,
+    }
+
+
+def test_doctor_login_rejects_a_wrong_password(client):
+    create_doctor(dict(PROFILE), "rao@example.com", _hash("secret"))
+
+    response = client.post("/api/doctor/login", json={"email": "rao@example.com", "password": "nope"})
+
+    assert response.status_code == 401
+
+
+def test_credentials_are_keyed_by_normalized_email(store):
+    doctor_id = create_doctor(dict(PROFILE), " Rao@Example.com", _hash("secret"))
+
+    doc = store.collection("doctor_credentials").document(credential_id("rao@example.com")).get()
+    assert doc.exists
+    assert doc.to_dict()["doctor_id"] == doctor_id
+    assert "current_appointments" not in doc.to_dict()
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.db.calendar_repo import calendar_id
+from app.services import doctor_service
+from app.services.slot_calendar import encode
+
+TODAY, TOMORROW = "2025-03-10", "2025-03-11"
+SHIFT = {"shift_start": "09:00", "shift_end": "09:30"}   # slots 36-37
+
+
+@pytest.fixture(autouse=True)
+def fixed_days(monkeypatch):
+    days = [(TODAY, 0), (TOMORROW, 0)]
+    monkeypatch.setattr(doctor_service, "booking_days", lambda horizon=len(days): days[:horizon])
+    monkeypatch.setattr(doctor_service.async_doctor_repo, "booking_days", lambda horizon=len(days): days[:horizon])
+
+
+def _doctor(store, doctor_id, load=0, capacity=5, booked_today=()):
+    store.collection("doctors").document(doctor_id).set({
+        "name": doctor_id, "department": "ENT", "is_available": True,
+        "daily_capacity": capacity, "current_appointments": load, **SHIFT,
+    })
+    bits = sum(1 << index for index in booked_today)
+    store.collection("doctor_calendars").document(calendar_id(doctor_id, TODAY)).set({
+        "doctor_id": doctor_id, "department": "ENT", "date": TODAY, "booked": encode(bits),
+    })
+
+
+def _patient(appointment_id, emergency):
+    return {"appointment_id": appointment_id, "severity": 9 if emergency else 3, "emergency": emergency}
+
+
+def _assign(patient):
+    return asyncio.run(doctor_service.assign_doctor_async("ENT", patient))
+
+
+def test_assigns_least_loaded_doctor_today(store):
+    _doctor(store, "busy", load=3)
+    _doctor(store, "idle", load=1)
+
+    doctor = _assign(_patient("a1", 0))
+
+    assert doctor["id"] == "idle"
+    assert (doctor["slot"]["date"], doctor["slot"]["index"]) == (TODAY, 36)
+
+
+def test_routine_booking_rolls_over_to_a_later_day(store):
+    _doctor(store, "d", load=2, booked_today=(36, 37))
+
+    doctor = _assign(_patient("a1", 0))
+
+    assert (doctor["slot"]["date"], doctor["slot"]["index"]) == (TOMORROW, 36)
+
+
+def test_emergency_is_never_booked_into_a_later_day(store):
+    _doctor(store, "d", load=2, booked_today=(36, 37))
+
+    assert _assign(_patient("e1", 1)) is None
+
+
+def test_emergency_preempts_for_a_slot_today(store):
+    _doctor(store, "d")
+    for appointment_id in ("a1", "a2"):
+        slot = _assign(_patient(appointment_id, 0))["slot"]
+        store.collection("appointments").document(appointment_id).set(
+            {"status": "scheduled", "slot_date": slot["date"], "slot_index": slot["index"]})
+    emergency = _patient("e1", 1)
+    assert _assign(emergency) is None
+
+    doctor, moved = asyncio.run(doctor_service.preempt_doctor_async("ENT", emergency, "Emergency patient priority"))
+
+    assert [appointment["id"] for appointment in moved] == ["a2"]   # later of two equal patients
+    assert (doctor["slot"]["date"], doctor["slot"]["index"]) == (TODAY, 37)
+    assert doctor["queue_position"] == 0
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from app.db.aio import doctor_repo
+from app.db.calendar_repo import calendar_id
+from app.services.doctor_queue import DoctorQueue
+from app.services.slot_calendar import decode, encode
+
+DAY = "2025-03-10"
+EMERGENCY = {"appointment_id": "emergency", "severity": 9, "emergency": 1}
+
+
+@pytest.fixture(autouse=True)
+def fixed_days(monkeypatch):
+    monkeypatch.setattr(doctor_repo, "booking_days", lambda horizon=None: [(DAY, 0)])
+
+
+def _seed(store, queued, capacity=2, booked_slots=None, appointments=True):
+    """A full doctor (09:00-09:30, slots 36-37) with ``queued`` = [(id, severity)]."""
+    store.collection("doctors").document("d").set({
+        "name": "Dr. D", "department": "ENT", "is_available": True,
+        "daily_capacity": capacity, "current_appointments": len(queued),
+        "shift_start": "09:00", "shift_end": "09:30",
+    })
+    queue = DoctorQueue()
+    bits = 0
+    for (appointment_id, severity), slot in zip(queued, booked_slots or [36, 37]):
+        queue.push(queue.new_entry(appointment_id, severity, 0))
+        bits |= 1 << slot
+        if appointments:
+            store.collection("appointments").document(appointment_id).set({
+                "status": "scheduled", "severity_score": severity,
+                "slot_date": DAY, "slot_index": slot,
+            })
+    store.collection("doctor_queues").document("d").set(queue.to_doc())
+    store.collection("doctor_calendars").document(calendar_id("d", DAY)).set({
+        "doctor_id": "d", "department": "ENT", "date": DAY, "booked": encode(bits),
+    })
+
+
+def _preempt():
+    return asyncio.run(doctor_repo.preempt_doctor_slot("d", dict(EMERGENCY), "Emergency patient priority"))
+
+
+def _doc(store, collection, doc_id):
+    return store.collection(collection).document(doc_id).get().to_dict()
+
+
+def test_moves_only_the_least_urgent_patient(store):
+    _seed(store, [("low", 2), ("high", 8)])
+
+    doctor, moved = _preempt()
+
+    assert [appointment["id"] for appointment in moved] == ["low"]
+    assert doctor["current_appointments"] == 2
+    assert doctor["queue_position"] == 0
+    assert _doc(store, "doctors", "d")["current_appointments"] == 2
+
+    low = _doc(store, "appointments", "low")
+    assert low["status"] == "rescheduled"
+    assert "slot_index" not in low and "slot_date" not in low
+    assert _doc(store, "appointments", "high")["status"] == "scheduled"
+
+    queue = DoctorQueue.from_doc(_doc(store, "doctor_queues", "d"))
+    assert [entry["id"] for entry in queue.entries()] == ["emergency", "high"]
+
+
+def test_emergency_takes_the_freed_slot(store):
+    _seed(store, [("low", 2), ("high", 8)])
+
+    doctor, _ = _preempt()
+
+    assert doctor["slot"]["date"] == DAY
+    assert doctor["slot"]["index"] == 36
+    booked = decode(_doc(store, "doctor_calendars", calendar_id("d", DAY))["booked"])
+    assert booked == (1 << 36) | (1 << 37)
+
+
+def test_declines_when_a_displaced_booking_is_still_in_flight(store):
+    # Queue entries whose appointment documents are not written yet.
+    _seed(store, [("low", 2), ("high", 8)], appointments=False)
+    queue_before = _doc(store, "doctor_queues", "d")
+
+    assert _preempt() == (None, [])
+    assert _doc(store, "doctors", "d")["current_appointments"] == 2
+    assert _doc(store, "doctor_queues", "d") == queue_before
+
+
+def test_declines_when_nobody_is_less_urgent(store):
+    _seed(store, [("a", 9), ("b", 9)])
+    # Equal severity but already emergencies: nobody ranks below the newcomer.
+    queue = DoctorQueue()
+    for appointment_id in ("a", "b"):
+        queue.push(queue.new_entry(appointment_id, 9, 1))
+    store.collection("doctor_queues").document("d").set(queue.to_doc())
+
+    assert _preempt() == (None, [])
+    assert _doc(store, "appointments", "a")["status"] == "scheduled"
+
+
+def test_doctor_with_room_moves_nobody(store):
+    _seed(store, [("low", 2)], capacity=2, booked_slots=[36])
+
+    doctor, moved = _preempt()
+
+    assert moved == []
+    assert doctor["current_appointments"] == 2
+    assert doctor["slot"]["index"] == 37
+
+
+TOMORROW = "2025-03-11"
+
+
+def test_doctor_with_room_but_no_slot_today_moves_a_slot_holder(store):
+    _seed(store, [("low", 2), ("high", 8)], capacity=5)
+
+    doctor, moved = _preempt()
+
+    assert [appointment["id"] for appointment in moved] == ["low"]
+    assert doctor["current_appointments"] == 2
+    assert doctor["slot"]["index"] == 36
+
+
+def test_moved_patient_frees_a_later_day_slot(store):
+    _seed(store, [("low", 2), ("high", 8)])
+    store.collection("appointments").document("low").update({"slot_date": TOMORROW, "slot_index": 40})
+    store.collection("doctor_calendars").document(calendar_id("d", TOMORROW)).set({
+        "doctor_id": "d", "department": "ENT", "date": TOMORROW, "booked": encode(1 << 40),
+    })
+    # Today's slot 36 was freed by a cancellation, so the emergency can have it.
+    store.collection("doctor_calendars").document(calendar_id("d", DAY)).update({"booked": encode(1 << 37)})
+
+    doctor, moved = _preempt()
+
+    assert [appointment["id"] for appointment in moved] == ["low"]
+    assert doctor["slot"]["index"] == 36
+    assert decode(_doc(store, "doctor_calendars", calendar_id("d", TOMORROW))["booked"]) == 0
+
+
+def test_no_slot_today_without_a_movable_holder(store):
+    _seed(store, [], capacity=5)
+    # Slot 36: an earlier emergency, who can't be moved for this one.
+    # Slot 37: a booking that isn't on this doctor's queue.
+    queue = DoctorQueue()
+    queue.push(queue.new_entry("urgent", 9, 1))
+    store.collection("doctor_queues").document("d").set(queue.to_doc())
+    store.collection("appointments").document("urgent").set(
+        {"status": "scheduled", "slot_date": DAY, "slot_index": 36})
+    store.collection("doctor_calendars").document(calendar_id("d", DAY)).update({"booked": encode(0b11 << 36)})
+
+    assert _preempt() == (None, [])
+
+    doctor, moved = asyncio.run(doctor_repo.preempt_doctor_slot(
+        "d", dict(EMERGENCY), "Emergency patient priority", require_slot=False
+    ))
+    assert moved == []
+    assert "slot" not in doctor
+    assert doctor["queue_position"] == 1
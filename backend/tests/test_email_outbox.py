@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from app.db import outbox_repo
+from app.services import email_outbox
+from app.services.email_outbox import OutboxDispatcher, TokenBucket
+
+CONFIG = {
+    "rate_per_second": 20, "burst": 1, "max_attempts": 3,
+    "retry_base_seconds": 1, "retry_max_seconds": 10,
+}
+
+
+# ---------------------------------------------------------------------------
+# TokenBucket
+# ---------------------------------------------------------------------------
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket(0, burst=1)
+    started = time.monotonic()
+    assert all(bucket.acquire() for _ in range(1000))
+    assert time.monotonic() - started < 0.5
+
+
+def test_zero_rate_still_honours_stop():
+    stop = threading.Event()
+    stop.set()
+    assert TokenBucket(0, burst=1).acquire(stop) is False
+
+
+def test_negative_rate_is_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(-1, burst=1)
+
+
+def test_burst_is_immediate_then_paced():
+    bucket = TokenBucket(50, burst=3)
+    started = time.monotonic()
+    for _ in range(3):
+        assert bucket.acquire()
+    assert time.monotonic() - started < 0.01
+    assert bucket.acquire()
+    assert time.monotonic() - started >= 0.015   # one token per 20 ms
+
+
+def test_empty_bucket_returns_false_once_stopped():
+    bucket = TokenBucket(0.1, burst=1)
+    assert bucket.acquire()
+    stop = threading.Event()
+    threading.Timer(0.05, stop.set).start()
+    started = time.monotonic()
+    assert bucket.acquire(stop) is False
+    assert time.monotonic() - started < 1
+
+
+# ---------------------------------------------------------------------------
+# Bulk delivery
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def outbox_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(email_outbox, "mark_email_sent", lambda *a: calls.append(("sent",) + a))
+    monkeypatch.setattr(email_outbox, "mark_email_retry",
+                        lambda *a, **kw: calls.append(("retry",) + a + (kw.get("messages"),)))
+    return calls
+
+
+def _bulk_job(count):
+    return {
+        "id": "job", "kind": "bulk", "provider": "smtp", "attempts": 0, "to": f"{count} recipients",
+        "messages": [{"to": f"p{n}@example.com", "subject": "s", "html": "h"} for n in range(count)],
+    }
+
+
+def _fake_bulk_sender(sent_at):
+    def send(messages, throttle):
+        results = []
+        for _ in messages:
+            if not throttle():
+                results.append(RuntimeError("aborted"))
+                continue
+            sent_at.append(time.monotonic())
+            results.append(None)
+        return results
+    return send
+
+
+def test_bulk_job_takes_one_token_per_message(outbox_calls):
+    sent_at = []
+    dispatcher = OutboxDispatcher(None, _fake_bulk_sender(sent_at), CONFIG)
+
+    dispatcher._deliver_bulk(_bulk_job(3))
+
+    assert len(sent_at) == 3
+    gaps = [later - earlier for earlier, later in zip(sent_at, sent_at[1:])]
+    assert all(gap >= 0.04 for gap in gaps)   # 20/s, burst 1
+    assert outbox_calls == [("sent", "job")]
+
+
+def test_stopped_bulk_job_retries_the_unsent_messages(outbox_calls):
+    sent_at = []
+    dispatcher = OutboxDispatcher(None, _fake_bulk_sender(sent_at), CONFIG)
+    dispatcher._bucket("smtp").acquire()   # drain the only token
+    dispatcher._stop.set()
+
+    job = _bulk_job(2)
+    dispatcher._deliver_bulk(job)
+
+    assert sent_at == []
+    (kind, message_id, attempts, _, _, remaining), = outbox_calls
+    assert (kind, message_id, attempts) == ("retry", "job", 1)
+    assert remaining == job["messages"]
+
+
+# ---------------------------------------------------------------------------
+# Outbox records
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("finish", [
+    outbox_repo.mark_email_sent,
+    lambda message_id: outbox_repo.mark_email_skipped(message_id, "SMTP not configured"),
+    lambda message_id: outbox_repo.mark_email_failed(message_id, 3, "550 mailbox unavailable"),
+], ids=["sent", "skipped", "failed"])
+def test_finished_messages_drop_their_bodies(store, finish):
+    single = outbox_repo.enqueue_email("p@example.com", "Password", "temp-password", "smtp", 3)
+    bulk, = outbox_repo.enqueue_bulk_emails([[("p@example.com", "Password", "temp-password")]], "smtp", 3)
+
+    for message_id in (single, bulk):
+        finish(message_id)
+        data = store.collection(outbox_repo.COLLECTION).document(message_id).get().to_dict()
+        assert "html" not in data and "messages" not in data
@@ -0,0 +1,68 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+
+CREATED = {
+    "before": datetime(2026, 3, 30, 23, 59, 59, tzinfo=timezone.utc),
+    "first": datetime(2026, 3, 31, 0, 0, tzinfo=timezone.utc),
+    "last": datetime(2026, 3, 31, 23, 59, 59, tzinfo=timezone.utc),
+    "after": datetime(2026, 4, 1, 0, 0, tzinfo=timezone.utc),
+}
+
+
+@pytest.fixture
+def client(store):
+    for appointment_id, created_at in CREATED.items():
+        store.collection("appointments").document(appointment_id).set({
+            "patient_name": appointment_id, "department": "ENT", "status": "scheduled",
+            "created_at": created_at,
+        })
+    main.app.dependency_overrides[main.require_admin] = lambda: {"role": "admin"}
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def _ids(response):
+    return [json.loads(line)["id"] for line in response.text.splitlines()]
+
+
+def _export(client, **params):
+    return client.get("/api/admin/appointments/export", params=params)
+
+
+def test_bare_dates_cover_whole_days(client):
+    assert _ids(_export(client, start="2026-03-31", end="2026-03-31")) == ["first", "last"]
+
+
+def test_datetime_end_is_exclusive(client):
+    response = _export(client, start="2026-03-30T23:59:59", end="2026-04-01T00:00:00")
+    assert _ids(response) == ["before", "first", "last"]
+
+
+def test_offsets_are_honoured(client):
+    # 05:30 IST on 31 March is midnight UTC.
+    assert _ids(_export(client, start="2026-03-31T05:30:00+05:30")) == ["first", "last", "after"]
+
+
+def test_open_bounds_export_everything_oldest_first(client):
+    assert _ids(_export(client)) == ["before", "first", "last", "after"]
+
+
+def test_csv_and_gzip(client):
+    response = _export(client, format="csv", gzip="true", start="2026-03-31", end="2026-03-31")
+
+    assert response.headers["content-type"] == "application/gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode("utf-8"))))
+    assert [row["id"] for row in rows] == ["first", "last"]
+
+
+@pytest.mark.parametrize("params", [{"start": "31/03/2026"}, {"end": "yesterday"}, {"format": "xml"}])
+def test_bad_parameters_are_rejected(client, params):
+    assert _export(client, **params).status_code == 400
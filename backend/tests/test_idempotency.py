@@ -0,0 +1,186 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.db.aio import idempotency_repo
+from app.db.aio.idempotency_repo import IdempotencyConflict, abandon, begin, complete, request_hash
+
+SCOPE = "test"
+BODY = request_hash({"name": "Asha", "symptoms": "fever"})
+OTHER_BODY = request_hash({"name": "Asha", "symptoms": "cough"})
+
+
+@pytest.fixture(autouse=True)
+def fresh_keys(store, monkeypatch):
+    # Events are bound to the loop of the asyncio.run that created them.
+    monkeypatch.setattr(idempotency_repo, "_local", {})
+
+
+def _record(store, key):
+    return store.collection(idempotency_repo.IDEMPOTENCY_COLLECTION).document(
+        idempotency_repo._ref(SCOPE, key).id
+    ).get()
+
+
+# ---------------------------------------------------------------------------
+# Repository
+# ---------------------------------------------------------------------------
+
+def test_completed_key_replays_the_stored_response():
+    async def scenario():
+        assert await begin(SCOPE, "k", BODY) is None
+        await complete(SCOPE, "k", {"appointment_id": "a1"})
+        return await begin(SCOPE, "k", BODY)
+
+    assert asyncio.run(scenario()) == {"appointment_id": "a1"}
+
+
+def test_key_reused_with_another_body_is_a_mismatch():
+    async def scenario():
+        await begin(SCOPE, "k", BODY)
+        await complete(SCOPE, "k", {"appointment_id": "a1"})
+        await begin(SCOPE, "k", OTHER_BODY)
+
+    with pytest.raises(IdempotencyConflict) as exc_info:
+        asyncio.run(scenario())
+    assert exc_info.value.reason == "mismatch"
+
+
+def test_duplicate_gives_up_while_first_is_still_running(monkeypatch):
+    monkeypatch.setattr(idempotency_repo, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+
+    async def scenario():
+        await begin(SCOPE, "k", BODY)
+        await begin(SCOPE, "k", BODY)
+
+    with pytest.raises(IdempotencyConflict) as exc_info:
+        asyncio.run(scenario())
+    assert exc_info.value.reason == "in_progress"
+
+
+def test_concurrent_duplicate_waits_for_the_first():
+    async def first():
+        assert await begin(SCOPE, "k", BODY) is None
+        await asyncio.sleep(0.05)
+        await complete(SCOPE, "k", {"appointment_id": "a1"})
+        return "ran"
+
+    async def scenario():
+        return await asyncio.gather(first(), begin(SCOPE, "k", BODY))
+
+    assert asyncio.run(scenario()) == ["ran", {"appointment_id": "a1"}]
+
+
+def test_abandoned_key_runs_again(store):
+    async def scenario():
+        await begin(SCOPE, "k", BODY)
+        await abandon(SCOPE, "k")
+        return await begin(SCOPE, "k", BODY)
+
+    assert asyncio.run(scenario()) is None
+    assert _record(store, "k").to_dict()["status"] == "in_progress"
+
+
+def test_lapsed_lease_is_taken_over(store):
+    asyncio.run(begin(SCOPE, "k", BODY))
+    past = datetime.now(tz=timezone.utc) - timedelta(seconds=1)
+    _record(store, "k").reference.update({"lease_until": past})
+    idempotency_repo._local.clear()   # the worker holding it died
+
+    assert asyncio.run(begin(SCOPE, "k", BODY)) is None
+    assert _record(store, "k").to_dict()["lease_until"] > past
+
+
+def test_expired_record_is_treated_as_absent(store):
+    asyncio.run(begin(SCOPE, "k", BODY))
+    asyncio.run(complete(SCOPE, "k", {"appointment_id": "a1"}))
+    past = datetime.now(tz=timezone.utc) - timedelta(seconds=1)
+    _record(store, "k").reference.update({"expires_at": past})
+
+    # Even a different body may reuse an expired key.
+    assert asyncio.run(begin(SCOPE, "k", OTHER_BODY)) is None
+
+
+# ---------------------------------------------------------------------------
+# POST /api/submit-appointment
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def bookings(monkeypatch):
+    calls = []
+
+    async def fake_submit(patient_data):
+        calls.append(patient_data)
+        if patient_data.get("fail"):
+            raise RuntimeError("booking failed")
+        return {"appointment_id": f"a{len(calls)}"}
+
+    monkeypatch.setattr(main, "_submit_appointment", fake_submit)
+    return calls
+
+
+@pytest.fixture
+def client():
+    # No ``with``: the lifespan (roster warm-up, email dispatcher) isn't needed.
+    return TestClient(main.app, raise_server_exceptions=False)
+
+
+def _post(client, body, key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post("/api/submit-appointment", json=body, headers=headers)
+
+
+def test_endpoint_replays_a_retried_booking(client, bookings):
+    first = _post(client, {"name": "Asha"}, key="k1")
+    retry = _post(client, {"name": "Asha"}, key="k1")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json() == {"appointment_id": "a1"}
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(bookings) == 1
+
+
+def test_endpoint_rejects_a_reused_key(client, bookings):
+    _post(client, {"name": "Asha"}, key="k1")
+    response = _post(client, {"name": "Ravi"}, key="k1")
+
+    assert response.status_code == 422
+    assert len(bookings) == 1
+
+
+def test_endpoint_rejects_an_overlong_key(client, bookings):
+    response = _post(client, {"name": "Asha"}, key="x" * (idempotency_repo.MAX_KEY_LENGTH + 1))
+
+    assert response.status_code == 400
+    assert bookings == []
+
+
+def test_endpoint_reports_a_running_duplicate(client, bookings, monkeypatch):
+    monkeypatch.setattr(idempotency_repo, "IDEMPOTENCY_WAIT_SECONDS", 0.05)
+    asyncio.run(begin(main._IDEMPOTENCY_SCOPE, "k1", request_hash({"name": "Asha"})))
+    idempotency_repo._local.clear()
+
+    response = _post(client, {"name": "Asha"}, key="k1")
+
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert bookings == []
+
+
+def test_endpoint_retries_a_failed_booking(client, bookings):
+    assert _post(client, {"name": "Asha", "fail": True}, key="k1").status_code == 500
+    # The failure released the key, so the retry runs instead of waiting or replaying.
+    assert _post(client, {"name": "Asha", "fail": True}, key="k1").status_code == 500
+
+    assert len(bookings) == 2
+
+
+def test_endpoint_without_a_key_always_runs(client, bookings):
+    _post(client, {"name": "Asha"})
+    _post(client, {"name": "Asha"})
+
+    assert len(bookings) == 2
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+import app.main as main
+from app.db.queue_repo import get_queue
+from app.db.resource_repo import get_bed_occupancy
+from app.services import doctor_service
+from app.services.doctor_queue import DoctorQueue
+from app.services.slot_calendar import decode
+
+PATIENT = {"patient_name": "Asha", "age": 40, "symptoms": "chest pain", "department": "Cardiology"}
+
+
+@pytest.fixture
+def hospital(store):
+    store.collection("resources").document("hospital_resources").set({"icu_total": 2, "ward_total": 2})
+    store.collection("doctors").document("d").set({
+        "name": "Dr. D", "department": "Cardiology", "is_available": True,
+        "daily_capacity": 1, "current_appointments": 1,
+        "shift_start": "00:00", "shift_end": "24:00",
+    })
+    return store
+
+
+@pytest.fixture
+def emergency(monkeypatch):
+    monkeypatch.setattr(main, "compute_emergency", lambda triage_input: 1)
+
+
+def _submit(body=PATIENT):
+    return asyncio.run(main._submit_appointment(dict(body)))
+
+
+def test_failed_preemption_gives_the_bed_back(hospital, emergency, monkeypatch):
+    async def preempt_times_out(*args):
+        raise TimeoutError("deadline exceeded")
+
+    monkeypatch.setattr(main, "preempt_doctor_async", preempt_times_out)
+
+    with pytest.raises(TimeoutError):
+        _submit()
+    assert get_bed_occupancy()["icu_occupied"] == 0
+
+
+@pytest.fixture
+def doctor_with_room(hospital):
+    hospital.collection("doctors").document("d").update({"current_appointments": 0})
+    return hospital
+
+
+def test_failed_persist_gives_back_doctor_slot_and_bed(doctor_with_room, monkeypatch):
+    async def write_fails(data, appointment_id):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(main.async_appointments, "create_appointment", write_fails)
+
+    with pytest.raises(RuntimeError):
+        _submit()
+
+    store = doctor_with_room
+    assert store.collection("doctors").document("d").get().to_dict()["current_appointments"] == 0
+    assert get_queue("d").entries() == []
+    assert not any(decode(doc.to_dict()["booked"]) for doc in store.collection("doctor_calendars").stream())
+    assert get_bed_occupancy()["ward_occupied"] == 0
+
+
+def _stage_count(stage):
+    return REGISTRY.get_sample_value("intake_stage_duration_seconds_count", {"stage": stage}) or 0
+
+
+def test_preempting_request_times_each_stage_once(hospital, emergency, monkeypatch):
+    day = [("2025-03-10", 0)]
+    monkeypatch.setattr(doctor_service, "booking_days", lambda horizon=None: day)
+    monkeypatch.setattr(doctor_service.async_doctor_repo, "booking_days", lambda horizon=None: day)
+    monkeypatch.setattr(main, "send_rescheduling_emails", lambda appointments, reason: None)
+    queue = DoctorQueue()
+    queue.push(queue.new_entry("low", 1, 0))
+    hospital.collection("doctor_queues").document("d").set(queue.to_doc())
+    hospital.collection("appointments").document("low").set(
+        {"status": "scheduled", "assigned_doctor_id": "d", "slot_date": "2025-03-10", "slot_index": 40})
+    before = {stage: _stage_count(stage) for stage in ("emergency_reschedule", "reschedule_email")}
+
+    response = _submit()
+
+    assert response["rescheduled_appointment_ids"] == ["low"]
+    assert {stage: _stage_count(stage) - count for stage, count in before.items()} == {
+        "emergency_reschedule": 1, "reschedule_email": 1,
+    }
@@ -0,0 +1,45 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.utils.metrics import MetricsMiddleware
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/metrics-test/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_successful_request_is_counted_and_timed():
+    labels = {"method": "GET", "route": "/metrics-test/ok"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    assert _client().get("/metrics-test/ok").status_code == 200
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+    assert _sample("http_requests_total", status="200", **labels) >= 1
+
+
+def test_failing_request_is_timed_too():
+    labels = {"method": "GET", "route": "/metrics-test/boom"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+    errors = _sample("http_request_errors_total", kind="exception", **labels)
+
+    assert _client().get("/metrics-test/boom").status_code == 500
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+    assert _sample("http_request_errors_total", kind="exception", **labels) == errors + 1
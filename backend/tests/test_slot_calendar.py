@@ -0,0 +1,161 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.slot_calendar import (
+    FULL_DAY,
+    HOSPITAL_TIMEZONE,
+    SLOTS_PER_DAY,
+    best_fit,
+    booking_days,
+    decode,
+    encode,
+    first_fit,
+    free_runs,
+    plan_slots,
+    shift_mask,
+    slot_info,
+)
+
+
+def _bits(*indexes):
+    value = 0
+    for index in indexes:
+        value |= 1 << index
+    return value
+
+
+def _run(start, length):
+    return ((1 << length) - 1) << start
+
+
+def _doctor(doctor_id, load=0, capacity=10, **fields):
+    return {"id": doctor_id, "current_appointments": load, "daily_capacity": capacity, **fields}
+
+
+# ---------------------------------------------------------------------------
+# Bitmaps
+# ---------------------------------------------------------------------------
+
+def test_encode_decode_round_trip():
+    bits = _bits(0, 37, SLOTS_PER_DAY - 1)
+    data = encode(bits)
+    assert len(data) == 12
+    assert decode(data) == bits
+    assert decode(None) == 0
+    assert decode(encode(FULL_DAY)) == FULL_DAY
+
+
+def test_shift_mask_day_and_overnight():
+    assert shift_mask({"shift_start": "09:00", "shift_end": "10:00"}) == _run(36, 4)
+    # 22:00-02:00 wraps: evening plus early morning of the same calendar day.
+    assert shift_mask({"shift_start": "22:00", "shift_end": "02:00"}) == _run(88, 8) | _run(0, 8)
+    assert shift_mask({"shift_start": "00:00", "shift_end": "24:00"}) == FULL_DAY
+
+
+def test_first_fit():
+    free = _run(4, 2) | _run(10, 5)
+    assert first_fit(free) == 4
+    assert first_fit(free, 3) == 10
+    assert first_fit(free, 6) is None
+    assert first_fit(0) is None
+
+
+def test_free_runs_and_best_fit():
+    free = _run(2, 6) | _run(20, 2) | _run(40, 3)
+    assert list(free_runs(free)) == [(2, 6), (20, 2), (40, 3)]
+    assert best_fit(free) == (20, 2)
+    assert best_fit(free, 3) == (40, 3)
+    assert best_fit(free, 7) is None
+
+
+# ---------------------------------------------------------------------------
+# Days
+# ---------------------------------------------------------------------------
+
+def test_booking_days_start_at_next_slot():
+    now = datetime(2025, 3, 10, 9, 7, tzinfo=HOSPITAL_TIMEZONE)
+    days = booking_days(now, horizon=3)
+    assert days == [("2025-03-10", 37), ("2025-03-11", 0), ("2025-03-12", 0)]
+    on_boundary = datetime(2025, 3, 10, 9, 15, tzinfo=HOSPITAL_TIMEZONE)
+    assert booking_days(on_boundary, horizon=1) == [("2025-03-10", 37)]
+
+
+def test_booking_days_skip_finished_today():
+    late = datetime(2025, 3, 10, 23, 50, tzinfo=HOSPITAL_TIMEZONE)
+    assert booking_days(late, horizon=2) == [("2025-03-11", 0)]
+
+
+def test_slot_info_times():
+    info = slot_info("2025-03-10", 36, length=2)
+    assert info["start"].startswith("2025-03-10T09:00:00")
+    assert info["end"].startswith("2025-03-10T09:30:00")
+
+
+# ---------------------------------------------------------------------------
+# plan_slots
+# ---------------------------------------------------------------------------
+
+DAYS = [("2025-03-10", 0), ("2025-03-11", 0)]
+SHIFT = {"shift_start": "09:00", "shift_end": "10:00"}   # slots 36-39
+
+
+def _plan(doctors, calendars, days=DAYS, policy="first_fit"):
+    return [(doctor["id"], day, index) for doctor, day, index in plan_slots(doctors, calendars, days, policy)]
+
+
+def test_plan_prefers_least_loaded_within_a_day():
+    doctors = [_doctor("busy", load=8, **SHIFT), _doctor("idle", load=1, **SHIFT)]
+    calendars = {("idle", "2025-03-10"): _bits(36)}
+    assert _plan(doctors, calendars) == [
+        ("idle", "2025-03-10", 37),
+        ("busy", "2025-03-10", 36),
+    ]
+
+
+def test_plan_prefers_earlier_day_over_load():
+    doctors = [_doctor("busy", load=8, **SHIFT), _doctor("idle", load=0, **SHIFT)]
+    calendars = {("idle", "2025-03-10"): _run(36, 4)}   # idle is full today
+    assert _plan(doctors, calendars) == [
+        ("busy", "2025-03-10", 36),
+        ("idle", "2025-03-11", 36),
+    ]
+
+
+def test_plan_ties_break_on_slot_then_id():
+    doctors = [_doctor("b", **SHIFT), _doctor("a", **SHIFT), _doctor("c", **SHIFT)]
+    calendars = {("a", "2025-03-10"): _bits(36)}
+    assert _plan(doctors, calendars) == [
+        ("b", "2025-03-10", 36),
+        ("c", "2025-03-10", 36),
+        ("a", "2025-03-10", 37),
+    ]
+
+
+def test_plan_respects_first_bookable_slot_and_skips_full_doctors():
+    doctors = [_doctor("early", shift_start="08:00", shift_end="09:00"), _doctor("late", **SHIFT)]
+    calendars = {("late", day): _run(36, 4) for day, _ in DAYS}
+    days = [("2025-03-10", 34)]   # it is 08:30: only 08:30-09:00 left for "early"
+    assert _plan(doctors, calendars, days) == [("early", "2025-03-10", 34)]
+
+
+def test_plan_best_fit_picks_the_tightest_gap():
+    doctor = _doctor("d", shift_start="09:00", shift_end="12:00")   # slots 36-47
+    # Free: 36-39 (4 slots) and 44 (1 slot).
+    calendars = {("d", "2025-03-10"): _run(40, 4) | _run(45, 3)}
+    assert _plan([doctor], calendars, policy="first_fit") == [("d", "2025-03-10", 36)]
+    assert _plan([doctor], calendars, policy="best_fit") == [("d", "2025-03-10", 44)]
+
+
+def test_plan_is_lazy():
+    doctors = [_doctor(f"d{n}", **SHIFT) for n in range(3)]
+    planned = plan_slots(doctors, {}, DAYS)
+    assert next(planned)[0]["id"] == "d0"
+    assert len(list(planned)) == 2
+
+
+@pytest.mark.parametrize("policy", ["first_fit", "best_fit"])
+def test_plan_empty_when_nobody_has_room(policy):
+    doctors = [_doctor("d", **SHIFT)]
+    calendars = {("d", day): FULL_DAY for day, _ in DAYS}
+    assert _plan(doctors, calendars, policy=policy) == []
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.db.aio import doctor_repo as async_doctor_repo
+from app.db.appointment_repo import create_appointment
+from app.db.doctor_repo import create_doctor
+from app.db.stats_repo import COUNTER_FIELDS, STATS_SHARDS, get_stats, increment_stats, reconcile_stats
+
+
+def _same(counted, scanned):
+    assert counted.keys() == scanned.keys()
+    for name in COUNTER_FIELDS:
+        assert counted[name] == pytest.approx(scanned[name]), name
+
+
+def test_unreconciled_counters_read_as_missing(store):
+    increment_stats(total_appointments=1)
+    assert get_stats() is None
+
+
+def test_increments_agree_with_a_full_scan(store):
+    busy = create_doctor({"name": "A", "department": "ENT", "daily_capacity": 4,
+                          "current_appointments": 1, "is_available": True})
+    create_doctor({"name": "B", "department": "ENT", "daily_capacity": 0, "is_available": True})
+    reconcile_stats()
+
+    create_appointment({"emergency": 1, "status": "scheduled"}, "a1")
+    create_appointment({"emergency": 0, "status": "scheduled"}, "a2")
+    for _ in range(2):
+        asyncio.run(async_doctor_repo.claim_doctor_slot(busy))
+    asyncio.run(async_doctor_repo.release_doctor_slot(busy))
+
+    counted = get_stats()
+    assert counted["total_appointments"] == 2
+    assert counted["emergency_cases"] == 1
+    assert counted["total_doctors"] == 2
+    assert counted["capacity_doctors"] == 1
+    assert counted["workload_sum"] == pytest.approx(50.0)   # 2 of 4
+    _same(counted, reconcile_stats())
+
+
+def test_reconcile_folds_shards_into_one(store):
+    increment_stats(total_appointments=3)
+    store.collection("stats").document("hospital").collection("shards").document("99").set(
+        {"total_appointments": 5})
+
+    reconcile_stats()
+
+    shards = list(store.collection("stats").document("hospital").collection("shards").stream())
+    assert sorted(int(doc.id) for doc in shards) == list(range(STATS_SHARDS))
+    assert get_stats()["total_appointments"] == 0
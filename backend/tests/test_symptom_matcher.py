@@ -0,0 +1,55 @@
+import doctest
+
+import pytest
+
+from app.services import severity_service
+from app.services.symptom_matcher import SymptomMatcher, match_symptoms
+
+
+@pytest.mark.parametrize("text, terms", [
+    ("Chest pain since morning", {"chest pain", "pain"}),
+    ("chest   pain", {"chest pain", "pain"}),
+    ("chest-pain, FEVER", {"chest pain", "pain", "fever"}),
+    ("painting the house", set()),
+    ("a painful knee", set()),
+    ("repeated headaches", {"headache"}),
+    ("feverish", set()),
+    ("abdominal pain and nausea", {"abdominal pain", "pain", "nausea"}),
+    ("shortness of breath", {"shortness of breath"}),
+    ("shortness of", set()),
+    ("", set()),
+])
+def test_terms_match_on_word_boundaries(text, terms):
+    assert set(match_symptoms(text).terms) == terms
+
+
+def test_flags_and_weight():
+    match = match_symptoms("fever, fever and an unconscious episode")
+
+    assert match.severe and match.moderate
+    assert match.weight == 2 + 5   # each distinct term counts once
+
+
+def test_no_symptoms():
+    match = match_symptoms(None)
+    assert (match.terms, match.severe, match.moderate, match.weight) == (frozenset(), False, False, 0)
+
+
+def test_overlapping_terms_follow_failure_links():
+    matcher = SymptomMatcher(severe=["a b c"], moderate=["b c d", "c"])
+
+    assert set(matcher.scan("a b c d").terms) == {"a b c", "b c d", "c"}
+    assert set(matcher.scan("a b b c d").terms) == {"b c d", "c"}
+
+
+def test_plural_that_is_its_own_term_keeps_its_meaning():
+    matcher = SymptomMatcher(severe=["burn"], moderate=["burns"])
+
+    match = matcher.scan("burns")
+    assert set(match.terms) == {"burns"}
+    assert not match.severe
+
+
+def test_severity_docstring_examples():
+    result = doctest.testmod(severity_service)
+    assert result.attempted and not result.failed
@@ -0,0 +1,129 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.db.revocation_repo import RevocationList, revocations
+from app.utils import jwt_utils
+from app.utils.jwt_utils import TokenCache, create_token, token_cache, verify_token
+
+
+@pytest.fixture(autouse=True)
+def clean_tokens(store):
+    revocations.stop()
+    token_cache._entries.clear()
+    yield
+    revocations.stop()
+    token_cache._entries.clear()
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    real = jwt_utils.decode_token
+
+    def counting(token):
+        calls.append(token)
+        return real(token)
+
+    monkeypatch.setattr(jwt_utils, "decode_token", counting)
+    return calls
+
+
+def _token(**claims):
+    return create_token({"sub": "d1", "role": "doctor", **claims})
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def test_repeat_requests_skip_verification(decodes):
+    token = _token()
+
+    assert verify_token(token) == verify_token(token)
+    assert len(decodes) == 1
+
+
+def test_cached_claims_lapse_at_expiry(monkeypatch):
+    token = _token()
+    claims = verify_token(token)
+    assert token_cache.get(token) == claims
+
+    monkeypatch.setattr(jwt_utils.time, "time", lambda: claims["exp"] + 1)
+
+    assert token_cache.get(token) is None
+    assert len(token_cache) == 0
+
+
+def test_expired_token_is_rejected():
+    token = create_token({"sub": "d1"}, expires_hours=-1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        verify_token(token)
+    assert exc_info.value.status_code == 401
+    assert len(token_cache) == 0
+
+
+def test_cache_is_a_bounded_lru():
+    cache = TokenCache(max_size=2)
+    exp = time.time() + 60
+    cache.put("a", {"exp": exp})
+    cache.put("b", {"exp": exp})
+    cache.get("a")               # "b" is now least recently used
+    cache.put("c", {"exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_tokens_without_expiry_are_not_cached():
+    cache = TokenCache()
+    cache.put("forever", {"sub": "d1"})
+    assert len(cache) == 0
+
+
+# ---------------------------------------------------------------------------
+# Revocation
+# ---------------------------------------------------------------------------
+
+def test_logout_revokes_a_cached_token():
+    client = TestClient(main.app)
+    token = _token()
+    headers = {"Authorization": f"Bearer {token}"}
+    verify_token(token)   # cached
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    response = client.post("/api/auth/logout", headers=headers)
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    assert verify_token(_token())["sub"] == "d1"   # other tokens are unaffected
+
+
+def test_revocation_reaches_other_workers(store):
+    other = RevocationList()   # another worker's list, fed by its listener
+    try:
+        assert other.start(timeout=2)
+        token = _token()
+        jwt_utils.revoke_token(token, verify_token(token))
+
+        jti = jwt_utils.decode_token(token)["jti"]
+        deadline = time.monotonic() + 2
+        while not other.is_revoked(jti) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert other.is_revoked(jti)
+    finally:
+        other.stop()
+
+
+def test_cold_list_reads_firestore(store):
+    store.collection("revoked_tokens").document("abc").set(
+        {"expires_at": datetime.now(tz=timezone.utc) + timedelta(hours=1)})
+
+    assert not RevocationList().ready
+    assert RevocationList().is_revoked("abc")
+    assert not RevocationList().is_revoked("other")